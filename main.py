@@ -20,7 +20,8 @@ import time
 import random
 import streamlit.components.v1 as components
 
-from src.data import load_mock_data, load_queue_data
+from src.data import ingest_results
+from src.scheduler import start_service
 from src.views import home, models as models_view, problems_results, compare, ctf, manage, create_benchmark, view_queue
 
 
@@ -352,17 +353,19 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 
-models, benchmarks, environments, runs = load_mock_data()
-running_jobs, queued_jobs = load_queue_data()
+# Each section is a fragment that loads its own (cached) data, so interacting with a widget
+# reruns only the section it lives in; full-page reruns still render every section.
+ingest_results()
+# Admission and reaping run in the background whether or not anyone has the Job Queue open.
+start_service()
 
-
-home.render(models)
-models_view.render(models, benchmarks, runs)
-problems_results.render(benchmarks, runs)
-compare.render(models)
+home.render()
+models_view.render()
+problems_results.render()
+compare.render()
 manage.render()
 create_benchmark.render()
-view_queue.render(running_jobs, queued_jobs)
+view_queue.render()
 
 
 
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from src.plans import RESULT_STATUSES
+
+# Per-cell running sums; every derived metric (solve rate, mean success, averages) is a ratio of these.
+# first_solves is the exception: whether the cell's earliest run solved it, set once when the cell appears.
+# Cells only see finished runs, so count is attempts and solves / count the solve rate pass@k is built on.
+FIELDS = ('count', 'solves', 'success_sum', 'success_n', 'ttf_sum', 'ttf_n', 'tokens', 'cost', 'first_solves')
+_FIRST = FIELDS.index('first_solves')
+
+
+def _chunk_sums(runs):
+    """Sums of one batch of runs per (model_id, problem_id), vectorized; runs arrive in id order, so a group's
+    first row is its earliest run. Only finished runs (RESULT_STATUSES) count: a running or errored run is no
+    attempt at the problem."""
+    runs = runs[np.asarray(runs['status'].isin(RESULT_STATUSES), dtype=bool)]
+    frame = pd.DataFrame({
+        'model_id': runs['model_id'].to_numpy(dtype='int64'),
+        'problem_id': runs['problem_id'].to_numpy(dtype='int64'),
+        'count': 1.0,
+        'solves': runs['solved'].fillna(False).to_numpy(dtype='float64'),
+        'success_sum': runs['success_rate'].fillna(0).to_numpy(dtype='float64'),
+        'success_n': runs['success_rate'].notna().to_numpy(dtype='float64'),
+        'ttf_sum': runs['ttf'].fillna(0).to_numpy(dtype='float64'),
+        'ttf_n': runs['ttf'].notna().to_numpy(dtype='float64'),
+        'tokens': runs['tokens'].fillna(0).to_numpy(dtype='float64'),
+        'cost': runs['cost'].fillna(0).to_numpy(dtype='float64'),
+    })
+    grouped = frame.groupby(['model_id', 'problem_id'], sort=False)
+    sums = grouped.sum()
+    sums['first_solves'] = grouped['solves'].first()
+    return sums.reset_index()
+
+
+class ModelProblemMatrix:
+    """Materialized model x problem aggregate of the runs, updated in place as runs land.
+
+    Cells are stored sparsely (one slot per observed pair) in growable arrays,
+    so adding a batch costs O(batch) and reading a slice costs O(cells), never
+    O(runs).
+    """
+
+    def __init__(self, runs=None):
+        self._slots = {}
+        self._n = 0
+        self._model_id = np.zeros(0, dtype='int64')
+        self._problem_id = np.zeros(0, dtype='int64')
+        self._sums = np.zeros((len(FIELDS), 0))
+        if runs is not None and len(runs):
+            self.add(runs)
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self, needed):
+        capacity = self._model_id.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 64)
+        self._model_id = np.resize(self._model_id, capacity)
+        self._problem_id = np.resize(self._problem_id, capacity)
+        sums = np.zeros((len(FIELDS), capacity))
+        sums[:, :self._n] = self._sums[:, :self._n]
+        self._sums = sums
+
+    def add(self, runs):
+        """Folds a batch of runs (flat run columns) into the matrix."""
+        sums = _chunk_sums(runs)
+        keys = list(zip(sums['model_id'].tolist(), sums['problem_id'].tolist()))
+        slots = np.fromiter((self._slots.get(key, -1) for key in keys), dtype='int64', count=len(keys))
+        new = np.flatnonzero(slots < 0)
+        values = sums[list(FIELDS)].to_numpy().T
+        values[_FIRST, slots >= 0] = 0
+        if len(new):
+            self._grow(self._n + len(new))
+            new_slots = np.arange(self._n, self._n + len(new))
+            self._model_id[new_slots] = sums['model_id'].to_numpy()[new]
+            self._problem_id[new_slots] = sums['problem_id'].to_numpy()[new]
+            self._slots.update(zip((keys[i] for i in new), new_slots.tolist()))
+            slots[new] = new_slots
+            self._n += len(new)
+        # Keys are unique within a grouped batch, so plain fancy-index addition is safe.
+        self._sums[:, slots] += values
+
+    def cells(self, problem_ids=None, model_ids=None):
+        """Per-cell sums and derived metrics, optionally restricted to some problems and/or models."""
+        n = self._n
+        mask = np.ones(n, dtype=bool)
+        if problem_ids is not None:
+            mask &= np.isin(self._problem_id[:n], np.asarray(list(problem_ids), dtype='int64'))
+        if model_ids is not None:
+            mask &= np.isin(self._model_id[:n], np.asarray(list(model_ids), dtype='int64'))
+        frame = pd.DataFrame(self._sums[:, :n][:, mask].T, columns=FIELDS)
+        frame.insert(0, 'problem_id', self._problem_id[:n][mask])
+        frame.insert(0, 'model_id', self._model_id[:n][mask])
+        return _with_ratios(frame)
+
+    def pivot(self, metric='mean_success', problem_ids=None):
+        """Model x problem table of one metric for the requested problems (the Model Hub slice)."""
+        cells = self.cells(problem_ids=problem_ids)
+        return cells.pivot(index='model_id', columns='problem_id', values=metric)
+
+    def by_model(self):
+        """Cells rolled up per model, with the same derived metrics."""
+        n = self._n
+        frame = pd.DataFrame(self._sums[:, :n].T, columns=FIELDS)
+        frame['model_id'] = self._model_id[:n]
+        return _with_ratios(frame.groupby('model_id').sum().reset_index())
+
+
+def _with_ratios(frame):
+    count = frame['count'].where(frame['count'] > 0)
+    frame['solve_rate'] = frame['solves'] / count
+    frame['mean_success'] = frame['success_sum'] / frame['success_n'].where(frame['success_n'] > 0)
+    frame['avg_ttf'] = frame['ttf_sum'] / frame['ttf_n'].where(frame['ttf_n'] > 0)
+    frame['avg_tokens'] = frame['tokens'] / count
+    frame['avg_cost'] = frame['cost'] / count
+    return frame
@@ -0,0 +1,200 @@
+import contextlib
+import fcntl
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from src.hashing import CHUNK_SIZE, sha256_path
+from src.run_store import DATA_DIR
+from src.store import get_store
+
+BLOB_DIR = os.path.join(DATA_DIR, 'blobs')
+
+# Unreferenced blobs younger than this survive gc(), so a put() whose attach() has not landed yet is never collected.
+GC_GRACE_SECONDS = 3600
+
+_FICLONE = 0x40049409  # Linux ioctl that makes dst share src's extents (copy-on-write) on btrfs/XFS.
+
+
+def _reflink(src, dst):
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+
+
+def _clone(src, dst):
+    """Reflinks src to dst when the filesystem supports it, otherwise copies (sendfile under the hood)."""
+    try:
+        _reflink(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class BlobStore:
+    """Content-addressed attachment store: one read-only file per distinct SHA-256, under root/ab/cd/<digest>.
+
+    Identical attachments across CTFs are stored once. The attachments table
+    points problems at digests and blobs.refcount counts those references, so
+    gc() can drop what nothing uses (bulk imports run it once they finish).
+    """
+
+    def __init__(self, store, root=BLOB_DIR):
+        self.store = store
+        self.root = root
+        self._tmp = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def _register(self, digest, size):
+        """Records a blob, or refreshes its created_at if it is already recorded: gc() spares a blob for `grace`
+        seconds after every put(), not only after the first, so an unreferenced one is not collected before
+        attach()."""
+        with self.store.connection() as conn:
+            conn.execute(
+                'INSERT INTO blobs(sha256, size, refcount, created_at) VALUES (?, ?, 0, ?) '
+                'ON CONFLICT(sha256) DO UPDATE SET created_at = excluded.created_at',
+                (digest, size, time.time()),
+            )
+
+    def _touch(self, digest):
+        """Refreshes a recorded blob's created_at (see _register); whether it is recorded and on disk."""
+        with self.store.connection() as conn:
+            recorded = conn.execute('UPDATE blobs SET created_at = ? WHERE sha256 = ?', (time.time(), digest)).rowcount
+        return bool(recorded) and self.exists(digest)
+
+    def _publish(self, tmp, digest):
+        """Moves a finished temp file to its content address, or drops it when that blob already exists."""
+        # Register before looking: a gc() that has not deleted the blob yet now spares it, and one that already
+        # has committed its unlink (writers are serialized), so the check below sees the file is gone.
+        self._register(digest, os.path.getsize(tmp))
+        dest = self.path(digest)
+        if os.path.exists(dest):
+            os.unlink(tmp)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, dest)
+        return digest
+
+    def put_stream(self, fileobj, digest=None):
+        """Stores a binary file object, hashing while it is written; returns its digest.
+
+        Pass a `digest` already computed for the object (e.g. the add_ctf
+        memo) to skip the write entirely when that blob is already stored.
+        """
+        if digest is not None and self._touch(digest):
+            return digest
+        sha = hashlib.sha256()
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        fileobj.seek(0)
+        with tempfile.NamedTemporaryFile(dir=self._tmp, delete=False) as out:
+            while True:
+                n = fileobj.readinto(buffer)
+                if not n:
+                    break
+                sha.update(view[:n])
+                out.write(view[:n])
+        fileobj.seek(0)
+        return self._publish(out.name, sha.hexdigest())
+
+    def put_path(self, path):
+        """Stores a file from disk; a duplicate costs one hash pass and no write, a new file a reflink or copy.
+
+        The source is never hardlinked in: it stays writable by its owner, and
+        editing it would silently change the stored blob.
+        """
+        digest = sha256_path(path)
+        if self._touch(digest):
+            return digest
+        fd, tmp = tempfile.mkstemp(dir=self._tmp)
+        os.close(fd)
+        _clone(path, tmp)
+        return self._publish(tmp, digest)
+
+    @contextlib.contextmanager
+    def open(self, digest):
+        """Read-only memoryview of a blob, valid inside the `with` block; backed by a memory map, so pages load
+        on access and large binaries are never read whole. Empty blobs (which cannot be mapped) give an empty view."""
+        with open(self.path(digest), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                with memoryview(b'') as view:
+                    yield view
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                yield view
+
+    def attach(self, problem_id, items):
+        """Links stored blobs to a problem; `items` are (digest, name, role). Rows and refcounts change in one transaction."""
+        items = list(items)
+        with self.store.connection() as conn:
+            conn.executemany(
+                'INSERT INTO attachments(problem_id, sha256, name, role) VALUES (?, ?, ?, ?)',
+                [(problem_id, digest, name, role) for digest, name, role in items],
+            )
+            updated = conn.executemany('UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?', [(d,) for d, _, _ in items])
+            if updated.rowcount != len(items):
+                # Raising rolls the attachment rows back rather than leave them pointing at no file.
+                raise LookupError(f"Attaching blobs that are not stored to problem {problem_id}")
+            self.store._bump(conn, 'attachments')
+
+    def detach(self, problem_id):
+        """Removes a problem's attachments and releases their blob references."""
+        with self.store.connection() as conn:
+            digests = [row[0] for row in conn.execute('SELECT sha256 FROM attachments WHERE problem_id = ?', (problem_id,))]
+            conn.execute('DELETE FROM attachments WHERE problem_id = ?', (problem_id,))
+            conn.executemany('UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?', [(d,) for d in digests])
+            self.store._bump(conn, 'attachments')
+        return len(digests)
+
+    def gc(self, grace=GC_GRACE_SECONDS):
+        """Deletes unreferenced blobs (and abandoned temp files) older than `grace` seconds; returns (blobs, bytes) freed."""
+        cutoff = time.time() - grace
+        conn = self.store.connection()
+        rows = conn.execute('SELECT sha256, size FROM blobs WHERE refcount <= 0 AND created_at < ?', (cutoff,)).fetchall()
+        deleted = freed = 0
+        for digest, size in rows:
+            with conn:
+                # Re-check inside the transaction so a concurrent attach() or put() wins.
+                if conn.execute('DELETE FROM blobs WHERE sha256 = ? AND refcount <= 0 AND created_at < ?',
+                                (digest, cutoff)).rowcount:
+                    try:
+                        os.unlink(self.path(digest))
+                    except FileNotFoundError:
+                        pass
+                    deleted += 1
+                    freed += size
+        for name in os.listdir(self._tmp):
+            tmp = os.path.join(self._tmp, name)
+            if os.path.getmtime(tmp) < cutoff:
+                os.unlink(tmp)
+        return deleted, freed
+
+    def stats(self):
+        """Distinct blobs, bytes on disk, and bytes referenced by attachments (what storing every copy would cost)."""
+        blobs, stored = self.store.connection().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+        referenced, = self.store.connection().execute(
+            'SELECT COALESCE(SUM(b.size), 0) FROM attachments a JOIN blobs b ON b.sha256 = a.sha256'
+        ).fetchone()
+        return {'blobs': blobs, 'stored_bytes': stored, 'referenced_bytes': referenced}
+
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """The process-wide blob store under BLOB_DIR, backed by the shared SQLite store."""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(get_store())
+        return _blob_store
@@ -0,0 +1,177 @@
+import json
+import os
+import posixpath
+import sqlite3
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.blobs import get_blob_store
+from src.data import store
+from src.dedupe import get_dedupe_index
+from src.validation import manifest_errors, normalize_manifest, validate_payload
+
+MANIFEST = 'challenge.json'
+
+# Below this many challenges, validating inline beats starting worker processes.
+POOL_THRESHOLD = 64
+
+# Challenges whose attachments may be streaming at once; with 1 MiB buffers per stream this bounds RSS.
+MAX_PENDING = 16
+
+
+def _challenges(zf):
+    """Groups archive members by challenge directory: [(directory, manifest member, [attachment members])].
+
+    A challenge is any directory holding a challenge.json; every other file
+    under that directory is one of its attachments.
+    """
+    members = [info for info in zf.infolist() if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+    manifests = {posixpath.dirname(info.filename): info for info in members if posixpath.basename(info.filename) == MANIFEST}
+    manifest_names = {info.filename for info in manifests.values()}
+    files = {directory: [] for directory in manifests}
+    for info in members:
+        if info.filename in manifest_names:
+            continue
+        # Attach to the closest enclosing challenge directory.
+        directory = posixpath.dirname(info.filename)
+        while directory not in manifests and directory:
+            directory = posixpath.dirname(directory)
+        if directory in manifests:
+            files[directory].append(info)
+    return [(directory, manifests[directory], files[directory]) for directory in sorted(manifests)]
+
+
+def _read_manifest(zf, info, attachments, directory):
+    """(payload, errors) for one manifest; parse errors come back as errors instead of raising."""
+    try:
+        raw = zf.read(info)
+    except Exception as exc:  # corrupt or truncated member: BadZipFile, zlib.error, EOFError, ...
+        return None, [f"{MANIFEST} could not be read: {exc!r}"]
+    try:
+        manifest = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as exc:
+        return None, [f"{MANIFEST} is not valid JSON: {exc}"]
+    errors = manifest_errors(manifest)
+    if errors:
+        return None, [f"{MANIFEST}: {error}" for error in errors]
+    payload = normalize_manifest(manifest)
+    roles = manifest.get('attachments') if isinstance(manifest.get('attachments'), dict) else {}
+    names = [posixpath.relpath(a.filename, directory or '.') for a in attachments]
+    payload['attachments'] = [
+        {'name': name, 'role': roles.get(name, 'other'), 'size': a.file_size} for name, a in zip(names, attachments)
+    ]
+    return payload, []
+
+
+def _validate(payload):
+    """validate_payload, with a crash on input it did not anticipate reported as that challenge's error."""
+    try:
+        return validate_payload(payload)
+    except Exception as exc:
+        return [f"Validation failed: {exc!r}"]
+
+
+def validate_many(payloads, workers=None):
+    """validate_payload over many payloads, in a process pool once there are enough to pay for it."""
+    if len(payloads) < POOL_THRESHOLD:
+        return [_validate(payload) for payload in payloads]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validate, payloads, chunksize=max(1, len(payloads) // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def _stream_member(zf, info):
+    """Streams one archive member into the blob store (hash and write in one pass); returns its digest."""
+    with zf.open(info) as member:
+        return get_blob_store().put_stream(member)
+
+
+def discard_problem(problem_id):
+    """Takes a problem whose attachments failed back out of the library (attachments, dedupe index, row), so
+    saving or importing it again works."""
+    get_blob_store().detach(problem_id)
+    get_dedupe_index().remove(problem_id)
+    store().delete_rows('problems', [problem_id])
+
+
+def import_zip(source, progress=None, workers=None):
+    """Imports every challenge in a ZIP archive (a path or a seekable binary file object).
+
+    Members are streamed out of the archive one chunk at a time, never
+    extracted as a whole. Manifests are validated with the Add CTF rules in a
+    process pool; attachments are hashed and stored on a thread pool while
+    later challenges are inserted, with at most MAX_PENDING challenges in
+    flight. `progress(done, total, result)` is called as each challenge
+    finishes. Returns one result dict per challenge: directory, slug,
+    status (imported / invalid / duplicate / error), problem_id, errors,
+    and the slugs of near-duplicates already in the library. Ends with a
+    blob store gc().
+    """
+    db = store()
+    blobs = get_blob_store()
+    index = get_dedupe_index()
+    results = []
+    with zipfile.ZipFile(source) as zf:
+        challenges = _challenges(zf)
+        total = len(challenges)
+        parsed = [_read_manifest(zf, info, files, directory) for directory, info, files in challenges]
+        to_validate = [i for i, (payload, _) in enumerate(parsed) if payload is not None]
+        checked = dict(zip(to_validate, validate_many([parsed[i][0] for i in to_validate], workers)))
+
+        def finish(result):
+            results.append(result)
+            if progress is not None:
+                progress(len(results), total, result)
+
+        pending = deque()
+
+        def drain(limit):
+            while len(pending) > limit:
+                result, payload, futures = pending.popleft()
+                try:
+                    digests = [future.result() for future in futures]
+                    blobs.attach(result['problem_id'], [
+                        (digest, item['name'], item['role']) for digest, item in zip(digests, payload['attachments'])
+                    ])
+                    # Checked against the library and every challenge imported before it from this archive.
+                    statement = payload['problem']['statement_md']
+                    similar = index.query(statement, digests, exclude=(result['problem_id'],))
+                    index.add(result['problem_id'], statement, digests)
+                    result['near_duplicates'] = sorted(index.slugs(similar).values())
+                except Exception as exc:  # a corrupt member raises zlib.error or EOFError, not only OSError
+                    discard_problem(result['problem_id'])
+                    result.update(status='error', problem_id=None, errors=[f"Attachment import failed: {exc!r}"])
+                finish(result)
+
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+            try:
+                for i, (directory, _, files) in enumerate(challenges):
+                    payload, errors = parsed[i]
+                    errors = errors or checked.get(i, [])
+                    slug = payload['basics']['slug'] if payload else None
+                    result = {'directory': directory or '.', 'slug': slug, 'status': 'imported', 'problem_id': None, 'errors': errors,
+                              'near_duplicates': []}
+                    if errors:
+                        finish({**result, 'status': 'invalid'})
+                        continue
+                    try:
+                        result['problem_id'] = db.add_problem(payload)
+                    except sqlite3.IntegrityError:
+                        finish({**result, 'status': 'duplicate', 'errors': [f"A CTF with slug '{slug}' already exists."]})
+                        continue
+                    except sqlite3.Error as exc:
+                        finish({**result, 'status': 'error', 'errors': [f"Could not store the CTF: {exc}"]})
+                        continue
+                    pending.append((result, payload, [pool.submit(_stream_member, zf, info) for info in files]))
+                    drain(MAX_PENDING)
+                drain(0)
+            except BaseException:
+                # Interrupted mid-archive: take back out every challenge still waiting on its attachments.
+                for result, _, futures in pending:
+                    for future in futures:
+                        future.cancel()
+                    discard_problem(result['problem_id'])
+                raise
+    # Rolled-back challenges leave unreferenced blobs; collect those past the grace period.
+    blobs.gc()
+    return results
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """Process-wide cache whose entries are tagged with the version of their source.
+
+    A lookup only hits when the caller's current source version matches the
+    version the entry was built from, so a bumped generation counter or a newer
+    file mtime is enough to make stale frames unreachable. With `max_entries`
+    it keeps only that many keys, dropping the least recently used, for
+    caches keyed by something open-ended such as a user's selection.
+    """
+
+    def __init__(self, max_entries=None):
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _store(self, key, version, value):
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        while self.max_entries is not None and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, version, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            value = loader()
+            self._store(key, version, value)
+            return value
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._store(key, version, value)
+
+    def peek(self, key):
+        """Returns (version, value) for a key without touching the counters, or None."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def update(self, key, expected_version, new_version, fn):
+        """Applies `fn` to an entry in place and re-tags it, if it is still at `expected_version`.
+
+        This is how incremental writers keep a warm entry current without a full
+        reload; returns False when the entry is missing or already stale.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != expected_version:
+                return False
+            fn(entry[1])
+            self._entries[key] = (new_version, entry[1])
+            return True
+
+    def invalidate(self, *keys):
+        """Drops the given keys, or every entry when called without arguments."""
+        with self._lock:
+            targets = keys or tuple(self._entries)
+            for key in targets:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Runs record total tokens only; agent transcripts are dominated by re-sent context, so this share is priced as input.
+INPUT_SHARE = 0.75
+
+
+def price_table(registry):
+    """Per-model pricing and speed indexed by model id: input/output $ per million tokens, latency (s), speed (tokens/s)."""
+    return pd.DataFrame(
+        [(info.id, info.input_price_pm, info.output_price_pm, info.latency_s, info.speed_tps) for info in registry],
+        columns=['model_id', 'input_price_pm', 'output_price_pm', 'latency_s', 'speed_tps'],
+    ).set_index('model_id').astype('float64')
+
+
+def _per_token(prices, model_ids):
+    """(input $/token, output $/token, latency s, seconds per output token) aligned with `model_ids`."""
+    rows = prices.reindex(np.asarray(model_ids, dtype='int64'))
+    return (
+        rows['input_price_pm'].to_numpy() / 1e6,
+        rows['output_price_pm'].to_numpy() / 1e6,
+        rows['latency_s'].to_numpy(),
+        1.0 / rows['speed_tps'].to_numpy(),
+    )
+
+
+def run_costs(model_ids, tokens, prices):
+    """Dollar cost and estimated latency of each run from its token count and its model's pricing, vectorized.
+
+    Latency is time to first token plus the output tokens at the model's
+    generation speed. Models without pricing or speed give NaN.
+    """
+    tokens = np.asarray(tokens, dtype='float64')
+    per_in, per_out, latency, per_token_s = _per_token(prices, model_ids)
+    output = tokens * (1 - INPUT_SHARE)
+    cost = tokens * INPUT_SHARE * per_in + output * per_out
+    return cost, latency + output * per_token_s
+
+
+def model_costs(cells, prices):
+    """Per-model solve rate, token-derived dollar cost and latency, from (model, problem) aggregate cells.
+
+    Costs are additive in tokens, so summing each model's cells and pricing the
+    totals equals pricing every run and summing.
+    """
+    columns = ['model_id', 'runs', 'solve_rate', 'tokens', 'cost_usd', 'cost_per_run', 'cost_per_solve', 'latency_s']
+    if cells is None or not len(cells):
+        return pd.DataFrame(columns=columns)
+    totals = cells.groupby('model_id')[['count', 'solves', 'tokens']].sum().reset_index()
+    cost, _ = run_costs(totals['model_id'], totals['tokens'], prices)
+    _, latency = run_costs(totals['model_id'], totals['tokens'] / totals['count'], prices)
+    return pd.DataFrame({
+        'model_id': totals['model_id'].to_numpy(),
+        'runs': totals['count'].to_numpy(dtype='int64'),
+        'solve_rate': (totals['solves'] / totals['count']).to_numpy(),
+        'tokens': totals['tokens'].to_numpy(dtype='int64'),
+        'cost_usd': cost,
+        'cost_per_run': cost / totals['count'].to_numpy(),
+        'cost_per_solve': cost / totals['solves'].where(totals['solves'] > 0).to_numpy(),
+        'latency_s': latency,
+    })[columns]
+
+
+def pareto_frontier(x, y):
+    """Mask of points no other point beats: lower or equal `x` with strictly higher `y`. O(n log n).
+
+    Sorts by x (ties broken by higher y first) and keeps each point that raises
+    the best y seen so far; NaN points are never on the frontier.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    valid = ~(np.isnan(x) | np.isnan(y))
+    idx = np.flatnonzero(valid)
+    order = idx[np.lexsort((-y[idx], x[idx]))]
+    best = np.maximum.accumulate(y[order])
+    previous = np.concatenate([[-np.inf], best[:-1]])
+    mask = np.zeros(len(x), dtype=bool)
+    mask[order[y[order] > previous]] = True
+    return mask
@@ -1,43 +1,444 @@
+import json
+import threading
+import time
+
+import numpy as np
 import pandas as pd
 
+from src import run_store, schema
+from src.aggregates import ModelProblemMatrix
+from src.leaderboard import rank_models
+from src.pass_at_k import cells_pass_at_k
+from src.registry import ModelRegistry
+from src.scoring import DEFAULT_WEIGHTS, benchmark_scores as score_models
+from src.significance import pairwise_significance
+from src.cache import VersionedCache
+from src.costs import model_costs, pareto_frontier, price_table
+from src.flags import compile_config, flag_config, score_runs
+from src.ingest import RESULTS_LOG, read_new_records
+from src.plans import completed_hashes
+from src.store import get_store
+from src.utils import simple_slugify
+
+_cache = VersionedCache()
+_seed_lock = threading.Lock()
+_ingest_lock = threading.Lock()
+_seeded = False
+
+# Store tables each cached entry is derived from; their generation counters form the cache version.
+_DEPENDS_ON = {
+    'catalog': ('models', 'problems', 'environments'),
+    'registry': ('models',),
+    'runs': ('runs',),
+    'leaderboard': ('runs', 'problems', 'benchmarks'),
+    'pass_at_k': ('runs',),
+    'queue_data': ('jobs', 'benchmarks', 'runs'),
+    'compare': ('runs', 'problems', 'models'),
+    'significance': ('runs',),
+    'costs': ('runs', 'models', 'problems', 'benchmarks'),
+    'scores': ('runs', 'problems', 'benchmarks'),
+}
+
+MODEL_COLUMNS = {
+    'id': 'id', 'country': 'Country', 'organization': 'Organization', 'name': 'Model', 'license': 'License',
+    'parameters_b': 'Parameters (B)', 'context': 'Context', 'input_price_pm': 'Input $/M',
+    'output_price_pm': 'Output $/M', 'knowledge_cutoff': 'Knowledge Cutoff',
+    'color': 'color', 'is_multimodal': 'is_multimodal', 'max_output': 'max_output', 'latency_s': 'latency_s',
+    'speed_tps': 'speed_tps', 'standard_benchmarks': 'standard_benchmarks',
+}
+PROBLEM_COLUMNS = ['id', 'slug', 'title', 'statement', 'assets', 'category', 'difficulty', 'expected_flag', 'scorer']
+RUN_STATUSES = ['succeeded', 'failed', 'running', 'error']
+# Runs rescore_runs reads (and writes back) per step; bounds its memory when transcripts are scanned too.
+RESCORE_CHUNK = 5000
+ENVIRONMENT_COLUMNS = {'id': 'id', 'name': 'name', 'image': 'image/tag', 'tools': 'tools', 'limits': 'limits', 'digest': 'digest'}
+
+
+def store():
+    """The process-wide store, seeded with the demo data on first use."""
+    global _seeded
+    db = get_store()
+    if not _seeded:
+        with _seed_lock:
+            if not _seeded:
+                if db.is_empty():
+                    _seed(db)
+                _seeded = True
+    return db
+
+
+def source_version(key):
+    return store().generation(*_DEPENDS_ON[key])
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def load_catalog():
+    """Returns (models, problems, environments) without touching the runs; shared across sessions, so read-only."""
+    return _cache.get('catalog', source_version('catalog'), _load_catalog)
+
+
+def model_registry():
+    """The id-indexed model registry shared by every view; rebuilt only when the models table changes."""
+    return _cache.get('registry', source_version('registry'), lambda: ModelRegistry(load_catalog()[0]))
+
+
 def load_mock_data():
-    models = pd.DataFrame([
-        {'Country': '🇺🇸', 'Organization': 'Google', 'Model': 'GPT-4V', 'License': 'Proprietary', 'Parameters (B)': 175, 'Context': '128K', 'Input $/M': 0.01, 'Output $/M': 0.03, 'Knowledge Cutoff': '2023-04'},
-        {'Country': '🇺🇸', 'Organization': 'Anthropic', 'Model': 'Claude-3 Opus', 'License': 'Proprietary', 'Parameters (B)': None, 'Context': '200K', 'Input $/M': 0.015, 'Output $/M': 0.075, 'Knowledge Cutoff': '2023-12'},
-        {'Country': '🇫🇷', 'Organization': 'Mistral', 'Model': 'Llama-3 70B', 'License': 'Open Source', 'Parameters (B)': 70, 'Context': '8K', 'Input $/M': 0.0008, 'Output $/M': 0.0008, 'Knowledge Cutoff': '2023-03'},
+    """Returns (models, benchmarks, environments, runs); the frames are shared across sessions, so treat them as read-only."""
+    return (*load_catalog(), load_runs())
+
+
+def load_queue_data():
+    """(running, queued) jobs with benchmark names, resources, profile and network; running ones with tasks done."""
+    return _cache.get('queue_data', source_version('queue_data'), _build_queue_data)
+
+
+class _RunsState:
+    """Cached runs kept as appendable chunks, plus the model x problem aggregate maintained as runs land."""
+
+    def __init__(self, frame):
+        frame = schema.apply(frame, 'runs')
+        self.lock = threading.Lock()
+        self.chunks = [frame]
+        self.matrix = ModelProblemMatrix(frame)
+
+    def frame(self):
+        with self.lock:
+            if len(self.chunks) > 1:
+                # Categorical columns of differing chunks concatenate to object; recast once here.
+                self.chunks = [schema.apply(pd.concat(self.chunks, ignore_index=True), 'runs')]
+            return self.chunks[0]
+
+    def append(self, chunk):
+        chunk = schema.apply(chunk, 'runs', record=False)
+        with self.lock:
+            self.chunks.append(chunk)
+            self.matrix.add(chunk)
+
+
+def _runs_state():
+    return _cache.get('runs', source_version('runs'), lambda: _RunsState(_load_runs_snapshot()))
+
+
+def load_runs(columns=None):
+    """Flat, typed runs for analytics, served from the Parquet snapshot of the store's runs table."""
+    runs = _runs_state().frame()
+    return runs[columns] if columns else runs
+
+
+def model_problem_cells(problem_ids=None, model_ids=None):
+    """Per (model, problem) counts, solves, mean success, tokens and cost from the materialized aggregate."""
+    state = _runs_state()
+    with state.lock:
+        return state.matrix.cells(problem_ids=problem_ids, model_ids=model_ids)
+
+
+def model_summary():
+    """Per-model run count, solve rate, mean time-to-flag, tokens and cost, without rescanning the runs."""
+    state = _runs_state()
+    with state.lock:
+        per_model = state.matrix.by_model()
+    return per_model.rename(columns={'count': 'runs', 'tokens': 'total_tokens', 'cost': 'total_cost'})[
+        ['model_id', 'runs', 'solve_rate', 'avg_ttf', 'total_tokens', 'total_cost']
+    ]
+
+
+def category_solve_rates(model_ids):
+    """Category x model table of pooled solve rates (solves / runs) for the given models, from one slice of the aggregate."""
+    model_ids = list(model_ids)
+    cells = model_problem_cells(model_ids=model_ids)
+    categories = load_catalog()[1].set_index('id')['category']
+    category = cells['problem_id'].map(categories).astype(object).fillna('Uncategorized')
+    sums = cells.assign(category=category).groupby(['category', 'model_id'])[['solves', 'count']].sum()
+    rates = (sums['solves'] / sums['count']).unstack('model_id')
+    return rates.reindex(columns=model_ids)
+
+
+def model_significance(model_ids=None, n_boot=1000):
+    """McNemar and paired-bootstrap results for model pairs, computed once for all models per runs version."""
+    pairs = _cache.get(('significance', n_boot), source_version('significance'),
+                       lambda: pairwise_significance(model_problem_cells(), n_boot=n_boot))
+    if model_ids is None:
+        return pairs
+    model_ids = list(model_ids)
+    return pairs[pairs['model_a'].isin(model_ids) & pairs['model_b'].isin(model_ids)]
+
+
+def model_prices():
+    """Per-model pricing and speed from the registry, indexed by model id."""
+    return _cache.get('prices', source_version('registry'), lambda: price_table(model_registry()))
+
+
+def cost_performance(benchmark_id=None):
+    """Per-model solve rate, dollar cost and latency over a benchmark (all problems when None), with Pareto flags.
+
+    `cost_frontier` / `latency_frontier` mark the models no other model beats
+    on solve rate at equal or lower cost per run / latency.
+    """
+    def build():
+        problem_ids = benchmark_problem_ids(benchmark_id) if benchmark_id is not None else None
+        costs = model_costs(model_problem_cells(problem_ids=problem_ids), model_prices())
+        return costs.assign(
+            cost_frontier=pareto_frontier(costs['cost_per_run'], costs['solve_rate']),
+            latency_frontier=pareto_frontier(costs['latency_s'], costs['solve_rate']),
+        )
+    return _cache.get(('costs', benchmark_id), source_version('costs'), build)
+
+
+def benchmark_problem_ids(benchmark_id):
+    """Problem ids a benchmark covers: its dataset slugs, or the problems it has runs on when it has none."""
+    db = store()
+    spec = db.query('benchmarks', {'id': benchmark_id}, columns=['spec'])
+    slugs = json.loads(spec['spec'].iloc[0] or '{}').get('dataset', {}).get('ctf_slugs') if len(spec) else None
+    if isinstance(slugs, list) and slugs:
+        return db.query('problems', {'slug': slugs}, columns=['id'])['id'].tolist()
+    rows = db.connection().execute('SELECT DISTINCT problem_id FROM runs WHERE benchmark_id = ?', (benchmark_id,))
+    return [row[0] for row in rows]
+
+
+def leaderboard(benchmark_id=None, by_category=False, n_boot=1000):
+    """Model ranking with bootstrap CIs over a benchmark's problems (all problems when None), cached per store version."""
+    def build():
+        problem_ids = benchmark_problem_ids(benchmark_id) if benchmark_id is not None else None
+        categories = load_catalog()[1].set_index('id')['category'] if by_category else None
+        return rank_models(model_problem_cells(problem_ids=problem_ids), categories, n_boot=n_boot)
+    return _cache.get(('leaderboard', benchmark_id, by_category, n_boot), source_version('leaderboard'), build)
+
+
+def benchmark_evaluation(benchmark_id):
+    """(metric weights, aggregation, limits) a benchmark was created with; the defaults for None or older specs."""
+    evaluation = {}
+    if benchmark_id is not None:
+        spec = store().query('benchmarks', {'id': benchmark_id}, columns=['spec'])
+        evaluation = json.loads(spec['spec'].iloc[0] or '{}').get('evaluation', {}) if len(spec) else {}
+    return evaluation.get('metrics') or DEFAULT_WEIGHTS, evaluation.get('aggregation') or 'macro', evaluation.get('limits') or {}
+
+
+def benchmark_scores(benchmark_id=None, weights=None, aggregation=None):
+    """Weighted benchmark scores of every model over a benchmark's problems (all problems when None).
+
+    Weights and aggregation default to the benchmark's own evaluation spec.
+    Scores come from the materialized model x problem aggregate, so new runs
+    cost O(new runs) to fold in and a recompute costs O(cells).
+    """
+    spec_weights, spec_aggregation, limits = benchmark_evaluation(benchmark_id)
+    weights = spec_weights if weights is None else weights
+    aggregation = aggregation or spec_aggregation
+
+    def build():
+        problem_ids = benchmark_problem_ids(benchmark_id) if benchmark_id is not None else None
+        categories = load_catalog()[1].set_index('id')['category'] if aggregation == 'per-category' else None
+        return score_models(model_problem_cells(problem_ids=problem_ids), weights, aggregation, categories, limits)
+    key = ('scores', benchmark_id, json.dumps(weights, sort_keys=True), aggregation)
+    return _cache.get(key, source_version('scores'), build)
+
+
+def pass_at_k_cells(problem_ids=None):
+    """Per (model, problem) pass@k and pass^k for every k up to the most reruns seen; switching k is a column pick."""
+    cells = _cache.get('pass_at_k', source_version('pass_at_k'), lambda: cells_pass_at_k(model_problem_cells()))
+    if problem_ids is None:
+        return cells
+    return cells[cells['problem_id'].isin(list(problem_ids))]
+
+
+def max_pass_k():
+    """Largest k the pass@k columns cover (the most reruns any model/problem cell has)."""
+    return max(1, sum(col.startswith('pass@') for col in pass_at_k_cells().columns))
+
+
+def pass_at_k_by_model(k, benchmark_id=None, by_category=False):
+    """Mean pass@k and pass^k per model (and per category) over a benchmark's problems that have at least k reruns."""
+    problem_ids = benchmark_problem_ids(benchmark_id) if benchmark_id is not None else None
+    cells = pass_at_k_cells(problem_ids)
+    columns = [f'pass@{k}', f'pass^{k}']
+    if columns[0] not in cells:
+        return pd.DataFrame(columns=['group', 'model_id', *columns])
+    if by_category:
+        categories = load_catalog()[1].set_index('id')['category']
+        group = cells['problem_id'].map(categories).astype(object).fillna('Uncategorized')
+    else:
+        group = pd.Series('All', index=cells.index)
+    return cells.assign(group=group).groupby(['group', 'model_id'])[columns].mean().reset_index()
+
+
+def ingest_results(path=RESULTS_LOG):
+    """Merges runs appended to the results log since the last checkpoint; costs O(new runs), not O(all runs)."""
+    db = store()
+    with _ingest_lock:
+        inode, offset = db.checkpoint(path)
+        records, new_inode, new_offset = read_new_records(path, inode, offset)
+        if (new_inode, new_offset) == (inode, offset):
+            return 0
+        # Malformed records are dropped, not retried: the checkpoint still moves past them.
+        records = [r for r in records if run_store.is_run_record(r)]
+        old_version = source_version('runs')
+        rows = run_store.to_store_rows(records)
+        # When the executor does not say when a run completed, the first ingest that sees it is the next best bound.
+        now = time.time()
+        for row in rows:
+            if row['completed_at'] is None:
+                row['completed_at'] = now
+        ids = db.append_runs(rows, path, new_inode, new_offset)
+        if records:
+            records = [{**record, 'id': run_id} for record, run_id in zip(records, ids)]
+            chunk = run_store.flatten_runs(records).drop(columns=run_store.TRANSCRIPT_COLUMNS)
+            _cache.update('runs', old_version, source_version('runs'), lambda state: state.append(chunk))
+        return len(records)
+
+
+def _rescore_chunk(db, runs, matchers, scan_logs):
+    """Scores one chunk of runs and writes back the verdicts that change; returns how many did."""
+    partial = runs['problem_id'].map(lambda pid: matchers[pid].partial).to_numpy(dtype=bool)
+    scores = score_runs(runs, matchers, scan_logs=scan_logs)
+    checked = ~np.isnan(scores)
+    # A Multiple flag is solved by any one of its values; partial scoring only grades how many were found.
+    solved = np.where(partial, scores > 0, scores >= 1.0)
+    # Partial scoring keeps a run's share of the list as its success rate; other flags are all-or-nothing.
+    success_rate = np.where(partial, scores * 100.0, runs['success_rate'].to_numpy(dtype=float, na_value=np.nan))
+    status = runs['status'].to_numpy(dtype=object)
+    finished = np.isin(status, ['succeeded', 'failed'])
+    status = np.where(finished, np.where(solved, 'succeeded', 'failed'), status)
+    changed = checked & (
+        (runs['solved'].to_numpy(dtype=float, na_value=-1) != solved) | (status != runs['status'].to_numpy(dtype=object))
+        | (partial & (runs['success_rate'].to_numpy(dtype=float, na_value=np.nan) != success_rate))
+    )
+    if changed.any():
+        db.update_columns(
+            'runs', runs['id'].to_numpy()[changed].tolist(), solved=solved[changed].astype(int).tolist(),
+            status=status[changed].tolist(), success_rate=success_rate[changed].tolist(),
+        )
+    return int(changed.sum())
+
+
+def rescore_runs(problem_ids=None, scan_logs=False, chunk_size=RESCORE_CHUNK):
+    """Re-checks stored submissions against each problem's current flag config, e.g. after a flag correction.
+
+    Every config is compiled once; runs are then read in id order,
+    `chunk_size` at a time, and each chunk is scored in one vectorized call
+    and written back before the next is read, so memory stays bounded by a
+    chunk even with transcripts. `scan_logs` also credits flags found in run
+    transcripts. Only runs whose verdict changes are written back; returns
+    how many did.
+    """
+    db = store()
+    problems = db.query('problems', filters={'id': problem_ids}, columns=['id', 'expected_flag', 'payload'])
+    matchers = {row['id']: compile_config(flag_config(row)) for row in problems.to_dict('records')}
+    if not matchers:
+        return 0
+    columns = ['id', 'problem_id', 'status', 'solved', 'success_rate', 'flag_found'] + (['logs'] if scan_logs else [])
+    where, params = '', []
+    if problem_ids is not None:
+        where, params = f' AND problem_id IN ({", ".join("?" * len(matchers))})', list(matchers)
+    conn = db.connection()
+    changed, last = 0, 0
+    while True:
+        rows = conn.execute(f'SELECT {", ".join(columns)} FROM runs WHERE id > ?{where} ORDER BY id LIMIT ?',
+                            [last, *params, chunk_size]).fetchall()
+        if not rows:
+            return changed
+        runs = pd.DataFrame(rows, columns=columns)
+        runs = runs[runs['problem_id'].isin(matchers.keys())]
+        if len(runs):
+            changed += _rescore_chunk(db, runs, matchers, scan_logs)
+        last = rows[-1][0]
+
+
+def _load_catalog():
+    db = store()
+    models = db.query('models', columns=list(MODEL_COLUMNS)).rename(columns=MODEL_COLUMNS)
+    benchmarks = db.query('problems', columns=PROBLEM_COLUMNS)
+    environments = db.query('environments', columns=list(ENVIRONMENT_COLUMNS)).rename(columns=ENVIRONMENT_COLUMNS)
+    return schema.apply(models, 'models'), schema.apply(benchmarks, 'problems'), schema.apply(environments, 'environments')
+
+
+def _load_runs_snapshot():
+    db = store()
+    generation, = db.generation('runs')
+    if run_store.snapshot_generation() == generation:
+        return run_store.load_runs()
+    runs = run_store.from_store_frame(db.query('runs', columns=run_store.SNAPSHOT_STORE_COLUMNS))
+    run_store.write_runs(runs, generation=generation)
+    return runs
+
+
+def _seed(db):
+    to_store = {label: col for col, label in MODEL_COLUMNS.items()}
+    db.insert_rows('models', [
+        {to_store[key]: json.dumps(value) if key == 'standard_benchmarks' else value for key, value in model.items() if key in to_store}
+        for model in _mock_models()
+    ])
+    problems = _mock_problems()
+    db.insert_rows('problems', [{**problem, 'slug': simple_slugify(problem['title'])} for problem in problems])
+    to_store = {label: col for col, label in ENVIRONMENT_COLUMNS.items()}
+    db.insert_rows('environments', [
+        {to_store[key]: value for key, value in env.items()} for env in _mock_environments()
     ])
+    db.add_benchmark('mock-suite', {'name': 'Mock Suite', 'dataset': {'ctf_slugs': [simple_slugify(p['title']) for p in problems]}})
+    db.insert_rows('runs', run_store.to_store_rows({**run, 'benchmark_id': 1} for run in _mock_run_records()))
 
-    benchmarks = pd.DataFrame([
+
+def _mock_models():
+    return [
+        {'Country': '🇺🇸', 'Organization': 'Google', 'Model': 'GPT-4V', 'License': 'Proprietary', 'Parameters (B)': 175, 'Context': '128K', 'Input $/M': 10.0, 'Output $/M': 30.0, 'Knowledge Cutoff': '2023-04',
+         'color': '#A78BFA', 'is_multimodal': True, 'max_output': '4K', 'latency_s': 0.9, 'speed_tps': 40},
+        {'Country': '🇺🇸', 'Organization': 'Anthropic', 'Model': 'Claude-3 Opus', 'License': 'Proprietary', 'Parameters (B)': None, 'Context': '200K', 'Input $/M': 15.0, 'Output $/M': 75.0, 'Knowledge Cutoff': '2023-12',
+         'color': '#F59E0B', 'is_multimodal': True, 'max_output': '4K', 'latency_s': 1.9, 'speed_tps': 25},
+        {'Country': '🇫🇷', 'Organization': 'Mistral', 'Model': 'Llama-3 70B', 'License': 'Open Source', 'Parameters (B)': 70, 'Context': '8K', 'Input $/M': 0.8, 'Output $/M': 0.8, 'Knowledge Cutoff': '2023-03',
+         'color': '#34D399', 'is_multimodal': False, 'max_output': '8K', 'latency_s': 0.4, 'speed_tps': 120},
+        {'Country': '🇺🇸', 'Organization': 'OpenAI', 'Model': 'GPT-4o', 'License': 'Proprietary', 'Parameters (B)': None, 'Context': '128K', 'Input $/M': 2.5, 'Output $/M': 10.0, 'Knowledge Cutoff': '2023-10',
+         'color': '#9FC9FF', 'is_multimodal': True, 'max_output': '4K', 'latency_s': 0.51, 'speed_tps': 143,
+         'standard_benchmarks': {'MMMU': 85.3, 'MathVista': 72.1, 'DocVQA': 90.2, 'ChartQA': 80.8, 'AI2D': 88.5, 'MMLU': 88.4, 'HumanEval': 90.2}},
+        {'Country': '🇺🇸', 'Organization': 'Anthropic', 'Model': 'Claude 3.5 Sonnet', 'License': 'Proprietary', 'Parameters (B)': None, 'Context': '200K', 'Input $/M': 3.0, 'Output $/M': 15.0, 'Knowledge Cutoff': '2024-04',
+         'color': '#FC69D3', 'is_multimodal': True, 'max_output': '8K', 'latency_s': 1.22, 'speed_tps': 78,
+         'standard_benchmarks': {'MMMU': 82.1, 'MathVista': 68.5, 'DocVQA': 88.9, 'ChartQA': 79.1, 'AI2D': 85.2, 'MMLU': 85.0, 'HumanEval': 88.1}},
+        {'Country': '🇺🇸', 'Organization': 'Google', 'Model': 'Gemini 2.5 Pro', 'License': 'Proprietary', 'Parameters (B)': None, 'Context': '1M', 'Input $/M': 2.0, 'Output $/M': 8.0, 'Knowledge Cutoff': '2024-06',
+         'color': '#88d8b0', 'is_multimodal': True, 'max_output': '16K', 'latency_s': 0.8, 'speed_tps': 110,
+         'standard_benchmarks': {'MMMU': 89.0, 'MathVista': 75.0, 'DocVQA': 91.5, 'ChartQA': 82.3, 'AI2D': 90.1, 'MMLU': 90.1, 'HumanEval': 91.3}},
+        {'Country': '🇺🇸', 'Organization': 'Meta', 'Model': 'Llama 3.1 70B', 'License': 'Open Source', 'Parameters (B)': 70, 'Context': '128K', 'Input $/M': 1.0, 'Output $/M': 3.0, 'Knowledge Cutoff': '2024-03',
+         'color': '#ff6b6b', 'is_multimodal': False, 'max_output': '16K', 'latency_s': 1.5, 'speed_tps': 60,
+         'standard_benchmarks': {'MMMU': 65.0, 'MathVista': 55.3, 'DocVQA': 70.1, 'ChartQA': 60.5, 'AI2D': 68.0, 'MMLU': 82.0, 'HumanEval': 85.1}},
+    ]
+
+
+def _mock_problems():
+    return [
         {'id': 1, 'title': 'Web Vuln 1', 'statement': 'Find the flag in the web page.', 'assets': 'image.png', 'category': 'Web', 'difficulty': 'Easy', 'expected_flag': 'flag{...}', 'scorer': 'exact_match'},
         {'id': 2, 'title': 'Pwn Buffer', 'statement': 'Exploit the buffer overflow.', 'assets': 'binary', 'category': 'Pwn', 'difficulty': 'Medium', 'expected_flag': 'flag{...}', 'scorer': 'exact_match'},
         {'id': 3, 'title': 'Crypto RSA', 'statement': 'Decrypt the message.', 'assets': 'crypto.txt', 'category': 'Crypto', 'difficulty': 'Hard', 'expected_flag': 'flag{...}', 'scorer': 'exact_match'},
-    ])
+    ]
+
 
-    environments = pd.DataFrame([
+def _mock_environments():
+    return [
         {'id': 1, 'name': 'Kali Linux', 'image/tag': 'kalilinux/kali-rolling:latest', 'tools': 'pwntools, nmap', 'limits': '2 CPU, 4GB RAM', 'digest': 'sha256:...'},
         {'id': 2, 'name': 'Headless Browser', 'image/tag': 'browserless/chrome:latest', 'tools': 'selenium', 'limits': '1 CPU, 2GB RAM', 'digest': 'sha256:...'},
-    ])
+    ]
+
 
-    runs = pd.DataFrame([
+def _mock_run_records():
+    return [
         {'id': 1, 'problem_id': 1, 'environment_id': 2, 'model_id': 1, 'params': {'temp': 0.5}, 'status': 'succeeded', 'metrics': [{'solved': True, 'ttf': 120, 'tokens': 1500, 'cost': 0.015}], 'artifacts': 'log.txt', 'logs': '...', 'flag_found': 'flag{...}', 'timestamps': '...', 'success_rate': 85},
         {'id': 2, 'problem_id': 2, 'environment_id': 1, 'model_id': 3, 'params': {'temp': 0.7}, 'status': 'failed', 'metrics': [{'solved': False, 'ttf': None, 'tokens': 3000, 'cost': 0.0024}], 'artifacts': 'log.txt', 'logs': '...', 'flag_found': None, 'timestamps': '...', 'success_rate': 60},
         {'id': 3, 'problem_id': 1, 'environment_id': 1, 'model_id': 3, 'params': {'temp': 0.6}, 'status': 'succeeded', 'metrics': [{'solved': True, 'ttf': 100, 'tokens': 1000, 'cost': 0.001}], 'artifacts': 'log.txt', 'logs': '...', 'flag_found': 'flag{...}', 'timestamps': '...', 'success_rate': 75},
-    ])
-    
-    return models, benchmarks, environments, runs
+    ]
 
-def load_queue_data():
-    running_jobs = pd.DataFrame({
-        'Job ID': ['J-84B12', 'J-92C8F', 'J-A1D05'],
-        'User': ['Alice', 'Bob', 'Charlie'],
-        'Model': ['GPT-4o', 'Claude 3 Opus', 'Llama 3 70B'],
-        'Benchmark': ['Code-Gen-Python', 'Doc-Q&A', 'Creative-Writing'],
-        'Started': ['8m ago', '3m ago', '1m ago']
-    })
-    queued_jobs = pd.DataFrame({
-        'Position': [1],
-        'User': ['David'],
-        'Model': ['Gemini 1.5 Pro'],
-        'Benchmark': ['Code-Gen-Python']
-    })
-    return running_jobs, queued_jobs
\ No newline at end of file
+
+def _build_queue_data():
+    db = store()
+    jobs = pd.read_sql_query(
+        "SELECT j.id, j.user, j.model_id, j.benchmark_id, b.name AS benchmark, j.status, j.priority, j.cpu, j.memory_gb, "
+        "j.disk_gb, j.gpu, j.worker, json_extract(j.payload, '$.profile') AS profile, "
+        "json_extract(j.payload, '$.network') AS network, json_array_length(j.payload, '$.tasks') AS tasks, "
+        "j.created_at, j.started_at FROM jobs j LEFT JOIN benchmarks b ON b.id = j.benchmark_id "
+        "WHERE j.status IN ('queued', 'running') ORDER BY j.id",
+        db.connection(),
+    ).astype({'model_id': 'Int64', 'priority': 'int64', 'tasks': 'Int64', 'created_at': 'float64', 'started_at': 'float64'})
+    running = jobs[jobs['status'] == 'running'].reset_index(drop=True)
+    # Task lists are only parsed for the running jobs, to count how many of their tasks have results.
+    payloads = dict(db.connection().execute("SELECT id, payload FROM jobs WHERE status = 'running'").fetchall())
+    running['done'] = np.array([
+        len(completed_hashes(db, [task[0] for task in json.loads(payloads.get(job_id) or '{}').get('tasks', [])]))
+        for job_id in running['id']
+    ], dtype='int64')
+    return running, jobs[jobs['status'] == 'queued'].reset_index(drop=True)
@@ -0,0 +1,169 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+STRATA = ('category', 'difficulty')
+DEDUPE_MODES = ('slug', 'attachment_hash', 'near_duplicate')
+SPLIT_MODES = ('test: all', 'custom')
+RESOLVED_COLUMNS = ['id', 'slug', 'category', 'difficulty', 'split']
+
+_PRIME = 2147483647  # 2^31 - 1; keys and multipliers stay below it, so key * a + b fits SQLite's 64-bit integers.
+
+
+def sample_key(slug):
+    """Seed-independent 31-bit key of a slug. Depending on the slug alone (not the row id), it is the same on every
+    copy of the library, and adding problems never changes the keys of the ones already there."""
+    return zlib.crc32(slug.encode()) & _PRIME
+
+
+def _affine(seed, salt=0):
+    """(a, b) of the seed's shuffle: problems are visited in order of (sample_key * a + b) mod 2^31-1, then slug."""
+    rng = np.random.default_rng([int(seed), salt])
+    return int(rng.integers(1, _PRIME)), int(rng.integers(0, _PRIME))
+
+
+def ensure_sample_keys(store):
+    """Fills sample_key for problems that lack one (found through a partial index, so this is free when none do)."""
+    conn = store.connection()
+    rows = conn.execute('SELECT id, slug FROM problems WHERE sample_key IS NULL').fetchall()
+    if rows:
+        with conn:
+            conn.executemany('UPDATE problems SET sample_key = ? WHERE id = ?', [(sample_key(slug), pid) for pid, slug in rows])
+    return len(rows)
+
+
+def allocate(sizes, total):
+    """Splits `total` across strata in proportion to `sizes` by largest remainder, so quotas sum exactly to `total`."""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if total >= sizes.sum():
+        return sizes
+    exact = sizes * (total / sizes.sum())
+    quotas = np.floor(exact).astype(np.int64)
+    # Ties in the remainder go to the larger stratum, then the earlier one, so allocation is deterministic.
+    order = np.lexsort((np.arange(len(sizes)), -sizes, -(exact - quotas)))
+    quotas[order[:total - quotas.sum()]] += 1
+    return quotas
+
+
+def pool_filters(spec):
+    """Store filters selecting a spec's candidate problems: its explicit slugs, else its category/difficulty filters."""
+    if isinstance(spec.get('ctf_slugs'), list):
+        return {'slug': list(dict.fromkeys(spec['ctf_slugs']))}
+    return {col: list(values) for col, values in (spec.get('filters') or {}).items() if col in STRATA and values}
+
+
+def _where(filters):
+    clauses, params = [], []
+    for col, values in filters.items():
+        clauses.append(f'{col} IN ({", ".join("?" * len(values))})')
+        params.extend(values)
+    return clauses, params
+
+
+def _attachment_keys(conn, problem_ids):
+    """problem_id -> sorted, comma-joined attachment digests (problems without attachments are absent)."""
+    rows = conn.execute(
+        f'SELECT problem_id, GROUP_CONCAT(sha256) FROM (SELECT problem_id, sha256 FROM attachments '
+        f'WHERE problem_id IN ({", ".join("?" * len(problem_ids))}) ORDER BY problem_id, sha256) GROUP BY problem_id',
+        problem_ids,
+    ).fetchall()
+    return dict(rows)
+
+
+def resolve_dataset(spec, store, index=None):
+    """Turns a benchmark dataset spec into a concrete problem list; returns (problems, dropped slugs).
+
+    Spec keys (all optional): ctf_slugs (an explicit list, else the whole
+    library), filters ({category: [...], difficulty: [...]}), sample_size
+    (0 = everything), stratify_by (subset of STRATA), seed, dedupe_by (one of
+    DEDUPE_MODES), split_mode and test_fraction.
+
+    Stratum sizes come from an indexed GROUP BY and each stratum gets its
+    largest-remainder share of the sample. SQLite then returns each stratum's
+    first rows in the seed's order (see _affine) from a covering index, a
+    page at a time, so only the sampled rows ever reach Python. Duplicates
+    (same attachment set, or near-duplicates per `index`, a
+    NearDuplicateIndex) are skipped as pages are read and the next problem in
+    order takes their place.
+    """
+    ensure_sample_keys(store)
+    conn = store.connection()
+    seed = int(spec.get('seed') or 0)
+    a, b = _affine(seed)
+    filters = pool_filters(spec)
+    strata = [col for col in spec.get('stratify_by') or [] if col in STRATA]
+    sizes = store.group_counts('problems', strata, filters)
+    sample_size = int(spec.get('sample_size') or 0)
+    quotas = allocate(sizes['count'], sample_size) if sample_size else sizes['count'].to_numpy()
+    dedupe_by = spec.get('dedupe_by') or 'slug'
+    exact_only = dedupe_by == 'slug' or (dedupe_by == 'near_duplicate' and index is None)
+
+    chosen, dropped, seen_files, accepted = [], [], set(), set()
+    for stratum, quota in zip(sizes[strata].itertuples(index=False) if strata else [()] * len(sizes), quotas):
+        clauses, params = _where(filters)
+        for col, value in zip(strata, stratum):
+            clauses.append(f'{col} IS ?')
+            params.append(None if pd.isna(value) else value)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        taken, offset = 0, 0
+        page = int(quota) if exact_only else max(2 * int(quota), 64)
+        while taken < quota:
+            rows = conn.execute(
+                f'SELECT id, slug, category, difficulty FROM problems{where} '
+                f'ORDER BY (sample_key * ? + ?) % {_PRIME}, slug LIMIT ? OFFSET ?',
+                [*params, a, b, page, offset],
+            ).fetchall()
+            if not rows:
+                break
+            offset += len(rows)
+            files = _attachment_keys(conn, [row[0] for row in rows]) if dedupe_by == 'attachment_hash' else {}
+            for row in rows:
+                if taken == quota:
+                    break
+                problem_id, slug = row[0], row[1]
+                if problem_id in files:
+                    if files[problem_id] in seen_files:
+                        dropped.append(slug)
+                        continue
+                    seen_files.add(files[problem_id])
+                if dedupe_by == 'near_duplicate' and index is not None:
+                    if accepted.intersection(index.near_duplicates(problem_id)):
+                        dropped.append(slug)
+                        continue
+                    accepted.add(problem_id)
+                chosen.append(row)
+                taken += 1
+
+    problems = pd.DataFrame(chosen, columns=RESOLVED_COLUMNS[:-1])
+    split = np.full(len(problems), 'test', dtype=object)
+    if spec.get('split_mode') == 'custom' and len(problems):
+        # A second, independent shuffle within each stratum puts round(test_fraction * n) problems in test.
+        fraction = float(spec.get('test_fraction', 0.2))
+        a2, b2 = _affine(seed, salt=1)
+        keys = (problems['slug'].map(sample_key).to_numpy(dtype=np.int64) * a2 + b2) % _PRIME
+        groups = problems.groupby(strata, dropna=False).ngroup().to_numpy() if strata else np.zeros(len(problems), dtype=np.int64)
+        rank = pd.Series(keys).groupby(groups).rank(method='first').to_numpy()
+        split = np.where(rank <= np.round(np.bincount(groups)[groups] * fraction), 'test', 'train').astype(object)
+    return problems.assign(split=split), dropped
+
+
+def library_counts(spec, store):
+    """(candidate counts per stratum, strata) for a spec's preview, over the same pool resolve_dataset samples from.
+    Explicit slug lists are previewed per category."""
+    by = [] if isinstance(spec.get('ctf_slugs'), list) else [col for col in spec.get('stratify_by') or [] if col in STRATA]
+    by = by or ['category']
+    return store.group_counts('problems', by, pool_filters(spec)), by
+
+
+def preview(problems, counts, by):
+    """Preview table per stratum: candidates (counts, from library_counts) next to what the resolver picked."""
+    by = [col for col in by if col in STRATA]
+    picked = problems.assign(test=problems['split'].eq('test'), train=problems['split'].eq('train'))
+    if by:
+        picked = picked.groupby(by, dropna=False).agg(selected=('id', 'size'), test=('test', 'sum'), train=('train', 'sum')).reset_index()
+        table = counts.merge(picked, on=by, how='left')
+    else:
+        table = counts.assign(selected=len(picked), test=int(picked['test'].sum()), train=int(picked['train'].sum()))
+    table = table.rename(columns={'count': 'candidates'})
+    return table.fillna({'selected': 0, 'test': 0, 'train': 0}).astype({'selected': int, 'test': int, 'train': int})
@@ -0,0 +1,203 @@
+import hashlib
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from src.data import store
+
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs at Jaccard 0.7 share a bucket with probability > 0.999, pairs at 0.3 about 0.23 of
+# the time, and those are then dropped by the signature check against SIMILARITY_THRESHOLD.
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+# Matching files alone are not enough (every pwn challenge ships the same libc); the statements must also be at
+# least this similar for an attachment match to count.
+ATTACHMENT_STATEMENT_FLOOR = 0.25
+SHINGLE_SIZE = 3
+
+# Statement shingles and attachment digests are indexed separately: a shared statement or a shared set of files
+# each makes a near-duplicate on its own.
+KINDS = ('statement', 'attachments')
+
+_MERSENNE = (1 << 61) - 1
+_rng = np.random.default_rng(0x5EED)
+# Fixed seed: signatures are persisted, so the permutations must be identical in every process.
+_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def statement_shingles(text, size=SHINGLE_SIZE):
+    """Word `size`-grams of a statement, lowercased, markdown punctuation dropped and standalone numbers folded
+    to '0', so copies with other ports, sizes or formatting still overlap."""
+    words = _WORD_RE.findall(_NUMBER_RE.sub('0', (text or '').lower()))
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def attachment_shingles(digests):
+    return {digest for digest in digests or () if digest}
+
+
+def signature(shingles):
+    """MinHash signature (NUM_PERM uint64) of a set of strings, or None for an empty set.
+
+    Each permutation is a universal hash (a*x + b) mod 2^61-1 of the
+    shingle's CRC32, evaluated for every shingle at once with numpy.
+    """
+    if not shingles:
+        return None
+    x = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % _MERSENNE).min(axis=1)
+
+
+def _buckets(sig):
+    """One bucket id per band: a 64-bit hash of the band's rows."""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH index of the problem library, persisted in the store (minhashes / lsh_buckets tables).
+
+    A lookup hashes the query into BANDS buckets and reads only the problems
+    sharing one of them (one indexed probe per band), then confirms each
+    candidate against its stored signature. Cost follows the number of
+    candidates, not the size of the library.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def add(self, problem_id, statement, digests=()):
+        """Indexes (or re-indexes) one problem from its statement and attachment digests."""
+        self.add_many([(problem_id, statement, digests)])
+
+    def add_many(self, problems):
+        """Indexes many (problem_id, statement, digests) in one transaction."""
+        signatures, buckets, ids = [], [], []
+        for problem_id, statement, digests in problems:
+            ids.append((problem_id,))
+            for kind, sig in zip(KINDS, (signature(statement_shingles(statement)), signature(attachment_shingles(digests)))):
+                if sig is None:
+                    continue
+                signatures.append((problem_id, kind, sig.tobytes()))
+                buckets.extend((kind, band, bucket, problem_id) for band, bucket in enumerate(_buckets(sig)))
+        with self.store.connection() as conn:
+            conn.executemany('DELETE FROM minhashes WHERE problem_id = ?', ids)
+            conn.executemany('DELETE FROM lsh_buckets WHERE problem_id = ?', ids)
+            conn.executemany('INSERT INTO minhashes(problem_id, kind, signature) VALUES (?, ?, ?)', signatures)
+            conn.executemany('INSERT INTO lsh_buckets(kind, band, bucket, problem_id) VALUES (?, ?, ?, ?)', buckets)
+
+    def remove(self, problem_id):
+        with self.store.connection() as conn:
+            conn.execute('DELETE FROM minhashes WHERE problem_id = ?', (problem_id,))
+            conn.execute('DELETE FROM lsh_buckets WHERE problem_id = ?', (problem_id,))
+
+    def backfill(self):
+        """Indexes problems added before the index existed (or by the seed); returns how many."""
+        conn = self.store.connection()
+        rows = conn.execute(
+            'SELECT p.id, p.statement FROM problems p '
+            'WHERE NOT EXISTS (SELECT 1 FROM minhashes m WHERE m.problem_id = p.id)'
+        ).fetchall()
+        if not rows:
+            return 0
+        digests = {}
+        for problem_id, digest in conn.execute('SELECT problem_id, sha256 FROM attachments'):
+            digests.setdefault(problem_id, []).append(digest)
+        self.add_many([(problem_id, statement, digests.get(problem_id, ())) for problem_id, statement in rows])
+        return len(rows)
+
+    def _matches(self, kind, sig, threshold, exclude=()):
+        """(problem_id, similarity) of indexed problems of `kind` whose signature is within `threshold` of `sig`."""
+        conn = self.store.connection()
+        candidates = set()
+        for band, bucket in enumerate(_buckets(sig)):
+            candidates.update(row[0] for row in conn.execute(
+                'SELECT problem_id FROM lsh_buckets WHERE kind = ? AND band = ? AND bucket = ?', (kind, band, bucket)))
+        candidates -= set(exclude)
+        if not candidates:
+            return []
+        rows = conn.execute(
+            f'SELECT problem_id, signature FROM minhashes WHERE kind = ? AND problem_id IN ({", ".join("?" * len(candidates))})',
+            [kind, *candidates],
+        ).fetchall()
+        scored = ((problem_id, similarity(sig, np.frombuffer(blob, dtype=np.uint64))) for problem_id, blob in rows)
+        return [(problem_id, score) for problem_id, score in scored if score >= threshold]
+
+    def _confirm(self, found, statement_sig):
+        """Drops attachment-only matches whose statements are not at least ATTACHMENT_STATEMENT_FLOOR similar."""
+        weak = [pid for pid, kinds in found.items() if 'statement' not in kinds]
+        if not weak:
+            return found
+        rows = dict(self.store.connection().execute(
+            f"SELECT problem_id, signature FROM minhashes WHERE kind = 'statement' AND problem_id IN ({', '.join('?' * len(weak))})",
+            weak,
+        ).fetchall())
+        for pid in weak:
+            score = similarity(statement_sig, np.frombuffer(rows[pid], dtype=np.uint64)) if statement_sig is not None and pid in rows else 0.0
+            if score >= ATTACHMENT_STATEMENT_FLOOR:
+                found[pid]['statement'] = score
+            else:
+                del found[pid]
+        return found
+
+    def _lookup(self, signatures, threshold, exclude):
+        found = {}
+        for kind, sig in signatures.items():
+            if sig is not None:
+                for problem_id, score in self._matches(kind, sig, threshold, exclude):
+                    found.setdefault(problem_id, {})[kind] = score
+        return self._confirm(found, signatures.get('statement'))
+
+    def query(self, statement, digests=(), threshold=SIMILARITY_THRESHOLD, exclude=()):
+        """Indexed problems similar to a statement / attachment set: {problem_id: {kind: similarity}}.
+
+        A problem matches when its statement is at least `threshold` similar,
+        or its attachment set is and its statement clears ATTACHMENT_STATEMENT_FLOOR.
+        """
+        return self._lookup({
+            'statement': signature(statement_shingles(statement)),
+            'attachments': signature(attachment_shingles(digests)),
+        }, threshold, exclude)
+
+    def near_duplicates(self, problem_id, threshold=SIMILARITY_THRESHOLD):
+        """Indexed problems similar to an indexed problem, from its stored signatures (same rules as query())."""
+        rows = self.store.connection().execute('SELECT kind, signature FROM minhashes WHERE problem_id = ?', (problem_id,)).fetchall()
+        return self._lookup({kind: np.frombuffer(blob, dtype=np.uint64) for kind, blob in rows}, threshold, (problem_id,))
+
+    def slugs(self, problem_ids):
+        """{problem_id: slug} for reporting matches."""
+        problem_ids = list(problem_ids)
+        if not problem_ids:
+            return {}
+        rows = self.store.connection().execute(
+            f'SELECT id, slug FROM problems WHERE id IN ({", ".join("?" * len(problem_ids))})', problem_ids).fetchall()
+        return dict(rows)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_dedupe_index():
+    """The process-wide near-duplicate index over the (seeded) store; problems it has not seen are back-filled on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex(store())
+            _index.backfill()
+        return _index
@@ -0,0 +1,38 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1 << 20
+
+# hashlib releases the GIL while digesting large buffers, so threads hash separate files in parallel.
+_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix='sha256')
+
+
+def sha256_stream(fileobj, chunk_size=CHUNK_SIZE):
+    """SHA-256 hex digest of a binary file object, read in fixed-size chunks into one reused buffer.
+
+    Memory stays at `chunk_size` however large the file is. The object is
+    rewound before and after, so callers can keep reading it.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    fileobj.seek(0)
+    while True:
+        n = fileobj.readinto(buffer)
+        if not n:
+            break
+        digest.update(view[:n])
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def sha256_path(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb', buffering=0) as f:
+        return sha256_stream(f, chunk_size)
+
+
+def hash_files(files, chunk_size=CHUNK_SIZE):
+    """Hashes several file objects concurrently on the shared pool; returns digests in input order."""
+    return list(_pool.map(lambda f: sha256_stream(f, chunk_size), files))
+
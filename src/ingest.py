@@ -0,0 +1,67 @@
+import json
+import os
+
+from src.run_store import DATA_DIR
+
+RESULTS_LOG = os.path.join(DATA_DIR, 'results.jsonl')
+
+
+def read_new_records(path, inode, offset, max_bytes=64 * 1024 * 1024):
+    """Reads complete JSONL records appended to `path` since the (inode, offset) checkpoint.
+
+    Returns (records, inode, new_offset). A trailing line without its newline is
+    left for the next call, and a replaced or truncated log is re-read from the
+    start. Malformed lines, and lines longer than `max_bytes`, are skipped rather
+    than blocking the tail.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return [], inode, offset
+    if inode != stat.st_ino or stat.st_size < offset:
+        inode, offset = stat.st_ino, 0
+    if stat.st_size == offset:
+        return [], inode, offset
+
+    with open(path, 'rb') as f:
+        while True:
+            f.seek(offset)
+            chunk = f.read(max_bytes)
+            end = chunk.rfind(b'\n') + 1
+            if end or len(chunk) < max_bytes:
+                break
+            # A line longer than max_bytes: skip it whole once its newline is written, then read on.
+            skipped = _skip_line(f, offset + len(chunk))
+            if skipped is None:
+                return [], inode, offset
+            offset = skipped
+    records = []
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:  # JSONDecodeError, or bytes that are not UTF-8
+            continue
+    return records, inode, offset + end
+
+
+def _skip_line(f, position, block=1024 * 1024):
+    """Offset just past the next newline at or after `position`, or None if it is not written yet."""
+    f.seek(position)
+    while True:
+        data = f.read(block)
+        if not data:
+            return None
+        newline = data.find(b'\n')
+        if newline >= 0:
+            return position + newline + 1
+        position += len(data)
+
+
+def append_records(records, path=RESULTS_LOG):
+    """Appends run records to the results log the way an executor would."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
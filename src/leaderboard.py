@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+def _dense(cells):
+    """Pivots (model_id, problem_id, count, solves) cells into dense model x problem arrays."""
+    model_ids, model_idx = np.unique(cells['model_id'].to_numpy(), return_inverse=True)
+    problem_ids, problem_idx = np.unique(cells['problem_id'].to_numpy(), return_inverse=True)
+    count = np.zeros((len(model_ids), len(problem_ids)))
+    solves = np.zeros_like(count)
+    count[model_idx, problem_idx] = cells['count'].to_numpy(dtype='float64')
+    solves[model_idx, problem_idx] = cells['solves'].to_numpy(dtype='float64')
+    return model_ids, problem_ids, count, solves
+
+
+def bootstrap_weights(n_problems, n_boot, rng):
+    """(n_boot, n_problems) resampling counts: how often each problem is drawn in each replicate."""
+    draws = rng.integers(0, n_problems, size=(n_boot, n_problems))
+    offsets = (np.arange(n_boot)[:, None] * n_problems + draws).ravel()
+    return np.bincount(offsets, minlength=n_boot * n_problems).reshape(n_boot, n_problems).astype('float64')
+
+
+def _rank_block(model_ids, count, solves, weights, rng, alpha):
+    """Solve rate and bootstrap CI per model for one block of problems (columns of count/solves)."""
+    keep = (count > 0).any(axis=1)
+    model_ids, count, solves = model_ids[keep], count[keep], solves[keep]
+    observed = (count > 0).astype('float64')
+    rate = np.divide(solves, count, out=np.zeros_like(solves), where=count > 0)
+    # Binomial variance of each cell's rerun mean; adds rerun-level noise to every replicate in closed form.
+    rerun_var = np.divide(rate * (1 - rate), count, out=np.zeros_like(rate), where=count > 0)
+
+    n_obs = observed.sum(axis=1)
+    point = rate.sum(axis=1) / n_obs
+
+    # One matmul per statistic covers every replicate and model at once: (B, P) @ (P, M).
+    w_obs = weights @ observed.T
+    w_rate = weights @ rate.T
+    w_var = weights @ rerun_var.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = w_rate / w_obs
+        noise_sd = np.sqrt(w_var) / w_obs
+    replicates = means + rng.standard_normal(means.shape) * noise_sd
+    low, high = np.nanquantile(replicates, [alpha / 2, 1 - alpha / 2], axis=0)
+
+    return pd.DataFrame({
+        'model_id': model_ids,
+        'solve_rate': point,
+        'ci_low': np.clip(low, 0.0, 1.0),
+        'ci_high': np.clip(high, 0.0, 1.0),
+        'problems': n_obs.astype('int64'),
+        'runs': count.sum(axis=1).astype('int64'),
+    })
+
+
+def rank_models(cells, problem_groups=None, n_boot=1000, alpha=0.05, seed=0):
+    """Ranks models by solve rate with bootstrap confidence intervals.
+
+    `cells` holds per-(model, problem) run counts and solves. Problems are
+    resampled with replacement (one batched draw for all replicates) and the
+    rerun-level binomial noise of each cell is folded into every replicate as
+    a normal approximation, so the interval reflects both which problems were
+    picked and, approximately, how noisy each model's reruns are. Pass
+    `problem_groups` (a Series mapping problem_id to e.g. category) to get one
+    ranking per group; each group resamples its own problems independently.
+    """
+    columns = ['group', 'rank', 'model_id', 'solve_rate', 'ci_low', 'ci_high', 'problems', 'runs']
+    if cells is None or not len(cells):
+        return pd.DataFrame(columns=columns)
+    rng = np.random.default_rng(seed)
+    model_ids, problem_ids, count, solves = _dense(cells)
+
+    if problem_groups is None:
+        blocks = {'All': np.ones(len(problem_ids), dtype=bool)}
+    else:
+        labels = pd.Series(problem_ids).map(problem_groups).astype(object).fillna('Uncategorized').to_numpy()
+        blocks = {group: labels == group for group in pd.unique(labels)}
+
+    frames = []
+    for group, mask in blocks.items():
+        # A group's replicates draw as many problems as it has, from its own problems only.
+        weights = bootstrap_weights(int(mask.sum()), n_boot, rng)
+        block = _rank_block(model_ids, count[:, mask], solves[:, mask], weights, rng, alpha)
+        block = block.sort_values('solve_rate', ascending=False, kind='stable')
+        block.insert(0, 'rank', np.arange(1, len(block) + 1))
+        block.insert(0, 'group', group)
+        frames.append(block)
+    return pd.concat(frames, ignore_index=True)[columns]
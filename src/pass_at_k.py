@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def estimator_tables(n_max, ks):
+    """Lookup tables indexed [k, n, c] of the unbiased pass@k and pass^k estimators.
+
+    pass@k = 1 - C(n-c, k) / C(n, k) is the chance at least one of k attempts
+    drawn without replacement succeeds; pass^k = C(c, k) / C(n, k) the chance
+    all k do. Cells with fewer than k attempts are NaN.
+    """
+    ks = list(ks)
+    pass_at = np.full((len(ks), n_max + 1, n_max + 1), np.nan)
+    pass_hat = np.full_like(pass_at, np.nan)
+    for i, k in enumerate(ks):
+        for n in range(k, n_max + 1):
+            total = math.comb(n, k)
+            pass_at[i, n, :n + 1] = [1 - math.comb(n - c, k) / total for c in range(n + 1)]
+            pass_hat[i, n, :n + 1] = [math.comb(c, k) / total for c in range(n + 1)]
+    return pass_at, pass_hat
+
+
+def from_counts(n, c, ks):
+    """pass@k and pass^k for every k in `ks` from attempt counts `n` and success counts `c` of any shape.
+
+    Returns two arrays of shape (len(ks), *n.shape); each k is a single gather
+    from a small precomputed table, with no per-cell Python work.
+    """
+    n = np.asarray(n, dtype='int64')
+    c = np.asarray(c, dtype='int64')
+    n_max = int(n.max()) if n.size else 0
+    pass_at, pass_hat = estimator_tables(n_max, ks)
+    return pass_at[:, n, c], pass_hat[:, n, c]
+
+
+def pass_at_k(attempts, ks, valid=None):
+    """pass@k and pass^k from an (n_models x n_problems x n_attempts) boolean array.
+
+    `valid` masks padded attempt slots when cells have different rerun counts.
+    Returns two (len(ks), n_models, n_problems) arrays.
+    """
+    attempts = np.asarray(attempts, dtype=bool)
+    valid = np.ones_like(attempts) if valid is None else np.asarray(valid, dtype=bool)
+    return from_counts(valid.sum(axis=-1), (attempts & valid).sum(axis=-1), ks)
+
+
+def attempt_tensor(runs):
+    """Packs flat runs into (model_ids, problem_ids, attempts, valid) with attempts ordered by run id."""
+    frame = runs[['model_id', 'problem_id', 'id', 'solved']].sort_values(['model_id', 'problem_id', 'id'])
+    model_ids, m = np.unique(frame['model_id'].to_numpy(), return_inverse=True)
+    problem_ids, p = np.unique(frame['problem_id'].to_numpy(), return_inverse=True)
+    slot = frame.groupby(['model_id', 'problem_id']).cumcount().to_numpy()
+    shape = (len(model_ids), len(problem_ids), int(slot.max()) + 1 if len(slot) else 0)
+    attempts = np.zeros(shape, dtype=bool)
+    valid = np.zeros(shape, dtype=bool)
+    attempts[m, p, slot] = frame['solved'].fillna(False).to_numpy(dtype=bool)
+    valid[m, p, slot] = True
+    return model_ids, problem_ids, attempts, valid
+
+
+def cells_pass_at_k(cells, ks=None):
+    """Adds pass@k / pass^k columns to per-(model, problem) cells with `count` and `solves`, for every k up to the max reruns."""
+    n = cells['count'].to_numpy(dtype='int64')
+    c = cells['solves'].to_numpy(dtype='int64')
+    ks = list(ks) if ks is not None else list(range(1, int(n.max()) + 1 if n.size else 1))
+    pass_at, pass_hat = from_counts(n, c, ks)
+    columns = {f'pass@{k}': pass_at[i] for i, k in enumerate(ks)}
+    columns.update({f'pass^{k}': pass_hat[i] for i, k in enumerate(ks)})
+    return pd.concat([cells[['model_id', 'problem_id']].reset_index(drop=True), pd.DataFrame(columns)], axis=1)
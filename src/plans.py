@@ -0,0 +1,193 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Runs in these states hold a result; anything else (error, running, ...) is executed again.
+RESULT_STATUSES = ('succeeded', 'failed')
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+# Environment fields that do not change what a task sees: masked secrets and the profile's display name.
+_ENVIRONMENT_IGNORED = ('browserless_token',)
+# Evaluation limits that change a run's outcome; reruns only decide how many attempts are planned.
+_EXECUTION_LIMITS = ('wallclock_sec', 'max_tokens_in', 'max_tokens_out')
+_CHUNK = 10000
+
+
+def canonical(value):
+    """Key-sorted, whitespace-free JSON: equal configs always serialize (and so hash) identically."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def digest(value):
+    return hashlib.sha256(canonical(value).encode()).hexdigest()
+
+
+def environment_digest(environment):
+    return digest({key: value for key, value in environment.items() if key not in _ENVIRONMENT_IGNORED})
+
+
+def task_params(payload):
+    """The parts of a benchmark payload a run's outcome depends on besides problem, model and environment.
+    Metric weights and aggregation only change scoring, so editing them never re-runs anything."""
+    evaluation = payload.get('evaluation') or {}
+    limits = evaluation.get('limits') or {}
+    return {
+        'judging': evaluation.get('judging'),
+        'rubric': evaluation.get('rubric'),
+        **{key: limits.get(key) for key in _EXECUTION_LIMITS},
+    }
+
+
+def problem_digests(store, problem_ids):
+    """{problem_id: content digest} over statement, flag, stored Add CTF payload and attachment digests, so editing
+    a problem (not just renaming its row) invalidates its tasks."""
+    problem_ids = list(dict.fromkeys(int(pid) for pid in problem_ids))
+    conn = store.connection()
+    digests = {}
+    for start in range(0, len(problem_ids), _CHUNK):
+        chunk = problem_ids[start:start + _CHUNK]
+        marks = ', '.join('?' * len(chunk))
+        files = {}
+        for problem_id, sha256 in conn.execute(
+                f'SELECT problem_id, sha256 FROM attachments WHERE problem_id IN ({marks}) ORDER BY problem_id, sha256', chunk):
+            files.setdefault(problem_id, []).append(sha256)
+        for problem_id, statement, expected_flag, scorer, payload in conn.execute(
+                f'SELECT id, statement, expected_flag, scorer, payload FROM problems WHERE id IN ({marks})', chunk):
+            digests[problem_id] = digest([statement, expected_flag, scorer, payload, files.get(problem_id, [])])
+    return digests
+
+
+@dataclass(frozen=True)
+class Task:
+    problem_id: int
+    model_id: int
+    environment_digest: str
+    params: str
+    attempt: int
+    hash: str
+
+
+@dataclass(frozen=True)
+class Plan:
+    """A compiled benchmark: every (problem, model, environment, params, attempt) task it runs, in a fixed order.
+
+    A task's hash covers the problem's content, the model, the environment
+    digest, the execution params and the attempt number, and nothing else,
+    so a task that ran under any benchmark is recognised wherever it recurs.
+    """
+    environment: dict
+    environment_digest: str
+    params: str
+    tasks: tuple
+
+    @property
+    def digest(self):
+        return digest([task.hash for task in self.tasks])
+
+    def frame(self):
+        return pd.DataFrame(self.tasks, columns=list(Task.__dataclass_fields__))
+
+
+def compile_plan(payload, store):
+    """Compiles a Create Benchmark payload (dataset problem_ids, model_ids, environment, evaluation) into a Plan.
+    Datasets that are not resolved yet (an uploaded ZIP) compile to no tasks."""
+    environment = payload.get('environment') or {}
+    env_digest = environment_digest(environment)
+    params = canonical(task_params(payload))
+    problem_ids = (payload.get('dataset') or {}).get('problem_ids') or []
+    model_ids = payload.get('model_ids') or []
+    reruns = int(((payload.get('evaluation') or {}).get('limits') or {}).get('reruns') or 1)
+    contents = problem_digests(store, problem_ids)
+    tasks = []
+    for model_id in model_ids:
+        for problem_id in problem_ids:
+            if problem_id not in contents:
+                continue
+            prefix = f'{contents[problem_id]}|{int(model_id)}|{env_digest}|{params}|'
+            for attempt in range(reruns):
+                task_hash = hashlib.sha256(f'{prefix}{attempt}'.encode()).hexdigest()
+                tasks.append(Task(int(problem_id), int(model_id), env_digest, params, attempt, task_hash))
+    return Plan(environment, env_digest, params, tuple(tasks))
+
+
+def _existing(conn, sql, hashes):
+    found = set()
+    for start in range(0, len(hashes), _CHUNK):
+        chunk = hashes[start:start + _CHUNK]
+        found.update(row[0] for row in conn.execute(sql.format(marks=', '.join('?' * len(chunk))), chunk))
+    return found
+
+
+def completed_hashes(store, hashes):
+    """Task hashes that already have a run with a result."""
+    statuses = ', '.join(f"'{status}'" for status in RESULT_STATUSES)
+    return _existing(store.connection(), f'SELECT task_hash FROM runs WHERE task_hash IN ({{marks}}) AND status IN ({statuses})', list(hashes))
+
+
+def queued_hashes(store):
+    """Task hashes held by queued or running jobs."""
+    rows = store.connection().execute(
+        f'SELECT payload FROM jobs WHERE status IN ({", ".join("?" * len(ACTIVE_JOB_STATUSES))})', ACTIVE_JOB_STATUSES)
+    return {task[0] for (payload,) in rows for task in json.loads(payload or '{}').get('tasks', [])}
+
+
+def pending_tasks(plan, store):
+    """Tasks of a plan with neither a stored result nor a job already on them."""
+    skip = completed_hashes(store, [task.hash for task in plan.tasks]) | queued_hashes(store)
+    return [task for task in plan.tasks if task.hash not in skip]
+
+
+def environment_id(store, environment):
+    """Id of the environments row for an environment config, registered by digest on first use."""
+    env_digest = environment_digest(environment)
+    row = store.connection().execute('SELECT id FROM environments WHERE digest = ?', (env_digest,)).fetchone()
+    if row is not None:
+        return row[0]
+    image = environment.get('docker_image') or environment.get('profile')
+    tools = ', '.join(environment.get('toolpacks') or environment.get('quick_add_libs') or []) or None
+    limits = f"{environment.get('cpu')} CPU, {environment.get('memory_gb')}GB RAM"
+    return store.insert_rows('environments', [
+        {'name': environment.get('profile') or 'Custom', 'image': image, 'tools': tools, 'limits': limits, 'digest': env_digest}])[0]
+
+
+def job_resources(environment):
+    """Job columns the scheduler packs (cpu, memory_gb, disk_gb, gpu) for a benchmark's environment config."""
+    return {
+        'cpu': int(environment.get('cpu') or 1),
+        'memory_gb': float(environment.get('memory_gb') or 1),
+        'disk_gb': float(environment.get('disk_gb') or 1),
+        'gpu': environment.get('gpu') or 'none',
+    }
+
+
+def submit_plan(plan, benchmark_id, store, user=None, priority=0):
+    """Queues a plan's pending tasks as one job per model; returns (job ids, tasks queued, tasks skipped).
+
+    Submitting the same plan again queues nothing, and submitting it after
+    adding a model queues only that model's tasks.
+    """
+    pending = pending_tasks(plan, store)
+    if not pending:
+        return [], 0, len(plan.tasks)
+    env_id = environment_id(store, plan.environment)
+    by_model = {}
+    for task in pending:
+        by_model.setdefault(task.model_id, []).append([task.hash, task.problem_id, task.attempt])
+    now = time.time()
+    environment = plan.environment
+    job_ids = store.insert_rows('jobs', [{
+        'benchmark_id': benchmark_id,
+        'model_id': model_id,
+        'user': user,
+        'status': 'queued',
+        'priority': priority,
+        **job_resources(environment),
+        'payload': canonical({'environment_id': env_id, 'environment_digest': plan.environment_digest,
+                              'profile': environment.get('profile'), 'network': environment.get('network'),
+                              'params': json.loads(plan.params), 'tasks': tasks}),
+        'created_at': now,
+    } for model_id, tasks in by_model.items()])
+    return job_ids, len(pending), len(plan.tasks) - len(pending)
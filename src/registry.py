@@ -0,0 +1,94 @@
+import json
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Colors handed out by id to models that have none stored, so a model keeps its color across sessions.
+PALETTE = ['#9FC9FF', '#FC69D3', '#88d8b0', '#ff6b6b', '#A78BFA', '#F59E0B', '#34D399', '#60A5FA', '#F472B6', '#FBBF24']
+
+
+def _value(value, default=None):
+    return default if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)) else value
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    id: int
+    name: str
+    organization: str = None
+    license: str = None
+    context: int = None
+    input_price_pm: float = None
+    output_price_pm: float = None
+    knowledge_cutoff: str = None
+    color: str = PALETTE[0]
+    is_multimodal: bool = False
+    max_output: int = None
+    latency_s: float = None
+    speed_tps: float = None
+    standard_benchmarks: dict = field(default_factory=dict)
+
+    def rgba(self, alpha):
+        """The model color as a CSS rgba() string with the given opacity."""
+        r, g, b = (int(self.color[i:i + 2], 16) for i in (1, 3, 5))
+        return f'rgba({r}, {g}, {b}, {alpha})'
+
+
+class ModelRegistry:
+    """Every model keyed by its stable store id, with O(1) id <-> name lookups.
+
+    Built once per catalog version from the models frame, so views never
+    rebuild lookup tables or rely on row order.
+    """
+
+    def __init__(self, models):
+        self.frame = models
+        self._by_id = {}
+        for row in models.to_dict('records'):
+            model_id = int(row['id'])
+            self._by_id[model_id] = ModelInfo(
+                id=model_id,
+                name=str(row['Model']),
+                organization=_value(row.get('Organization')),
+                license=_value(row.get('License')),
+                context=_value(row.get('Context')),
+                input_price_pm=_value(row.get('Input $/M')),
+                output_price_pm=_value(row.get('Output $/M')),
+                knowledge_cutoff=_value(row.get('Knowledge Cutoff')),
+                color=_value(row.get('color'), PALETTE[(model_id - 1) % len(PALETTE)]),
+                is_multimodal=bool(_value(row.get('is_multimodal'), False)),
+                max_output=_value(row.get('max_output')),
+                latency_s=_value(row.get('latency_s')),
+                speed_tps=_value(row.get('speed_tps')),
+                standard_benchmarks=json.loads(_value(row.get('standard_benchmarks'), '{}')),
+            )
+        self._id_by_name = {info.name: model_id for model_id, info in self._by_id.items()}
+        self.names = pd.Series({model_id: info.name for model_id, info in self._by_id.items()}, dtype=object)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, model_id):
+        return model_id in self._by_id
+
+    def get(self, model_id):
+        return self._by_id[int(model_id)]
+
+    def by_name(self, name):
+        return self._by_id[self._id_by_name[name]]
+
+    def name(self, model_id):
+        return self._by_id[int(model_id)].name
+
+    def id(self, name):
+        return self._id_by_name[name]
+
+    def ids(self):
+        return list(self._by_id)
+
+    def map_names(self, model_ids):
+        """Vectorized id -> name for a Series or Index of model ids; unknown ids become NaN."""
+        return model_ids.map(self.names)
@@ -0,0 +1,166 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = os.environ.get('AUBCTF_DATA_DIR', 'data')
+RUNS_PATH = os.path.join(DATA_DIR, 'runs.parquet')
+
+ID_COLUMNS = ['id', 'problem_id', 'environment_id', 'model_id']
+ID_DTYPES = {'id': 'int64', 'problem_id': 'int64', 'environment_id': 'Int64', 'model_id': 'int64', 'benchmark_id': 'Int64'}
+METRIC_DTYPES = {'solved': 'boolean', 'ttf': 'Float32', 'tokens': 'Int64', 'cost': 'Float64'}
+PARAM_PREFIX = 'param_'
+TRANSCRIPT_COLUMNS = ['artifacts', 'logs', 'timestamps']
+TEXT_COLUMNS = ['artifacts', 'logs', 'flag_found', 'timestamps']
+# Columns aggregations need; loading just these skips the transcript text entirely.
+ANALYTICS_COLUMNS = ID_COLUMNS + ['status', *METRIC_DTYPES, 'success_rate']
+# Columns of the store's runs table that make up the Parquet snapshot; transcripts stay in SQLite.
+SNAPSHOT_STORE_COLUMNS = ID_COLUMNS + ['benchmark_id', 'status', *METRIC_DTYPES, 'params', 'success_rate', 'flag_found']
+GENERATION_KEY = b'aubctf.generation'
+
+
+def flatten_runs(records):
+    """Turns run records with `metrics` list-of-dict and `params` dict cells into one typed column per field."""
+    records = list(records)
+    flat = pd.DataFrame({col: pd.array([r.get(col) for r in records], dtype=dtype) for col, dtype in ID_DTYPES.items()})
+    flat['status'] = pd.array([r.get('status') for r in records], dtype='string')
+
+    # A run's metrics list holds its attempts in order; the last entry is the final outcome.
+    final = [r['metrics'][-1] if r.get('metrics') else {} for r in records]
+    for name, dtype in METRIC_DTYPES.items():
+        flat[name] = pd.array([m.get(name) for m in final], dtype=dtype)
+
+    param_keys = sorted({key for r in records for key in (r.get('params') or {})})
+    for key in param_keys:
+        values = pd.Series([(r.get('params') or {}).get(key) for r in records], dtype=object)
+        numeric = pd.to_numeric(values, errors='coerce')
+        if numeric.notna().sum() == values.notna().sum():
+            flat[PARAM_PREFIX + key] = numeric.astype('Float64')
+        else:
+            flat[PARAM_PREFIX + key] = values.astype('string')
+
+    for col in TEXT_COLUMNS:
+        flat[col] = pd.array([r.get(col) for r in records], dtype='string')
+    flat['success_rate'] = pd.array([r.get('success_rate') for r in records], dtype='Float32')
+    return flat
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return value is None or isinstance(value, (int, float))
+
+
+def is_run_record(record):
+    """Whether a decoded results-log line has the shape of a run record (ids, metrics list of dicts, params dict,
+    scalar fields), so that storing it cannot fail."""
+    if not isinstance(record, dict) or not (_is_int(record.get('problem_id')) and _is_int(record.get('model_id'))):
+        return False
+    if not all(record.get(col) is None or _is_int(record[col]) for col in ('environment_id', 'benchmark_id')):
+        return False
+    metrics = record.get('metrics')
+    if metrics is not None and not (isinstance(metrics, list) and all(isinstance(m, dict) for m in metrics)):
+        return False
+    if metrics and not all(_is_number(metrics[-1].get(name)) for name in METRIC_DTYPES):
+        return False
+    if record.get('params') is not None and not isinstance(record['params'], dict):
+        return False
+    return _is_number(record.get('success_rate')) and _is_number(record.get('completed_at')) and all(
+        record.get(col) is None or isinstance(record[col], str) for col in ['status', 'task_hash', *TEXT_COLUMNS])
+
+
+def to_store_rows(records):
+    """Maps run records onto the store's runs table: metrics flattened, params kept as JSON. A record's own `id` is
+    ignored; the store assigns one."""
+    rows = []
+    for r in records:
+        final = r['metrics'][-1] if r.get('metrics') else {}
+        row = {col: r.get(col) for col in ID_COLUMNS[1:] + ['benchmark_id', 'status', 'success_rate', 'task_hash', 'completed_at',
+                                                            *TEXT_COLUMNS]}
+        row.update({name: final.get(name) for name in METRIC_DTYPES})
+        row['params'] = json.dumps(r.get('params') or {})
+        rows.append(row)
+    return rows
+
+
+def from_store_frame(frame):
+    """Types a frame read from the store's runs table and expands its params JSON into param_* columns."""
+    flat = frame.drop(columns=['params'], errors='ignore')
+    flat = flat.astype({col: dtype for col, dtype in ID_DTYPES.items() if col in flat})
+    flat['status'] = flat['status'].astype('string')
+    for name, dtype in METRIC_DTYPES.items():
+        flat[name] = flat[name].astype(dtype)
+    flat['success_rate'] = flat['success_rate'].astype('Float32')
+    for col in TEXT_COLUMNS:
+        if col in flat:
+            flat[col] = flat[col].astype('string')
+    if 'params' in frame and len(frame):
+        # Param sets repeat heavily across runs, so parse each distinct JSON string once.
+        codes, uniques = pd.factorize(frame['params'].fillna('{}'))
+        params = pd.DataFrame.from_records([json.loads(u) for u in uniques]).take(codes).set_axis(frame.index)
+        for key in sorted(params.columns):
+            numeric = pd.to_numeric(params[key], errors='coerce')
+            if numeric.notna().sum() == params[key].notna().sum():
+                flat[PARAM_PREFIX + key] = numeric.astype('Float64')
+            else:
+                flat[PARAM_PREFIX + key] = params[key].astype('string')
+    return flat
+
+
+def param_columns(runs):
+    return [col for col in runs.columns if col.startswith(PARAM_PREFIX)]
+
+
+def write_runs(runs, path=RUNS_PATH, generation=None):
+    """Writes the flat runs frame atomically, stamped with the store generation it was built from."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    table = pa.Table.from_pandas(runs, preserve_index=False)
+    if generation is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), GENERATION_KEY: str(generation).encode()})
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_runs(path=RUNS_PATH, columns=None):
+    """Reads typed run columns straight from Parquet; pass `columns` to skip the ones you do not need."""
+    return pd.read_parquet(path, columns=columns, dtype_backend='numpy_nullable')
+
+
+def snapshot_generation(path=RUNS_PATH):
+    """The store generation a snapshot was written from (read from the footer only), or None."""
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except FileNotFoundError:
+        return None
+    value = metadata.get(GENERATION_KEY)
+    return int(value) if value is not None else None
+
+
+def synthetic_runs(n_models=50, n_problems=2000, reruns=5, seed=0):
+    """Generates a flat runs frame of n_models x n_problems x reruns for load and timing checks."""
+    rng = np.random.default_rng(seed)
+    n = n_models * n_problems * reruns
+    model_id = np.repeat(np.arange(1, n_models + 1), n_problems * reruns)
+    problem_id = np.tile(np.repeat(np.arange(1, n_problems + 1), reruns), n_models)
+    skill = rng.uniform(0.1, 0.9, n_models)[model_id - 1]
+    ease = rng.uniform(-0.3, 0.3, n_problems)[problem_id - 1]
+    solved = rng.random(n) < np.clip(skill + ease, 0.0, 1.0)
+    tokens = rng.integers(500, 20_000, n)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'problem_id': problem_id,
+        'environment_id': rng.integers(1, 3, n),
+        'model_id': model_id,
+        'status': pd.array(np.where(solved, 'succeeded', 'failed'), dtype='string'),
+        'solved': pd.array(solved, dtype='boolean'),
+        'ttf': pd.array(np.where(solved, rng.uniform(10, 900, n), np.nan), dtype='Float32'),
+        'tokens': pd.array(tokens, dtype='Int64'),
+        'cost': pd.array(tokens * 2e-6, dtype='Float64'),
+        'success_rate': pd.array(solved * 100.0, dtype='Float32'),
+    })
@@ -0,0 +1,314 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.data import ingest_results, store
+from src.plans import completed_hashes
+from src.run_store import DATA_DIR
+
+WORKERS_PATH = os.path.join(DATA_DIR, 'workers.json')
+# Seconds between scheduler service steps (ingest results, reap finished jobs, admit queued ones).
+SERVICE_INTERVAL_S = 5.0
+# Resources a job requests and a worker offers, in this order; a GPU job asks for one GPU of its type.
+RESOURCES = ('cpu', 'memory_gb', 'disk_gb', 'gpus')
+GPU_TYPES = ('none', 'rtx', 'a100')
+
+
+@dataclass(frozen=True)
+class Worker:
+    name: str
+    cpu: int
+    memory_gb: float
+    disk_gb: float
+    gpu: str = 'none'
+    gpus: int = 0
+
+
+DEFAULT_WORKERS = (
+    Worker('cpu-1', 32, 128, 1000),
+    Worker('cpu-2', 32, 128, 1000),
+    Worker('rtx-1', 16, 64, 500, 'rtx', 2),
+    Worker('a100-1', 32, 256, 2000, 'a100', 4),
+)
+
+
+def load_workers(path=WORKERS_PATH):
+    """The worker pool: data/workers.json (a list of Worker fields) when present, else DEFAULT_WORKERS."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return tuple(Worker(**worker) for worker in json.load(f))
+    except FileNotFoundError:
+        return DEFAULT_WORKERS
+
+
+def save_workers(workers, path=WORKERS_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([asdict(worker) for worker in workers], f, indent=2)
+
+
+# Columns of the active-jobs scan each pass reads; payloads (task lists) stay in SQLite.
+_ACTIVE_COLUMNS = ('id', 'user', 'status', 'priority', 'cpu', 'memory_gb', 'disk_gb', 'gpu', 'worker', 'created_at')
+
+
+def job_arrays(rows):
+    """Column arrays of job rows (tuples in _ACTIVE_COLUMNS order, or a frame with those columns), with missing
+    values defaulted and the (n, len(RESOURCES)) `requests` matrix."""
+    if isinstance(rows, pd.DataFrame):
+        rows = list(rows[list(_ACTIVE_COLUMNS)].itertuples(index=False, name=None))
+    columns = list(zip(*rows)) if rows else [()] * len(_ACTIVE_COLUMNS)
+    jobs = {name: np.array(values, dtype=object) for name, values in zip(_ACTIVE_COLUMNS, columns)}
+    gpu = np.array([value or 'none' for value in jobs['gpu']], dtype=object)
+    jobs.update(
+        id=jobs['id'].astype('int64'),
+        user=np.array([value or '' for value in jobs['user']], dtype=object),
+        priority=np.array([value or 0 for value in jobs['priority']], dtype='int64'),
+        created_at=np.array([value or 0.0 for value in jobs['created_at']], dtype='float64'),
+        gpu=gpu,
+        requests=np.column_stack([
+            np.array([value or 1 for value in jobs[name]], dtype='float64') for name in ('cpu', 'memory_gb', 'disk_gb')
+        ] + [(gpu != 'none').astype('float64')]) if rows else np.zeros((0, len(RESOURCES))),
+    )
+    return jobs
+
+
+def _select(jobs, mask):
+    return {name: values[mask] for name, values in jobs.items()}
+
+
+def queue_order(queued, usage, totals):
+    """Dispatch order of queued jobs: strictly by priority, then Dominant Resource Fairness across users.
+
+    Within a priority the next job is the oldest of the user whose dominant
+    share (largest fraction of any resource held by their running jobs and
+    the jobs ordered before it) is smallest, so a user with thousands of
+    queued jobs cannot starve one with a single job. `queued` is
+    job_arrays() output and `usage` maps user -> resource vector already
+    running. Yields positions into `queued`, lazily, so a pass that fills
+    the pool early stops ordering there.
+    """
+    if not len(queued['id']):
+        return
+    scale = np.where(totals > 0, totals, 1)
+    requests = queued['requests'] / scale
+    users = queued['user']
+    fifo = np.lexsort((queued['id'], queued['created_at'], -queued['priority']))
+    shares = {user: np.asarray(used, dtype='float64') / scale for user, used in usage.items()}
+    zero = np.zeros(len(RESOURCES))
+    # fifo is grouped by priority (descending); each block is ordered on its own, carrying shares across blocks.
+    bounds = np.flatnonzero(np.diff(queued['priority'][fifo])) + 1
+    for block in np.split(fifo, bounds):
+        per_user = {}
+        for rank, position in enumerate(block.tolist()):
+            per_user.setdefault(users[position], []).append((rank, position))
+        heap = [(float(shares.get(user, zero).max()), jobs[0][0], user) for user, jobs in per_user.items()]
+        heapq.heapify(heap)
+        cursor = dict.fromkeys(per_user, 0)
+        while heap:
+            _, _, user = heapq.heappop(heap)
+            jobs = per_user[user]
+            position = jobs[cursor[user]][1]
+            cursor[user] += 1
+            yield position
+            shares[user] = shares.get(user, zero) + requests[position]
+            if cursor[user] < len(jobs):
+                heapq.heappush(heap, (float(shares[user].max()), jobs[cursor[user]][0], user))
+
+
+class Scheduler:
+    """Admits queued jobs onto the worker pool; all queue state lives in the store's jobs table.
+
+    Each pass takes queued jobs in queue_order() and places each on the
+    worker it fits most tightly (best fit over normalized free capacity,
+    keeping GPU workers for GPU jobs when a CPU worker also fits). A job
+    that does not fit right now is passed over for later ones (backfill),
+    except that the first such job reserves the worker it is closest to
+    fitting; one that could never fit any worker is marked 'unschedulable'.
+    A pass reads one indexed scan of the active jobs and works on NumPy
+    arrays. start_service() runs passes in the background.
+    """
+
+    def __init__(self, store, workers=None):
+        self.store = store
+        self.workers = tuple(workers or load_workers())
+        self.capacity = np.array([[w.cpu, w.memory_gb, w.disk_gb, w.gpus] for w in self.workers], dtype='float64')
+        self.gpu_types = np.array([w.gpu for w in self.workers], dtype=object)
+        self.totals = self.capacity.sum(axis=0)
+        self._slots = {w.name: i for i, w in enumerate(self.workers)}
+        self._lock = threading.Lock()
+
+    def active(self):
+        """job_arrays() of the queued and running jobs."""
+        rows = self.store.connection().execute(
+            f"SELECT {', '.join(_ACTIVE_COLUMNS)} FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return job_arrays(rows)
+
+    def free_capacity(self, running):
+        """Free (worker x resource) capacity and per-user usage, given job_arrays() of the running jobs."""
+        free = self.capacity.copy()
+        usage = {}
+        for worker, user, request in zip(running['worker'], running['user'], running['requests']):
+            if worker in self._slots:
+                free[self._slots[worker]] -= request
+            usage[user] = usage.get(user, 0) + request
+        return free, usage
+
+    def fits(self, request, gpu, capacity):
+        ok = (capacity >= request).all(axis=1)
+        if request[3]:
+            ok &= self.gpu_types == gpu
+        return ok
+
+    def place(self, request, gpu, free):
+        fits = self.fits(request, gpu, free)
+        if not fits.any():
+            return None
+        leftover = ((free - request) / np.where(self.capacity > 0, self.capacity, 1))[:, :3].sum(axis=1)
+        # A CPU-only job on a GPU worker would block GPU jobs; only go there when nothing else fits.
+        if not request[3]:
+            leftover += (self.capacity[:, 3] > 0) * len(RESOURCES)
+        return int(np.argmin(np.where(fits, leftover, np.inf)))
+
+    def reserve(self, request, gpu, free):
+        """Worker to hold for a job that fits none right now: of those it fits when empty, the one it is closest to
+        fitting (smallest normalized shortfall). None if it fits no worker at all."""
+        fits = self.fits(request, gpu, self.capacity)
+        if not fits.any():
+            return None
+        shortfall = (np.maximum(request - free, 0) / np.where(self.capacity > 0, self.capacity, 1)).sum(axis=1)
+        return int(np.argmin(np.where(fits, shortfall, np.inf)))
+
+    def possible(self, requests, gpus):
+        """Which requests fit some (empty) worker with their GPU type; the rest would wait forever."""
+        gpu_ok = (requests[:, 3] == 0)[:, None] | (gpus[:, None] == self.gpu_types[None, :])
+        return ((self.capacity[None, :, :] >= requests[:, None, :]).all(axis=2) & gpu_ok).any(axis=1)
+
+    def schedule(self, now=None):
+        """One admission pass; returns the ids of the jobs started."""
+        now = time.time() if now is None else now
+        with self._lock:
+            jobs = self.active()
+            is_queued = jobs['status'] == 'queued'
+            if not is_queued.any():
+                return []
+            queued = _select(jobs, is_queued)
+            free, usage = self.free_capacity(_select(jobs, ~is_queued))
+            requests, gpus = queued['requests'], queued['gpu']
+            smallest = requests.min(axis=0)
+            possible = self.possible(requests, gpus)
+            impossible = queued['id'][~possible].tolist()
+            started, workers, blocked, reserved = [], [], set(), False
+            if (free >= smallest).all(axis=1).any():
+                for position in queue_order(queued, usage, self.totals):
+                    # Free capacity only shrinks during a pass, so a shape that did not fit will not fit later either.
+                    shape = (*requests[position].tolist(), gpus[position])
+                    if not possible[position] or shape in blocked:
+                        continue
+                    request = requests[position]
+                    slot = self.place(request, gpus[position], free)
+                    if slot is None:
+                        blocked.add(shape)
+                        if not reserved:
+                            # The first job that does not fit holds its worker: later jobs only backfill what it
+                            # leaves, so a stream of small jobs cannot keep a large or high-priority one waiting.
+                            free[self.reserve(request, gpus[position], free)] -= request
+                            reserved = True
+                        continue
+                    free[slot] -= request
+                    started.append(int(queued['id'][position]))
+                    workers.append(self.workers[slot].name)
+                    if not (free >= smallest).all(axis=1).any():
+                        break
+            if started:
+                self.store.update_columns('jobs', started, status=['running'] * len(started), worker=workers,
+                                          started_at=[now] * len(started))
+            if impossible:
+                self.store.update_rows('jobs', impossible, status='unschedulable', finished_at=now)
+            return started
+
+    def finish(self, job_ids, status='finished', now=None):
+        """Marks jobs done (or 'failed' / 'cancelled'), releasing their capacity."""
+        if job_ids:
+            self.store.update_rows('jobs', list(job_ids), status=status, finished_at=time.time() if now is None else now)
+
+    def reap(self, now=None):
+        """Finishes running jobs whose every task has a stored result; returns their ids."""
+        rows = self.store.connection().execute("SELECT id, payload FROM jobs WHERE status = 'running'").fetchall()
+        done = []
+        for job_id, payload in rows:
+            hashes = [task[0] for task in json.loads(payload or '{}').get('tasks', [])]
+            if len(completed_hashes(self.store, hashes)) == len(hashes):
+                done.append(job_id)
+        self.finish(done, now=now)
+        return done
+
+    def tick(self, now=None):
+        """reap() then schedule(): one step of the scheduler service."""
+        self.reap(now)
+        return self.schedule(now)
+
+    def positions(self, jobs=None):
+        """{job_id: 1-based position} of the queued jobs in the order the next passes would consider them."""
+        jobs = self.active() if jobs is None else jobs
+        is_queued = jobs['status'] == 'queued'
+        queued = _select(jobs, is_queued)
+        _, usage = self.free_capacity(_select(jobs, ~is_queued))
+        return {int(queued['id'][position]): rank for rank, position in enumerate(queue_order(queued, usage, self.totals), 1)}
+
+    def utilization(self, jobs=None):
+        """Fraction of each resource held by running jobs (gpus is 0 when the pool has none)."""
+        jobs = self.active() if jobs is None else jobs
+        free, _ = self.free_capacity(_select(jobs, jobs['status'] == 'running'))
+        used = self.totals - free.sum(axis=0)
+        return dict(zip(RESOURCES, np.divide(used, self.totals, out=np.zeros_like(used), where=self.totals > 0)))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide scheduler over the (seeded) store and the configured worker pool."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(store())
+        return _scheduler
+
+
+
+def serve(scheduler, stop, interval=SERVICE_INTERVAL_S):
+    """The scheduler service loop, until `stop` (a threading.Event) is set: ingests new results, then tick()s.
+
+    Results are ingested first so reap() sees every run that has finished. A
+    failing step is logged and retried on the next one.
+    """
+    while not stop.is_set():
+        try:
+            ingest_results()
+            scheduler.tick()
+        except Exception:
+            logging.getLogger(__name__).exception("Scheduler step failed")
+        stop.wait(interval)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def start_service(interval=SERVICE_INTERVAL_S):
+    """Starts the scheduler service for get_scheduler() in a daemon thread, once per process; returns its stop event."""
+    global _service
+    scheduler = get_scheduler()
+    with _service_lock:
+        if _service is None:
+            _service = threading.Event()
+            threading.Thread(target=serve, args=(scheduler, _service, interval), name='scheduler', daemon=True).start()
+        return _service
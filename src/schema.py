@@ -0,0 +1,121 @@
+import re
+import threading
+
+import pandas as pd
+
+DIFFICULTY = pd.CategoricalDtype(['Easy', 'Medium', 'Hard', 'Insane'], ordered=True)
+
+_SIZE_RE = re.compile(r'^\s*([\d.]+)\s*([KkMmBbGg]?)\s*$')
+_SIZE_UNITS = {'': 1, 'k': 1_000, 'm': 1_000_000, 'b': 1_000_000_000, 'g': 1_000_000_000}
+
+
+def parse_size(value):
+    """'128K' -> 128000, '1M' -> 1000000; numbers pass through, anything unparseable becomes NA."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return pd.NA
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _SIZE_RE.match(str(value))
+    if not match:
+        return pd.NA
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.lower()])
+
+
+def format_size(value):
+    """128000 -> '128K', 1000000 -> '1M'; the inverse of parse_size for display, '—' when missing."""
+    if value is None or value is pd.NA:
+        return '—'
+    for unit, scale in (('B', 1_000_000_000), ('M', 1_000_000), ('K', 1_000)):
+        if value >= scale:
+            return f'{value / scale:g}{unit}'
+    return str(value)
+
+
+# Target dtype per column; columns not listed are left untouched.
+SCHEMAS = {
+    'models': {
+        'id': 'int32',
+        'Country': 'category',
+        'Organization': 'category',
+        'Model': 'category',
+        'License': 'category',
+        'Parameters (B)': 'Float32',
+        'Context': 'Int32',
+        'Input $/M': 'Float64',
+        'Output $/M': 'Float64',
+        'Knowledge Cutoff': 'string',
+        'color': 'string',
+        'is_multimodal': 'boolean',
+        'max_output': 'Int32',
+        'latency_s': 'Float64',
+        'speed_tps': 'Float64',
+        'standard_benchmarks': 'string',
+    },
+    'problems': {
+        'id': 'int32',
+        'slug': 'string',
+        'title': 'string',
+        'statement': 'string',
+        'assets': 'string',
+        'category': 'category',
+        'difficulty': DIFFICULTY,
+        'expected_flag': 'string',
+        'scorer': 'category',
+    },
+    'environments': {
+        'id': 'int32',
+        'name': 'string',
+        'image/tag': 'string',
+        'tools': 'string',
+        'limits': 'string',
+        'digest': 'string',
+    },
+    'runs': {
+        'problem_id': 'int32',
+        'environment_id': 'Int32',
+        'model_id': 'int32',
+        'benchmark_id': 'Int32',
+        'status': 'category',
+        'solved': 'boolean',
+        'ttf': 'Float32',
+        'tokens': 'Int64',
+        'cost': 'Float64',
+        'success_rate': 'Float32',
+        'flag_found': 'string',
+    },
+}
+
+# Parsers applied before the dtype cast.
+CONVERTERS = {
+    'models': {'Context': parse_size, 'max_output': parse_size},
+}
+
+_memory_lock = threading.Lock()
+_memory = {}
+
+
+def apply(frame, name, record=True):
+    """Casts `frame` to the named schema and records its deep memory footprint before and after."""
+    before = int(frame.memory_usage(deep=True).sum()) if record else 0
+    parsed = {
+        col: frame[col].map(parse) for col, parse in CONVERTERS.get(name, {}).items()
+        if col in frame and not pd.api.types.is_numeric_dtype(frame[col])
+    }
+    frame = frame.assign(**parsed).astype({col: dtype for col, dtype in SCHEMAS[name].items() if col in frame})
+    if record:
+        after = int(frame.memory_usage(deep=True).sum())
+        with _memory_lock:
+            _memory[name] = (before, after)
+    return frame
+
+
+def memory_report():
+    """Bytes per frame before and after the schema cast, for the last load of each frame."""
+    with _memory_lock:
+        rows = [
+            {'frame': name, 'before_bytes': before, 'after_bytes': after,
+             'saved_pct': 100.0 * (before - after) / before if before else 0.0}
+            for name, (before, after) in _memory.items()
+        ]
+    return pd.DataFrame(rows, columns=['frame', 'before_bytes', 'after_bytes', 'saved_pct'])
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Create Benchmark's metrics and their default weights, in display order. Every metric is scored in [0, 1],
+# higher is better, so a benchmark score is their weighted mean.
+DEFAULT_WEIGHTS = {
+    'Solve Rate': 1.0, 'Avg Time to Flag': 0.5, 'Token Efficiency': 0.2, 'Cost USD': 0.2, 'First Try Pass': 0.8,
+    'Partial Credit': 0.0,
+}
+METRICS = list(DEFAULT_WEIGHTS)
+AGGREGATIONS = ('macro', 'micro', 'per-category')
+
+# Cell sums (see aggregates.FIELDS) the metrics are derived from; `cells` counts the (model, problem) cells pooled.
+_SUMS = ['count', 'solves', 'success_sum', 'success_n', 'ttf_sum', 'ttf_n', 'tokens', 'cost', 'first_solves', 'cells']
+DEFAULT_WALLCLOCK_SEC = 900
+
+
+def _lower_is_better(values, scale):
+    """1 at zero, 0 at (or past) `scale`."""
+    if not scale or not np.isfinite(scale):
+        return pd.Series(1.0, index=values.index).where(values.notna())
+    return 1.0 - values.clip(lower=0, upper=scale) / scale
+
+
+def scales(cells, limits=None):
+    """Where the lower-is-better metrics bottom out: the benchmark's wallclock and token limits when it sets them,
+    else the worst per-problem average among the scored cells (costs always, having no limit)."""
+    limits = limits or {}
+    count = cells['count'].where(cells['count'] > 0)
+    token_limit = (limits.get('max_tokens_in') or 0) + (limits.get('max_tokens_out') or 0)
+    return {
+        'ttf': float(limits.get('wallclock_sec') or DEFAULT_WALLCLOCK_SEC),
+        'tokens': float(token_limit) if token_limit else float((cells['tokens'] / count).max()),
+        'cost': float((cells['cost'] / count).max()),
+    }
+
+
+def metric_scores(sums, scale):
+    """Every metric's [0, 1] score for rows of cell sums (single cells, or cells pooled per model or group)."""
+    count = sums['count'].where(sums['count'] > 0)
+    solve_rate = sums['solves'] / count
+    ttf = sums['ttf_sum'] / sums['ttf_n'].where(sums['ttf_n'] > 0)
+    # success_rate is a percentage; runs that record none fall back to solved / not solved.
+    partial = (sums['success_sum'] / sums['success_n'].where(sums['success_n'] > 0) / 100.0).clip(0, 1)
+    return pd.DataFrame({
+        'Solve Rate': solve_rate,
+        # Never solving means never reaching the flag: the worst time score.
+        'Avg Time to Flag': _lower_is_better(ttf, scale['ttf']).fillna(0.0),
+        'Token Efficiency': _lower_is_better(sums['tokens'] / count, scale['tokens']),
+        'Cost USD': _lower_is_better(sums['cost'] / count, scale['cost']),
+        'First Try Pass': sums['first_solves'] / sums['cells'].where(sums['cells'] > 0),
+        'Partial Credit': partial.fillna(solve_rate),
+    }, index=sums.index)
+
+
+def benchmark_scores(cells, weights=None, aggregation='macro', problem_groups=None, limits=None):
+    """Weighted benchmark score per model, for all models at once from the model x problem cells.
+
+    macro averages each metric over problems (every problem counts the
+    same), micro pools the runs of all problems first (problems with more
+    reruns count more), and per-category macro-averages within each
+    category of `problem_groups` (problem_id -> category), then averages
+    the categories. Returns one row per (group, model_id) with every
+    metric, the weighted `score` and `rank`; group is 'All', plus one group
+    per category under per-category.
+    """
+    weights = {name: float(w) for name, w in (DEFAULT_WEIGHTS if weights is None else weights).items() if name in METRICS and w}
+    columns = ['group', 'model_id', *METRICS, 'score', 'rank', 'problems', 'runs']
+    cells = cells[cells['count'] > 0].assign(cells=1.0)
+    if cells.empty or not weights:
+        return pd.DataFrame(columns=columns)
+    scale = scales(cells, limits)
+    if aggregation == 'micro':
+        pooled = cells.groupby('model_id')[_SUMS].sum()
+        table = metric_scores(pooled, scale).join(pooled[['cells', 'count']]).reset_index().assign(group='All')
+    else:
+        per_cell = metric_scores(cells, scale).assign(model_id=cells['model_id'].to_numpy(), runs=cells['count'], problems=1)
+        if aggregation == 'per-category' and problem_groups is not None:
+            per_cell['group'] = cells['problem_id'].map(problem_groups).astype(object).fillna('Uncategorized')
+            by_group = per_cell.groupby(['group', 'model_id']).agg({**{m: 'mean' for m in METRICS}, 'problems': 'sum', 'runs': 'sum'})
+            overall = by_group.groupby('model_id').agg({**{m: 'mean' for m in METRICS}, 'problems': 'sum', 'runs': 'sum'})
+            table = pd.concat([overall.reset_index().assign(group='All'), by_group.reset_index()], ignore_index=True)
+        else:
+            table = per_cell.groupby('model_id').agg({**{m: 'mean' for m in METRICS}, 'problems': 'sum', 'runs': 'sum'})
+            table = table.reset_index().assign(group='All')
+        table = table.rename(columns={'problems': 'cells', 'runs': 'count'})
+    w = np.array([weights.get(name, 0.0) for name in METRICS])
+    table['score'] = table[METRICS].fillna(0.0).to_numpy() @ w / w.sum()
+    table['rank'] = table.groupby('group')['score'].rank(ascending=False, method='min').astype('int64')
+    table = table.rename(columns={'cells': 'problems', 'count': 'runs'}).astype({'problems': 'int64', 'runs': 'int64'})
+    order = table['group'].ne('All').astype(int)
+    return table.assign(_order=order).sort_values(['_order', 'group', 'rank'])[columns].reset_index(drop=True)
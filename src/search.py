@@ -0,0 +1,75 @@
+import re
+
+import pandas as pd
+
+from src.store import get_store
+
+# BM25 weight of each indexed column, in runs_fts column order: a hit in flag_found or an artifact name
+# says more about a run than one more mention somewhere in a long transcript.
+COLUMN_WEIGHTS = {'logs': 1.0, 'artifacts': 2.0, 'flag_found': 5.0}
+
+SNIPPET_TOKENS = 16
+HIGHLIGHT = ('«', '»')
+
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w+')
+
+
+def match_expression(text):
+    """FTS5 MATCH expression for a free-text query, or None when it has no searchable words.
+
+    Every whitespace-separated term (or "quoted phrase") must match. A term
+    is split the way the index tokenizes, so `__libc_start_main`, `/bin/sh`
+    or `flag{h3x}` become phrases of their parts; a trailing `*` makes the
+    last part a prefix (`deadbe*`). FTS5 operators are never passed through,
+    so no input can produce a syntax error.
+    """
+    phrases = []
+    for quoted, bare in _TERM_RE.findall(text or ''):
+        term = quoted or bare
+        words = _WORD_RE.findall(term)
+        if words:
+            prefix = ' *' if term.endswith('*') and not quoted else ''
+            phrases.append('"' + ' '.join(words) + '"' + prefix)
+    return ' '.join(phrases) or None
+
+
+def search_runs(text, k=20, model_id=None, problem_id=None, store=None):
+    """Top-k runs for a query by BM25 over logs, artifacts and flag_found, each with a highlighted snippet.
+
+    FTS5 walks only the posting lists of the query terms and scores every
+    matching run, so the k returned are the true top k however old they
+    are; snippets are built for those k runs alone.
+    """
+    columns = ['id', 'problem_id', 'model_id', 'status', 'score', 'snippet']
+    expression = match_expression(text)
+    if expression is None:
+        return pd.DataFrame(columns=columns)
+    conn = (store or get_store()).connection()
+    where, params = 'runs_fts MATCH ?', [expression]
+    if model_id is not None:
+        where += ' AND r.model_id = ?'
+        params.append(model_id)
+    if problem_id is not None:
+        where += ' AND r.problem_id = ?'
+        params.append(problem_id)
+    source = 'FROM runs_fts JOIN runs r ON r.id = runs_fts.rowid'
+    rank = f"runs_fts.rank MATCH 'bm25({', '.join(str(weight) for weight in COLUMN_WEIGHTS.values())})'"
+    # The inner query ranks every match but carries only rowids; snippets are made for the k it keeps.
+    rows = conn.execute(
+        f"SELECT r.id, r.problem_id, r.model_id, r.status, -runs_fts.rank, "
+        f"snippet(runs_fts, -1, ?, ?, '…', {SNIPPET_TOKENS}) {source} "
+        f"WHERE runs_fts MATCH ? AND {rank} AND runs_fts.rowid IN "
+        f"(SELECT runs_fts.rowid {source} WHERE {where} AND {rank} ORDER BY runs_fts.rank LIMIT ?) "
+        f"ORDER BY runs_fts.rank",
+        [*HIGHLIGHT, expression, *params, int(k)],
+    ).fetchall()
+    return pd.DataFrame(rows, columns=columns)
+
+
+def index_stats(store=None):
+    """Indexed runs and the on-disk size of the index's postings, in bytes."""
+    conn = (store or get_store()).connection()
+    runs, = conn.execute('SELECT COUNT(*) FROM runs').fetchone()
+    size, = conn.execute('SELECT COALESCE(SUM(LENGTH(block)), 0) FROM runs_fts_data').fetchone()
+    return {'runs': runs, 'index_bytes': size}
@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.leaderboard import _dense, bootstrap_weights
+
+# Below this many discordant problems McNemar uses the exact binomial test, above it the continuity-corrected chi-square.
+EXACT_MAX = 25
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def _exact_table(n_max):
+    """[n, k] -> two-sided exact binomial p-value of k or fewer successes out of n at p = 0.5."""
+    table = np.ones((n_max + 1, n_max + 1))
+    for n in range(1, n_max + 1):
+        cdf = np.cumsum([math.comb(n, k) for k in range(n + 1)]) / 2 ** n
+        table[n, :n + 1] = np.minimum(1.0, 2 * cdf)
+    return table
+
+
+def mcnemar(b, c):
+    """Two-sided McNemar p-values for arrays of discordant counts (b: only A solved, c: only B solved)."""
+    b = np.asarray(b, dtype='int64')
+    c = np.asarray(c, dtype='int64')
+    n = b + c
+    low = np.minimum(b, c)
+    exact = _exact_table(EXACT_MAX)[np.minimum(n, EXACT_MAX), np.minimum(low, EXACT_MAX)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        chi2 = np.maximum(np.abs(b - c) - 1, 0) ** 2 / n
+    approx = _erfc(np.sqrt(np.nan_to_num(chi2) / 2)).astype('float64')
+    return np.where(n <= EXACT_MAX, exact, approx)
+
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values for a 1-D array."""
+    p_values = np.asarray(p_values, dtype='float64')
+    m = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.maximum.accumulate(np.minimum(1.0, (m - np.arange(m)) * p_values[order]))
+    out = np.empty(m)
+    out[order] = adjusted
+    return out
+
+
+def _paired_replicates(weights, rate, observed, i, j, chunk):
+    """(B, pairs) bootstrap replicates of the mean rate difference of models i[k] and j[k] over their shared problems.
+
+    Each pair's per-problem difference and shared mask are rows of a
+    (pairs x P) matrix, so every replicate of every pair comes out of two
+    GEMMs with the (B x P) weights; pairs are processed in chunks to bound
+    memory at chunk x P.
+    """
+    replicates = np.empty((weights.shape[0], len(i)))
+    for start in range(0, len(i), chunk):
+        a, b = i[start:start + chunk], j[start:start + chunk]
+        diff = rate[a] * observed[b] - rate[b] * observed[a]
+        shared = observed[a] * observed[b]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            replicates[:, start:start + chunk] = (weights @ diff.T) / (weights @ shared.T)
+    return replicates
+
+
+def pairwise_significance(cells, n_boot=1000, alpha=0.05, seed=0, chunk=2048):
+    """McNemar tests and paired-bootstrap solve-rate deltas for every pair of models, on the problems both attempted.
+
+    `cells` holds per-(model, problem) run counts and solves. McNemar works on
+    the binarized outcome (a problem counts as solved when at least half its
+    reruns were); the bootstrap resamples shared problems and reports the mean
+    difference of per-problem solve rates (A minus B) with a percentile CI.
+    All pairs are handled at once: the discordant counts are a single matmul
+    and the bootstrap replicates of every pair come from two GEMMs.
+    """
+    columns = ['model_a', 'model_b', 'shared', 'only_a', 'only_b', 'p_mcnemar', 'p_holm',
+               'delta', 'ci_low', 'ci_high', 'p_boot']
+    if cells is None or not len(cells):
+        return pd.DataFrame(columns=columns)
+    model_ids, _, count, solves = _dense(cells)
+    observed = (count > 0).astype('float64')
+    rate = np.divide(solves, count, out=np.zeros_like(solves), where=count > 0)
+    solved = (rate >= 0.5).astype('float64') * observed
+    failed = observed - solved
+
+    shared = observed @ observed.T
+    only_a = solved @ failed.T
+    i, j = np.triu_indices(len(model_ids), k=1)
+    p_mcnemar = mcnemar(only_a[i, j], only_a[j, i])
+
+    # Mean over shared problems of r_a - r_b is (sum r_a o_b - sum r_b o_a) / sum o_a o_b.
+    rate_shared = rate @ observed.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = (rate_shared[i, j] - rate_shared[j, i]) / shared[i, j]
+    rng = np.random.default_rng(seed)
+    replicates = _paired_replicates(bootstrap_weights(count.shape[1], n_boot, rng), rate, observed, i, j, chunk)
+    has_shared = shared[i, j] > 0
+    low = np.full(len(i), np.nan)
+    high = np.full(len(i), np.nan)
+    p_boot = np.full(len(i), np.nan)
+    if has_shared.any():
+        kept = replicates[:, has_shared]
+        low[has_shared], high[has_shared] = np.nanquantile(kept, [alpha / 2, 1 - alpha / 2], axis=0)
+        valid = np.maximum((~np.isnan(kept)).sum(axis=0), 1)
+        p_boot[has_shared] = np.minimum(1.0, 2 * np.minimum((kept <= 0).sum(axis=0), (kept >= 0).sum(axis=0)) / valid)
+
+    return pd.DataFrame({
+        'model_a': model_ids[i],
+        'model_b': model_ids[j],
+        'shared': shared[i, j].astype('int64'),
+        'only_a': only_a[i, j].astype('int64'),
+        'only_b': only_a[j, i].astype('int64'),
+        'p_mcnemar': p_mcnemar,
+        'p_holm': holm(p_mcnemar),
+        'delta': delta,
+        'ci_low': low,
+        'ci_high': high,
+        'p_boot': p_boot,
+    })[columns]
+
+
+def square(pairs, value, model_ids, antisymmetric=False):
+    """Model x model matrix of one pairwise column (for heatmaps); the lower triangle mirrors the upper one."""
+    upper = pairs.pivot(index='model_a', columns='model_b', values=value)
+    lower = pairs.pivot(index='model_b', columns='model_a', values=value)
+    if antisymmetric:
+        lower = -lower
+    return upper.combine_first(lower).reindex(index=model_ids, columns=model_ids)
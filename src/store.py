@@ -0,0 +1,441 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from src.run_store import DATA_DIR
+
+DB_PATH = os.path.join(DATA_DIR, 'aubctf.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    organization TEXT,
+    country TEXT,
+    license TEXT,
+    parameters_b REAL,
+    context TEXT,
+    input_price_pm REAL,
+    output_price_pm REAL,
+    knowledge_cutoff TEXT,
+    color TEXT,
+    is_multimodal INTEGER,
+    max_output TEXT,
+    latency_s REAL,
+    speed_tps REAL,
+    standard_benchmarks TEXT
+);
+CREATE TABLE IF NOT EXISTS problems (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    title TEXT NOT NULL,
+    statement TEXT,
+    assets TEXT,
+    category TEXT,
+    difficulty TEXT,
+    expected_flag TEXT,
+    scorer TEXT,
+    points INTEGER,
+    tags TEXT,
+    collection TEXT,
+    payload TEXT,
+    created_at REAL,
+    sample_key INTEGER
+);
+CREATE TABLE IF NOT EXISTS environments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    image TEXT,
+    tools TEXT,
+    limits TEXT,
+    digest TEXT
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL,
+    name TEXT NOT NULL,
+    spec TEXT,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    problem_id INTEGER NOT NULL,
+    environment_id INTEGER,
+    model_id INTEGER NOT NULL,
+    benchmark_id INTEGER,
+    status TEXT,
+    solved INTEGER,
+    ttf REAL,
+    tokens INTEGER,
+    cost REAL,
+    params TEXT,
+    success_rate REAL,
+    artifacts TEXT,
+    logs TEXT,
+    flag_found TEXT,
+    timestamps TEXT,
+    task_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    benchmark_id INTEGER,
+    model_id INTEGER,
+    user TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT,
+    created_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    cpu INTEGER,
+    memory_gb REAL,
+    disk_gb REAL,
+    gpu TEXT,
+    worker TEXT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    id INTEGER PRIMARY KEY,
+    problem_id INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    name TEXT,
+    role TEXT
+);
+CREATE TABLE IF NOT EXISTS minhashes (
+    problem_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    PRIMARY KEY (problem_id, kind)
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    kind TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    problem_id INTEGER NOT NULL,
+    PRIMARY KEY (kind, band, bucket, problem_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    source TEXT PRIMARY KEY,
+    inode INTEGER,
+    offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generations (
+    source TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_problems_slug ON problems(slug);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_benchmarks_slug ON benchmarks(slug);
+CREATE INDEX IF NOT EXISTS idx_problems_category ON problems(category);
+CREATE INDEX IF NOT EXISTS idx_problems_difficulty ON problems(difficulty);
+CREATE INDEX IF NOT EXISTS idx_problems_title ON problems(title);
+CREATE INDEX IF NOT EXISTS idx_runs_problem ON runs(problem_id);
+CREATE INDEX IF NOT EXISTS idx_runs_model ON runs(model_id);
+CREATE INDEX IF NOT EXISTS idx_runs_environment ON runs(environment_id);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_runs_benchmark ON runs(benchmark_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE INDEX IF NOT EXISTS idx_environments_digest ON environments(digest);
+CREATE INDEX IF NOT EXISTS idx_attachments_problem ON attachments(problem_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256);
+CREATE INDEX IF NOT EXISTS idx_blobs_refcount ON blobs(refcount);
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_problem ON lsh_buckets(problem_id);
+
+-- Full-text index over run outputs. External content: the text lives only in runs, the index holds postings.
+-- unicode61 splits on punctuation, so snake_case and paths index their parts while hex literals stay whole tokens.
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+    logs, artifacts, flag_found,
+    content='runs', content_rowid='id', tokenize="unicode61 remove_diacritics 0", prefix='3'
+);
+CREATE TRIGGER IF NOT EXISTS runs_fts_insert AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts(rowid, logs, artifacts, flag_found) VALUES (new.id, new.logs, new.artifacts, new.flag_found);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_fts_delete AFTER DELETE ON runs BEGIN
+    INSERT INTO runs_fts(runs_fts, rowid, logs, artifacts, flag_found)
+    VALUES ('delete', old.id, old.logs, old.artifacts, old.flag_found);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_fts_update AFTER UPDATE OF logs, artifacts, flag_found ON runs BEGIN
+    INSERT INTO runs_fts(runs_fts, rowid, logs, artifacts, flag_found)
+    VALUES ('delete', old.id, old.logs, old.artifacts, old.flag_found);
+    INSERT INTO runs_fts(rowid, logs, artifacts, flag_found) VALUES (new.id, new.logs, new.artifacts, new.flag_found);
+END;
+"""
+
+TABLES = ('models', 'problems', 'environments', 'benchmarks', 'runs', 'jobs', 'blobs', 'attachments')
+
+# Columns added after a table was first created; databases from older versions get them via ALTER TABLE.
+MIGRATIONS = [
+    ('models', 'color', 'TEXT'),
+    ('models', 'is_multimodal', 'INTEGER'),
+    ('models', 'max_output', 'TEXT'),
+    ('models', 'latency_s', 'REAL'),
+    ('models', 'speed_tps', 'REAL'),
+    ('models', 'standard_benchmarks', 'TEXT'),
+    ('problems', 'sample_key', 'INTEGER'),
+    ('runs', 'task_hash', 'TEXT'),
+    ('runs', 'completed_at', 'REAL'),
+    ('jobs', 'cpu', 'INTEGER'),
+    ('jobs', 'memory_gb', 'REAL'),
+    ('jobs', 'disk_gb', 'REAL'),
+    ('jobs', 'gpu', 'TEXT'),
+    ('jobs', 'worker', 'TEXT'),
+]
+
+# Indexes over migrated columns, created once MIGRATIONS has run.
+MIGRATED_SCHEMA = """
+-- Covers the dataset resolver's per-stratum sampling query (id is the rowid), so it never reads statement or payload pages.
+CREATE INDEX IF NOT EXISTS idx_problems_sample ON problems(category, difficulty, sample_key, slug);
+CREATE INDEX IF NOT EXISTS idx_problems_unkeyed ON problems(id) WHERE sample_key IS NULL;
+-- Finds the stored result of a compiled benchmark task (see plans.py).
+CREATE INDEX IF NOT EXISTS idx_runs_task_hash ON runs(task_hash) WHERE task_hash IS NOT NULL;
+"""
+
+
+class Store:
+    """Embedded SQLite store shared by the whole app; one connection per thread, WAL journaling.
+
+    Every write bumps a per-table generation counter in the same transaction,
+    which is what the data cache uses as its source version.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._columns = {}
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self.connection() as conn:
+            indexed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'runs_fts'").fetchone()
+            conn.executescript(SCHEMA)
+            if not indexed:
+                # Databases from before the search index: index the runs they already hold, once.
+                conn.execute("INSERT INTO runs_fts(runs_fts) VALUES ('rebuild')")
+            for table, column, decl in MIGRATIONS:
+                existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {decl}')
+            conn.executescript(MIGRATED_SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def columns(self, table):
+        if table not in self._columns:
+            if table not in TABLES:
+                raise ValueError(f"Unknown table: {table}")
+            rows = self.connection().execute(f'PRAGMA table_info({table})').fetchall()
+            self._columns[table] = [row[1] for row in rows]
+        return self._columns[table]
+
+    def generation(self, *sources):
+        """Current generation counter of each source, as a tuple usable in a cache key."""
+        rows = dict(self.connection().execute('SELECT source, generation FROM generations').fetchall())
+        return tuple(rows.get(source, 0) for source in sources)
+
+    def _bump(self, conn, *sources):
+        conn.executemany(
+            'INSERT INTO generations(source, generation) VALUES (?, 1) '
+            'ON CONFLICT(source) DO UPDATE SET generation = generation + 1',
+            [(source,) for source in sources],
+        )
+
+    def bump(self, *sources):
+        with self.connection() as conn:
+            self._bump(conn, *sources)
+
+    def is_empty(self):
+        return self.connection().execute('SELECT NOT EXISTS (SELECT 1 FROM problems)').fetchone()[0] == 1
+
+    def insert_rows(self, table, rows):
+        """Inserts dict rows (keys must be table columns; missing keys become NULL) and bumps the table's generation."""
+        rows = list(rows)
+        if not rows:
+            return []
+        keys = list(dict.fromkeys(key for row in rows for key in row))
+        self._check_columns(table, keys)
+        sql = f'INSERT INTO {table} ({", ".join(keys)}) VALUES ({", ".join("?" for _ in keys)})'
+        with self.connection() as conn:
+            ids = [conn.execute(sql, [row.get(key) for key in keys]).lastrowid for row in rows]
+            self._bump(conn, table)
+        return ids
+
+    def checkpoint(self, source):
+        """(inode, byte offset) recorded for an ingest source, or (None, 0) if it was never read."""
+        row = self.connection().execute(
+            'SELECT inode, offset FROM ingest_checkpoints WHERE source = ?', (source,)
+        ).fetchone()
+        return tuple(row) if row else (None, 0)
+
+    def append_runs(self, rows, source, inode, offset):
+        """Inserts ingested runs and advances the source checkpoint in one transaction, so a crash never double-ingests."""
+        keys = list(rows[0]) if rows else []
+        self._check_columns('runs', keys)
+        sql = f'INSERT INTO runs ({", ".join(keys)}) VALUES ({", ".join("?" for _ in keys)})'
+        with self.connection() as conn:
+            ids = [conn.execute(sql, [row.get(key) for key in keys]).lastrowid for row in rows]
+            conn.execute(
+                'INSERT INTO ingest_checkpoints(source, inode, offset) VALUES (?, ?, ?) '
+                'ON CONFLICT(source) DO UPDATE SET inode = excluded.inode, offset = excluded.offset',
+                (source, inode, offset),
+            )
+            if rows:
+                self._bump(conn, 'runs')
+        return ids
+
+    def delete_rows(self, table, ids):
+        ids = list(ids)
+        with self.connection() as conn:
+            conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(row_id,) for row_id in ids])
+            self._bump(conn, table)
+
+    def update_rows(self, table, ids, **values):
+        self._check_columns(table, values)
+        assignments = ', '.join(f'{key} = ?' for key in values)
+        with self.connection() as conn:
+            conn.executemany(
+                f'UPDATE {table} SET {assignments} WHERE id = ?',
+                [(*values.values(), row_id) for row_id in ids],
+            )
+            self._bump(conn, table)
+
+    def update_columns(self, table, ids, **columns):
+        """Per-row update: each keyword is a sequence aligned with `ids`. One transaction, one generation bump."""
+        self._check_columns(table, columns)
+        assignments = ', '.join(f'{key} = ?' for key in columns)
+        with self.connection() as conn:
+            conn.executemany(f'UPDATE {table} SET {assignments} WHERE id = ?', zip(*columns.values(), ids))
+            self._bump(conn, table)
+
+    def _check_columns(self, table, names):
+        unknown = set(names) - set(self.columns(table))
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table}: {sorted(unknown)}")
+
+    def _where(self, table, filters, search=None):
+        """WHERE clause for equality / IN `filters`, plus an optional (text, columns) substring `search`."""
+        clauses, params = [], []
+        for col, value in (filters or {}).items():
+            self._check_columns(table, [col])
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                if not value:
+                    clauses.append('0')
+                    continue
+                clauses.append(f'{col} IN ({", ".join("?" for _ in value)})')
+                params.extend(value)
+            else:
+                clauses.append(f'{col} = ?')
+                params.append(value)
+        text, search_columns = search or (None, ())
+        if text and search_columns:
+            self._check_columns(table, search_columns)
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append('(' + ' OR '.join(f"{col} LIKE ? ESCAPE '\\'" for col in search_columns) + ')')
+            params.extend([pattern] * len(search_columns))
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _select(self, table, filters, columns, order_by, descending, limit, offset, search):
+        columns = columns or self.columns(table)
+        self._check_columns(table, [*columns, order_by])
+        where, params = self._where(table, filters, search)
+        direction = 'DESC' if descending else 'ASC'
+        # id breaks ties so pages stay disjoint when sorting on a non-unique column.
+        order = f'{order_by} {direction}' if order_by == 'id' else f'{order_by} {direction}, id {direction}'
+        sql = f'SELECT {", ".join(columns)} FROM {table}{where} ORDER BY {order}'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [int(limit), int(offset)]
+        return columns, sql, params
+
+    def query(self, table, filters=None, columns=None, order_by='id', descending=False, limit=None, offset=0, search=None):
+        """Filtered, ordered, paginated read; only the requested window is materialized."""
+        _, sql, params = self._select(table, filters, columns, order_by, descending, limit, offset, search)
+        return pd.read_sql_query(sql, self.connection(), params=params)
+
+    def query_arrow(self, table, filters=None, columns=None, order_by='id', descending=False, limit=None, offset=0, search=None):
+        """Same window as query(), as a pyarrow Table built column-wise from the cursor with no DataFrame in between."""
+        columns, sql, params = self._select(table, filters, columns, order_by, descending, limit, offset, search)
+        rows = self.connection().execute(sql, params).fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        return pa.table({col: pa.array(vals) for col, vals in zip(columns, values)})
+
+    def count(self, table, filters=None, search=None):
+        where, params = self._where(table, filters, search)
+        return self.connection().execute(f'SELECT COUNT(*) FROM {table}{where}', params).fetchone()[0]
+
+    def group_counts(self, table, by, filters=None):
+        """Row count per distinct combination of the `by` columns; an index on them lets SQLite count from the index alone."""
+        by = list(by)
+        if not by:
+            return pd.DataFrame({'count': [self.count(table, filters)]})
+        self._check_columns(table, by)
+        where, params = self._where(table, filters)
+        cols = ', '.join(by)
+        return pd.read_sql_query(
+            f'SELECT {cols}, COUNT(*) AS count FROM {table}{where} GROUP BY {cols} ORDER BY {cols}', self.connection(), params=params)
+
+    def distinct(self, table, column):
+        self._check_columns(table, [column])
+        rows = self.connection().execute(
+            f'SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column}'
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def add_problem(self, payload):
+        """Persists a validated Add CTF payload; raises sqlite3.IntegrityError on a duplicate slug."""
+        basics, problem, evaluation = payload['basics'], payload['problem'], payload['evaluation']
+        flag_config = problem['flag_config']
+        expected_flag = flag_config.get('value') or flag_config.get('regex') or '\n'.join(flag_config.get('list') or [])
+        return self.insert_rows('problems', [{
+            'slug': basics['slug'],
+            'title': basics['title'],
+            'statement': problem['statement_md'],
+            'assets': ', '.join(item['name'] for item in payload.get('attachments', [])) or None,
+            'category': basics['category'],
+            'difficulty': basics['difficulty'],
+            'expected_flag': expected_flag,
+            'scorer': evaluation['scorer'],
+            'points': basics['points'],
+            'tags': json.dumps(basics['tags']),
+            'collection': basics['collection'],
+            'payload': json.dumps(payload),
+            'created_at': time.time(),
+        }])[0]
+
+    def add_benchmark(self, slug, payload):
+        return self.insert_rows('benchmarks', [{
+            'slug': slug,
+            'name': payload['name'],
+            'spec': json.dumps(payload),
+            'created_at': time.time(),
+        }])[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store at DB_PATH, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = Store()
+        return _store
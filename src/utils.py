@@ -1,5 +1,16 @@
 import base64
+import re
+
+
 def get_image_as_base64(path):
     with open(path, "rb") as f:
         data = f.read()
     return base64.b64encode(data).decode()
+
+
+def simple_slugify(text):
+    """A simple, dependency-free slugify function."""
+    text = text.lower()
+    text = re.sub(r'[\s_]+', '-', text)
+    text = re.sub(r'[^a-z0-9-]', '', text)
+    return text.strip('-')
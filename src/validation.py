@@ -0,0 +1,124 @@
+import json
+import re
+
+from src.utils import simple_slugify
+
+SLUG_RE = re.compile(r'^[a-z0-9-]+$')
+FLAG_TYPES = ('Static', 'Regex', 'Dynamic', 'Multiple')
+DEFAULT_SCORE_WEIGHTS = '{"flag":1.0}'
+
+# Manifest sections that must be JSON objects when present.
+MANIFEST_SECTIONS = ('basics', 'problem', 'evaluation', 'provenance')
+
+
+def validate_payload(payload):
+    """Errors for a CTF payload (the add_ctf shape: basics / problem / evaluation); empty when it is valid.
+
+    Shared by the single Add CTF form and the bulk importer, so both accept
+    exactly the same challenges. Pure and picklable, so it can run in a
+    process pool.
+    """
+    errors = []
+    basics = payload.get('basics') or {}
+    problem = payload.get('problem') or {}
+    evaluation = payload.get('evaluation') or {}
+    for name, section in (('basics', basics), ('problem', problem), ('evaluation', evaluation)):
+        if not isinstance(section, dict):
+            errors.append(f"{name} must be an object.")
+    if errors:
+        return errors
+    flag_config = problem.get('flag_config') or {}
+    if not isinstance(flag_config, dict):
+        return errors + ["flag_config must be an object."]
+    for section, key in ((basics, 'title'), (basics, 'slug'), (basics, 'category'), (basics, 'difficulty'), (basics, 'collection'),
+                         (problem, 'statement_md'), (flag_config, 'value'), (flag_config, 'regex'), (evaluation, 'scorer')):
+        if section.get(key) is not None and not isinstance(section[key], str):
+            errors.append(f"{key} must be a string.")
+    if basics.get('points') is not None and (isinstance(basics['points'], bool) or not isinstance(basics['points'], (int, float))):
+        errors.append("points must be a number.")
+    if not isinstance(basics.get('tags') or [], list):
+        errors.append("tags must be a list.")
+    if errors:
+        return errors
+
+    slug = basics.get('slug') or ''
+    if not basics.get('title'): errors.append("Title is required.")
+    if not slug: errors.append("Slug is required.")
+    if not SLUG_RE.match(slug): errors.append("Slug contains invalid characters.")
+    if not problem.get('statement_md'): errors.append("Statement is required.")
+
+    flag_type = flag_config.get('type')
+    flag_list = flag_config.get('list') or []
+    if flag_type not in FLAG_TYPES: errors.append(f"Unknown flag type: {flag_type!r}.")
+    if flag_type == "Static" and not flag_config.get('value'): errors.append("Flag Value is required for Static flag type.")
+    if flag_type == "Regex" and not flag_config.get('regex'): errors.append("Flag Regex is required for Regex flag type.")
+    if flag_type == "Regex" and flag_config.get('regex'):
+        try:
+            re.compile(flag_config['regex'])
+        except re.error as exc:
+            errors.append(f"Flag Regex does not compile: {exc}.")
+    if not isinstance(flag_list, list) or not all(isinstance(line, str) for line in flag_list):
+        errors.append("Flag List must be a list of strings.")
+    elif flag_type == "Multiple" and not any(line.strip() for line in flag_list):
+        errors.append("Flag List is required for Multiple flag type.")
+
+    weights = evaluation.get('score_weights_json') or ''
+    if not isinstance(weights, str):
+        return errors + ["Score weights must be a JSON string."]
+    try:
+        json.loads(weights)
+    except json.JSONDecodeError:
+        errors.append("Score weights is not valid JSON.")
+    return errors
+
+
+def manifest_errors(manifest):
+    """Structural errors of a bulk-import manifest that normalize_manifest cannot fill in (sections of the wrong type)."""
+    if not isinstance(manifest, dict):
+        return ["manifest must be a JSON object."]
+    errors = [f"{name} must be an object." for name in MANIFEST_SECTIONS
+              if manifest.get(name) is not None and not isinstance(manifest[name], dict)]
+    problem = manifest.get('problem')
+    if isinstance(problem, dict) and problem.get('flag_config') is not None and not isinstance(problem['flag_config'], dict):
+        errors.append("flag_config must be an object.")
+    return errors
+
+
+def normalize_manifest(manifest):
+    """Fills a bulk-import manifest out to a full payload with the Add CTF form's defaults.
+
+    Manifests use the payload layout; anything omitted takes the value the
+    form would start with, and a missing slug is derived from the title.
+    Attachments are filled in by the importer from the archive itself.
+    Check manifest_errors() first: sections must already be objects.
+    """
+    basics = dict(manifest.get('basics') or {})
+    problem = dict(manifest.get('problem') or {})
+    evaluation = dict(manifest.get('evaluation') or {})
+    flag_config = {
+        'type': 'Static', 'value': None, 'regex': None, 'list': [], 'case_sensitive': True,
+        'strip_whitespace': True, 'max_submissions': 0, 'partial_scoring': False,
+        **(problem.get('flag_config') or {}),
+    }
+    if isinstance(flag_config['list'], str):
+        flag_config['list'] = flag_config['list'].splitlines()
+    weights = evaluation.get('score_weights_json', DEFAULT_SCORE_WEIGHTS)
+    return {
+        'basics': {
+            'title': basics.get('title'),
+            'slug': basics.get('slug') or (simple_slugify(basics['title']) if isinstance(basics.get('title'), str) else None),
+            'category': basics.get('category'),
+            'difficulty': basics.get('difficulty', 'Easy'),
+            'points': basics.get('points', 100),
+            'tags': basics.get('tags', []),
+            'collection': basics.get('collection'),
+        },
+        'problem': {'statement_md': problem.get('statement_md'), 'flag_config': flag_config},
+        'attachments': [],
+        'evaluation': {
+            'scorer': evaluation.get('scorer', 'exact_match'),
+            'expected_outputs_json': evaluation.get('expected_outputs_json', ''),
+            'score_weights_json': weights if isinstance(weights, str) else json.dumps(weights),
+        },
+        'provenance': dict(manifest.get('provenance') or {}),
+    }
@@ -1,15 +1,13 @@
 import streamlit as st
 import pandas as pd
-import re
-import json
-import hashlib
-
-def simple_slugify(text):
-    """A simple, dependency-free slugify function."""
-    text = text.lower()
-    text = re.sub(r'[\s_]+', '-', text)
-    text = re.sub(r'[^a-z0-9-]', '', text)
-    return text.strip('-')
+import sqlite3
+from src.blobs import get_blob_store
+from src.bulk_import import discard_problem
+from src.data import store
+from src.dedupe import get_dedupe_index
+from src.hashing import hash_files
+from src.utils import simple_slugify
+from src.validation import validate_payload
 
 def render():
     """Renders a more complete and functional UI for adding a single CTF challenge."""
@@ -28,6 +26,8 @@ def render():
         st.session_state.ctf_title_prev = ""
     if 'ctf_notes_admin' not in st.session_state:
         st.session_state.ctf_notes_admin = ""
+    if 'ctf_file_digests' not in st.session_state:
+        st.session_state.ctf_file_digests = {}
 
     st.header("Add CTF Challenge")
 
@@ -82,7 +82,7 @@ def render():
 
         if st.button("+ Add hint", key="ctf_hint_add"):
             st.session_state.ctf_hints.append({}) # Add a placeholder for a new hint
-            st.rerun()
+            st.rerun(scope="fragment")
 
     with st.expander("Attachments"):
         uploaded_files = st.file_uploader(
@@ -91,18 +91,27 @@ def render():
             type=["png","jpg","jpeg","webp","gif","txt","md","pdf","pcap","zip","tar","gz","xz","bin","exe","html","js","wasm","wav","mp3","mp4"],
             key="ctf_files"
         )
+        digests = st.session_state.ctf_file_digests
         if uploaded_files:
+            # Each upload is hashed once per session; later reruns only read the memo.
+            new_files = [f for f in uploaded_files if f.file_id not in digests]
+            if new_files:
+                with st.spinner(f"Hashing {len(new_files)} file(s)..."):
+                    digests.update(zip((f.file_id for f in new_files), hash_files(new_files)))
             for uploaded_file in uploaded_files:
-                file_bytes = uploaded_file.getvalue()
-                sha256_hash = hashlib.sha256(file_bytes).hexdigest()
+                sha256_hash = digests[uploaded_file.file_id]
                 col1, col2, col3 = st.columns([3, 2, 3])
                 with col1:
                     st.text(uploaded_file.name)
                 with col2:
-                    st.selectbox("Role", mock_attachment_roles, key=f"ctf_role_{uploaded_file.id}")
+                    st.selectbox("Role", mock_attachment_roles, key=f"ctf_role_{uploaded_file.file_id}")
                 with col3:
-                    st.caption(f"Size: {round(len(file_bytes) / 1024, 2)} KB")
+                    st.caption(f"Size: {round(uploaded_file.size / 1024, 2)} KB")
                     st.caption(f"SHA-256: {sha256_hash[:16]}...")
+        # Forget digests of files that were removed from the uploader.
+        current = {f.file_id for f in uploaded_files or []}
+        for file_id in [file_id for file_id in digests if file_id not in current]:
+            del digests[file_id]
 
     with st.expander("Evaluation"):
         st.info("The Flag defines *what* the correct answer is (e.g., a specific string or regex). The Scorer defines *how* a submission is evaluated against that flag (e.g., exact match, judge program).")
@@ -124,65 +133,85 @@ def render():
     st.markdown("<br>", unsafe_allow_html=True)
 
     if st.button("Save CTF", type="primary", use_container_width=True, key="ctf_save"):
-        errors = []
-        if not st.session_state.ctf_title: errors.append("Title is required.")
-        if not st.session_state.ctf_slug: errors.append("Slug is required.")
-        if not re.match(r'^[a-z0-9-]+$', st.session_state.ctf_slug): errors.append("Slug contains invalid characters.")
-        if not st.session_state.ctf_statement_md: errors.append("Statement is required.")
-
         flag_type = st.session_state.ctf_flag_type
-        if flag_type == "Static" and not st.session_state.ctf_flag_value: errors.append("Flag Value is required for Static flag type.")
-        if flag_type == "Regex" and not st.session_state.ctf_flag_regex: errors.append("Flag Regex is required for Regex flag type.")
-        if flag_type == "Multiple" and not st.session_state.ctf_flag_list: errors.append("Flag List is required for Multiple flag type.")
-
-        try:
-            json.loads(st.session_state.ctf_score_weights_json)
-        except json.JSONDecodeError:
-            errors.append("Score weights is not valid JSON.")
-
         collection = st.session_state.ctf_collection
-        if collection == "(Create New Collection...)" and not st.session_state.ctf_new_collection_name: errors.append("New Collection Name cannot be empty.")
+        final_collection = st.session_state.ctf_new_collection_name if collection == "(Create New Collection...)" else collection
+        files = st.session_state.get('ctf_files') or []
+        digests = st.session_state.ctf_file_digests
+
+        payload = {
+            'basics': {
+                'title': st.session_state.ctf_title,
+                'slug': st.session_state.ctf_slug,
+                'category': st.session_state.ctf_category,
+                'difficulty': st.session_state.ctf_difficulty,
+                'points': st.session_state.ctf_points,
+                'tags': st.session_state.ctf_tags,
+                'collection': final_collection if final_collection != "None" else None,
+            },
+            'problem': {
+                'statement_md': st.session_state.ctf_statement_md,
+                'flag_config': {
+                    'type': flag_type,
+                    'value': st.session_state.get('ctf_flag_value'),
+                    'regex': st.session_state.get('ctf_flag_regex'),
+                    'list': st.session_state.get('ctf_flag_list', '').splitlines(),
+                    'case_sensitive': st.session_state.ctf_flag_case,
+                    'strip_whitespace': st.session_state.ctf_flag_strip,
+                    'max_submissions': st.session_state.ctf_flag_max_sub,
+                    'partial_scoring': st.session_state.get('ctf_flag_partial', False),
+                }
+            },
+            'attachments': [
+                {'name': f.name, 'role': st.session_state.get(f"ctf_role_{f.file_id}"), 'sha256': digests.get(f.file_id), 'size': f.size}
+                for f in files
+            ],
+            'evaluation': {
+                'scorer': st.session_state.ctf_scorer,
+                'expected_outputs_json': st.session_state.ctf_expected_outputs_json,
+                'score_weights_json': st.session_state.ctf_score_weights_json,
+            },
+            'provenance': {
+                'author': st.session_state.ctf_author,
+                'source_url': st.session_state.ctf_source_url,
+                'license': st.session_state.ctf_license,
+                'admin_notes': st.session_state.ctf_notes_admin,
+            }
+        }
+        errors = validate_payload(payload)
+        if collection == "(Create New Collection...)" and not final_collection: errors.append("New Collection Name cannot be empty.")
         if errors:
             for error in errors:
                 st.error(error)
         else:
-            final_collection = st.session_state.ctf_new_collection_name if collection == "(Create New Collection...)" else collection
-
-            payload = {
-                'basics': {
-                    'title': st.session_state.ctf_title,
-                    'slug': st.session_state.ctf_slug,
-                    'category': st.session_state.ctf_category,
-                    'difficulty': st.session_state.ctf_difficulty,
-                    'points': st.session_state.ctf_points,
-                    'tags': st.session_state.ctf_tags,
-                    'collection': final_collection if final_collection != "None" else None,
-                },
-                'problem': {
-                    'statement_md': st.session_state.ctf_statement_md,
-                    'flag_config': {
-                        'type': flag_type,
-                        'value': st.session_state.get('ctf_flag_value'),
-                        'regex': st.session_state.get('ctf_flag_regex'),
-                        'list': st.session_state.get('ctf_flag_list', '').splitlines(),
-                        'case_sensitive': st.session_state.ctf_flag_case,
-                        'strip_whitespace': st.session_state.ctf_flag_strip,
-                        'max_submissions': st.session_state.ctf_flag_max_sub,
-                        'partial_scoring': st.session_state.get('ctf_flag_partial', False),
-                    }
-                },
-                'evaluation': {
-                    'scorer': st.session_state.ctf_scorer,
-                    'expected_outputs_json': st.session_state.ctf_expected_outputs_json,
-                    'score_weights_json': st.session_state.ctf_score_weights_json,
-                },
-                'provenance': {
-                    'author': st.session_state.ctf_author,
-                    'source_url': st.session_state.ctf_source_url,
-                    'license': st.session_state.ctf_license,
-                    'admin_notes': st.session_state.ctf_notes_admin,
-                }
-            }
-            st.toast("CTF Challenge Saved!")
-            st.subheader("Generated Payload Summary")
-            st.json(payload)
+            try:
+                problem_id = store().add_problem(payload)
+            except sqlite3.IntegrityError:
+                st.error(f"A CTF with slug '{st.session_state.ctf_slug}' already exists.")
+            else:
+                try:
+                    if files:
+                        # Identical files already stored (by any CTF) are only referenced, never written again.
+                        blobs = get_blob_store()
+                        blobs.attach(problem_id, [
+                            (blobs.put_stream(f, digests.get(f.file_id)), f.name, st.session_state.get(f"ctf_role_{f.file_id}"))
+                            for f in files
+                        ])
+                    index = get_dedupe_index()
+                    file_digests = [item['sha256'] for item in payload['attachments']]
+                    similar = index.query(payload['problem']['statement_md'], file_digests, exclude=(problem_id,))
+                    index.add(problem_id, payload['problem']['statement_md'], file_digests)
+                except Exception as exc:
+                    # Same rollback as a bulk import: no CTF row is left without its attachments.
+                    discard_problem(problem_id)
+                    st.error(f"Could not store the attachments, so the CTF was not saved: {exc}")
+                    return
+                st.toast(f"CTF Challenge Saved! (id {problem_id})")
+                if similar:
+                    slugs = index.slugs(similar)
+                    st.warning("Possible near-duplicate of: " + ", ".join(
+                        f"`{slugs.get(pid, pid)}` ({', '.join(f'{kind} {score:.0%}' for kind, score in kinds.items())})"
+                        for pid, kinds in similar.items()
+                    ))
+                st.subheader("Generated Payload Summary")
+                st.json(payload)
@@ -0,0 +1,58 @@
+import os
+import zipfile
+import zlib
+
+import pandas as pd
+import streamlit as st
+
+from src.bulk_import import MANIFEST, import_zip
+
+
+def render():
+    """Bulk import of CTF challenges from a ZIP archive, with per-challenge progress and errors."""
+    st.subheader("Add CTF Challenges in Bulk")
+    st.caption(f"Each challenge is a directory holding a `{MANIFEST}` in the Add CTF payload layout "
+               "(basics / problem / evaluation / provenance). Every other file in the directory becomes an attachment; "
+               "map file names to roles under `attachments` in the manifest.")
+
+    uploaded = st.file_uploader("Upload a zip file containing CTF challenges", type=["zip"], key="bulk_zip")
+    path = st.text_input("...or the path of an archive on the server", key="bulk_zip_path",
+                         help="Large archives are read straight from disk instead of going through the browser upload.")
+    if not st.button("Import", type="primary", key="bulk_import", disabled=not (uploaded or path)):
+        return
+    if not uploaded and not os.path.isfile(path):
+        st.error(f"No such file: {path}")
+        return
+
+    bar = st.progress(0.0, text="Reading archive...")
+    log = st.empty()
+    failures = []
+
+    def progress(done, total, result):
+        bar.progress(done / total, text=f"{done}/{total} challenges")
+        if result['status'] != 'imported':
+            failures.append(result)
+            log.caption(f"{len(failures)} challenge(s) not imported so far")
+
+    try:
+        results = import_zip(uploaded if uploaded else path, progress=progress)
+    except (zipfile.BadZipFile, zlib.error, EOFError, OSError) as exc:
+        bar.empty()
+        st.error(f"Could not read the archive: {exc}")
+        return
+    bar.progress(1.0, text="Done")
+    if not results:
+        st.warning(f"No `{MANIFEST}` found in the archive.")
+        return
+
+    frame = pd.DataFrame(results)
+    counts = frame['status'].value_counts()
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Imported", int(counts.get('imported', 0)))
+    c2.metric("Invalid", int(counts.get('invalid', 0)))
+    c3.metric("Duplicates", int(counts.get('duplicate', 0)))
+    c4.metric("Errors", int(counts.get('error', 0)))
+    c5.metric("Near-duplicates", int(frame['near_duplicates'].map(bool).sum()),
+              help="Imported, but the statement or attachments closely match a challenge already in the library.")
+    st.dataframe(frame.assign(errors=frame['errors'].map('; '.join), near_duplicates=frame['near_duplicates'].map(', '.join)),
+                 hide_index=True, use_container_width=True)
@@ -1,102 +1,147 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 
+from src.cache import VersionedCache
+from src.data import category_solve_rates, cost_performance, model_registry, model_significance, source_version, store
+from src.schema import format_size
+from src.significance import square
 
-MODELS_DATA = {
-    "GPT-4o": {
-        "name": "GPT-4o",
-        "organization": "OpenAI",
-        "is_multimodal": True,
-        "context_size": "128k",
-        "cutoff_date": "Oct 2023",
-        "cost_input_pm": 2.5,
-        "cost_output_pm": 10.0,
-        "max_output": "4k",
-        "latency_s": 0.51,
-        "speed_tps": 143,
-        "color": "#9FC9FF",
-        "benchmarks": {
-            "MMMU": 85.3,
-            "MathVista": 72.1,
-            "DocVQA": 90.2,
-            "ChartQA": 80.8,
-            "AI2D": 88.5,
-            "MMLU": 88.4,
-            "HumanEval": 90.2
-        }
-    },
-    "Claude 3.5 Sonnet": {
-        "name": "Claude 3.5 Sonnet",
-        "organization": "Anthropic",
-        "is_multimodal": True,
-        "context_size": "200k",
-        "cutoff_date": "Apr 2024",
-        "cost_input_pm": 3.0,
-        "cost_output_pm": 15.0,
-        "max_output": "8k",
-        "latency_s": 1.22,
-        "speed_tps": 78,
-        "color": "#FC69D3",
-        "benchmarks": {
-            "MMMU": 82.1,
-            "MathVista": 68.5,
-            "DocVQA": 88.9,
-            "ChartQA": 79.1,
-            "AI2D": 85.2,
-            "MMLU": 85.0,
-            "HumanEval": 88.1
-        }
-    },
-    "Gemini 2.5 Pro": {
-        "name": "Gemini 2.5 Pro",
-        "organization": "Google",
-        "is_multimodal": True,
-        "context_size": "1M",
-        "cutoff_date": "Jun 2024",
-        "cost_input_pm": 2.0,
-        "cost_output_pm": 8.0,
-        "max_output": "16k",
-        "latency_s": 0.8,
-        "speed_tps": 110,
-        "color": "#88d8b0",
-        "benchmarks": {
-            "MMMU": 89.0,
-            "MathVista": 75.0,
-            "DocVQA": 91.5,
-            "ChartQA": 82.3,
-            "AI2D": 90.1,
-            "MMLU": 90.1,
-            "HumanEval": 91.3
-        }
-    },
-    "Llama 3.1 70B": {
-        "name": "Llama 3.1 70B",
-        "organization": "Meta",
-        "is_multimodal": False,
-        "context_size": "128k",
-        "cutoff_date": "Mar 2024",
-        "cost_input_pm": 1.0,
-        "cost_output_pm": 3.0,
-        "max_output": "16k",
-        "latency_s": 1.5,
-        "speed_tps": 60,
-        "color": "#ff6b6b",
-        "benchmarks": {
-            "MMMU": 65.0, 
-            "MathVista": 55.3,
-            "DocVQA": 70.1,
-            "ChartQA": 60.5,
-            "AI2D": 68.0,
-            "MMLU": 82.0,
-            "HumanEval": 85.1
-        }
-    }
-}
+MAX_MODELS = 20
+# Selections whose rendered figures are kept; older ones are rebuilt if picked again.
+MAX_RENDERED = 32
+
+# Figure specs and card HTML per selection tuple; tagged with the store version so new runs or models rebuild them.
+_rendered = VersionedCache(max_entries=MAX_RENDERED)
+
+
+def _display(value):
+    return '—' if value is None else value
+
+
+def _card(model):
+    mm_class = "multimodal-true" if model.is_multimodal else "multimodal-false"
+    mm_text = "Multimodal" if model.is_multimodal else "Text-Only"
+    return f'''
+    <div class="model-card">
+        <div class="model-card-header">
+            <div class="model-color-dot" style="background-color:{model.color};"></div>
+            <div class="model-card-name">{model.name}</div>
+            <span class="multimodal-badge {mm_class}">{mm_text}</span>
+        </div>
+        <div class="detail-grid">
+            <div class="detail-item"><div class="detail-item-label">Context</div><div class="detail-item-value">{format_size(model.context)}</div></div>
+            <div class="detail-item"><div class="detail-item-label">Cutoff</div><div class="detail-item-value">{_display(model.knowledge_cutoff)}</div></div>
+            <div class="detail-item"><div class="detail-item-label">I/O Cost ($/M)</div><div class="detail-item-value">{_display(model.input_price_pm)}/{_display(model.output_price_pm)}</div></div>
+            <div class="detail-item"><div class="detail-item-label">Max Output</div><div class="detail-item-value">{format_size(model.max_output)}</div></div>
+            <div class="detail-item"><div class="detail-item-label">Latency (s)</div><div class="detail-item-value">{_display(model.latency_s)}</div></div>
+            <div class="detail-item"><div class="detail-item-label">Speed (t/s)</div><div class="detail-item-value">{_display(model.speed_tps)}</div></div>
+        </div>
+    </div>'''
+
+
+def _cards_html(model_ids):
+    registry = model_registry()
+    return '<div class="model-card-grid">' + ''.join(_card(registry.get(model_id)) for model_id in model_ids) + '</div>'
+
+
+def _grouped_bars(labels, series):
+    """Grouped-bar figure spec from {model_id: values aligned with labels}."""
+    registry = model_registry()
+    fig = go.Figure()
+    for model_id, values in series.items():
+        model = registry.get(model_id)
+        fig.add_trace(go.Bar(
+            x=labels,
+            y=values,
+            name=model.name,
+            marker=dict(color=model.rgba(0.6), line=dict(color=model.color, width=2)),
+        ))
+    fig.update_layout(
+        barmode='group',
+        xaxis_tickangle=-45,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)', # Transparent background
+        font_color='#888', # Neutral font color
+        yaxis=dict(gridcolor='rgba(128,128,128,0.2)', gridwidth=1, zeroline=False, ticksuffix='%'),
+        xaxis=dict(showgrid=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=40, b=20),
+        bargap=0.15,
+        hovermode="x unified"
+    )
+    fig.update_traces(marker_cornerradius=5)
+    return fig.to_dict()
+
+
+def _solve_rate_figure(model_ids):
+    rates = category_solve_rates(model_ids) * 100
+    return _grouped_bars(rates.index.tolist(), {model_id: rates[model_id].tolist() for model_id in model_ids})
+
+
+def _significance_figure(model_ids):
+    """Heatmap of row-minus-column solve-rate deltas, annotated with Holm-adjusted McNemar p-values."""
+    registry = model_registry()
+    pairs = model_significance(model_ids)
+    delta = square(pairs, 'delta', list(model_ids), antisymmetric=True) * 100
+    p_values = square(pairs, 'p_holm', list(model_ids))
+    text = [
+        ['' if row == col or p != p else f"{d:+.1f}{'*' if p < 0.05 else ''}<br>p={p:.2g}" for col, d, p in zip(model_ids, drow, prow)]
+        for row, drow, prow in zip(model_ids, delta.to_numpy(), p_values.to_numpy())
+    ]
+    names = [registry.name(model_id) for model_id in model_ids]
+    limit = max(1.0, float(abs(delta).max().max())) if delta.notna().any().any() else 1.0
+    fig = go.Figure(go.Heatmap(
+        z=delta.to_numpy(), x=names, y=names, text=text, texttemplate='%{text}',
+        colorscale='RdBu', zmid=0, zmin=-limit, zmax=limit, colorbar=dict(ticksuffix=' pp'),
+        hovertemplate='%{y} vs %{x}<br>%{text}<extra></extra>',
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='#888',
+        yaxis=dict(autorange='reversed'),
+        margin=dict(l=20, r=20, t=20, b=20),
+    )
+    return fig.to_dict()
 
-MODEL_NAMES = list(MODELS_DATA.keys())
 
-def render(models: pd.DataFrame):
+def _pareto_figure(costs, x, frontier, x_title):
+    """Solve rate against one cost axis, every model a dot in its color, with the Pareto frontier as a step line."""
+    registry = model_registry()
+    points = costs.dropna(subset=[x, 'solve_rate'])
+    fig = go.Figure()
+    for row in points.itertuples(index=False):
+        model = registry.get(row.model_id)
+        fig.add_trace(go.Scatter(
+            x=[getattr(row, x)], y=[row.solve_rate * 100], mode='markers+text', name=model.name,
+            text=[model.name], textposition='top center', showlegend=False,
+            marker=dict(size=14 if getattr(row, frontier) else 10, color=model.rgba(0.8), line=dict(color=model.color, width=2)),
+        ))
+    edge = points[points[frontier]].sort_values(x)
+    fig.add_trace(go.Scatter(
+        x=edge[x], y=edge['solve_rate'] * 100, mode='lines', line_shape='hv', name='Pareto frontier',
+        line=dict(color='#888', dash='dash'),
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='#888',
+        xaxis=dict(title=x_title, gridcolor='rgba(128,128,128,0.2)'),
+        yaxis=dict(title='Solve rate', gridcolor='rgba(128,128,128,0.2)', ticksuffix='%'),
+        margin=dict(l=20, r=20, t=20, b=20),
+    )
+    return fig.to_dict()
+
+
+def _standard_benchmarks_figure(model_ids):
+    registry = model_registry()
+    scores = [registry.get(model_id).standard_benchmarks for model_id in model_ids]
+    labels = list(dict.fromkeys(label for score in scores for label in score))
+    return _grouped_bars(labels, {model_id: [score.get(label, 0) for label in labels] for model_id, score in zip(model_ids, scores)})
+
+
+@st.fragment
+def render():
     st.markdown('<div id="compare" class="section-anchor"></div>', unsafe_allow_html=True)
 
     st.markdown("""
@@ -186,6 +231,11 @@ def render(models: pd.DataFrame):
         .multimodal-false {
             background-color: #6c757d;
         }
+        .model-card-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
+            gap: 1rem;
+        }
         .detail-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
@@ -204,100 +254,77 @@ def render(models: pd.DataFrame):
     """, unsafe_allow_html=True)
 
     with st.container():
-        st.markdown('<div class="compare-header"><h3>Compare models</h3><p>Select two models to compare</p></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="compare-header"><h3>Compare models</h3><p>Select up to {MAX_MODELS} models to compare</p></div>', unsafe_allow_html=True)
 
+        registry = model_registry()
+        # Default to the first two models that report standard benchmarks, so both charts have data.
+        defaults = [info.name for info in registry if info.standard_benchmarks][:2] or [info.name for info in registry][:2]
+        names = st.multiselect("Models", [info.name for info in registry], default=defaults,
+                               max_selections=MAX_MODELS, key="compare_models")
+        if not names:
+            st.info("Pick at least one model.")
+            return
+        model_ids = tuple(registry.id(name) for name in names)
+        version = source_version('compare')
 
-        col1, vs_col, col2 = st.columns([5, 1, 5])
-        with col1:
-            model1_name = st.selectbox("Model 1", MODEL_NAMES, index=0, key="compare_model1")
-        with vs_col:
-            st.markdown('<div class="vs-text">vs</div>', unsafe_allow_html=True)
-        with col2:
-            model2_name = st.selectbox("Model 2", MODEL_NAMES, index=1, key="compare_model2")
-
-        model1_data = MODELS_DATA[model1_name]
-        model2_data = MODELS_DATA[model2_name]
+        st.write("""<div style="margin-top: 1rem;"></div>""", unsafe_allow_html=True)
+        st.markdown("<div class='compare-header'><h5>Model Details</h5></div>", unsafe_allow_html=True)
+        st.markdown(_rendered.get(('cards', model_ids), version, lambda: _cards_html(model_ids)), unsafe_allow_html=True)
 
         st.write("""<div style="margin-top: 2rem;"></div>""", unsafe_allow_html=True)
-
-
-        if model1_name and model2_name:
-            body_col1, body_col2 = st.columns([6, 6])
-
-
-            with body_col1:
-                st.markdown("<div class='compare-header'><h5>Model Details</h5></div>", unsafe_allow_html=True)
-                
-                card_col1, card_col2 = st.columns(2)
-                
-                def make_card(model_data, col):
-                    mm_class = "multimodal-true" if model_data['is_multimodal'] else "multimodal-false"
-                    mm_text = "Multimodal" if model_data['is_multimodal'] else "Text-Only"
-                    with col:
-                        st.markdown(f'''
-                        <div class="model-card">
-                            <div class="model-card-header">
-                                <div class="model-color-dot" style="background-color:{model_data['color']};"></div>
-                                <div class="model-card-name">{model_data['name']}</div>
-                                <span class="multimodal-badge {mm_class}">{mm_text}</span>
-                            </div>
-                            <div class="detail-grid">
-                                <div class="detail-item"><div class="detail-item-label">Context</div><div class="detail-item-value">{model_data['context_size']}</div></div>
-                                <div class="detail-item"><div class="detail-item-label">Cutoff</div><div class="detail-item-value">{model_data['cutoff_date']}</div></div>
-                                <div class="detail-item"><div class="detail-item-label">I/O Cost ($/M)</div><div class="detail-item-value">{model_data['cost_input_pm']}/{model_data['cost_output_pm']}</div></div>
-                                <div class="detail-item"><div class="detail-item-label">Max Output</div><div class="detail-item-value">{model_data['max_output']}</div></div>
-                                <div class="detail-item"><div class="detail-item-label">Latency (s)</div><div class="detail-item-value">{model_data['latency_s']}</div></div>
-                                <div class="detail-item"><div class="detail-item-label">Speed (t/s)</div><div class="detail-item-value">{model_data['speed_tps']}</div></div>
-                            </div>
-                        </div>
-                        ''', unsafe_allow_html=True)
-
-                make_card(model1_data, card_col1)
-                make_card(model2_data, card_col2)
-
-
-            with body_col2:
-                st.markdown("<div class='compare-header'><h5>Standard Benchmarks</h5></div>", unsafe_allow_html=True)
-                
-                benchmarks1 = model1_data['benchmarks']
-                benchmarks2 = model2_data['benchmarks']
-                
-                labels = list(benchmarks1.keys())
-                values1 = list(benchmarks1.values())
-                values2 = [benchmarks2.get(key, 0) for key in labels]
-
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=labels,
-                    y=values1,
-                    name=model1_name,
-                    marker=dict(
-                        color=f'rgba({int(model1_data["color"][1:3], 16)}, {int(model1_data["color"][3:5], 16)}, {int(model1_data["color"][5:7], 16)}, 0.6)',
-                        line=dict(color=model1_data['color'], width=2)
-                    )
-                ))
-                fig.add_trace(go.Bar(
-                    x=labels,
-                    y=values2,
-                    name=model2_name,
-                    marker=dict(
-                        color=f'rgba({int(model2_data["color"][1:3], 16)}, {int(model2_data["color"][3:5], 16)}, {int(model2_data["color"][5:7], 16)}, 0.6)',
-                        line=dict(color=model2_data['color'], width=2)
-                    )
-                ))
-
-                fig.update_layout(
-                    barmode='group',
-                    xaxis_tickangle=-45,
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)', # Transparent background
-                    font_color='#888', # Neutral font color
-                    yaxis=dict(gridcolor='rgba(128,128,128,0.2)', gridwidth=1, zeroline=False, ticksuffix='%'),
-                    xaxis=dict(showgrid=False),
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                    margin=dict(l=20, r=20, t=40, b=20),
-                    bargap=0.15,
-                    hovermode="x unified"
+        solve_tab, significance_tab, cost_tab, standard_tab = st.tabs(["CTF solve rate", "Significance", "Cost & latency", "Standard Benchmarks"])
+        with solve_tab:
+            st.caption("Runs solved per problem category, pooled over reruns.")
+            st.plotly_chart(_rendered.get(('solve_rate', model_ids), version, lambda: _solve_rate_figure(model_ids)),
+                            use_container_width=True, key="compare_solve_rate")
+        with significance_tab:
+            if len(model_ids) < 2:
+                st.info("Pick at least two models.")
+            else:
+                st.caption("Row minus column solve rate on shared problems (percentage points); * marks pairs whose "
+                           "McNemar test stays below 0.05 after Holm correction across all model pairs.")
+                st.plotly_chart(_rendered.get(('significance', model_ids), version, lambda: _significance_figure(model_ids)),
+                                use_container_width=True, key="compare_significance")
+                pairs = model_significance(model_ids)
+                registry = model_registry()
+                st.dataframe(
+                    pairs.assign(model_a=registry.map_names(pairs['model_a']), model_b=registry.map_names(pairs['model_b'])),
+                    hide_index=True,
+                    column_config={
+                        "delta": st.column_config.NumberColumn("Δ solve rate", format="percent"),
+                        "ci_low": st.column_config.NumberColumn("CI low", format="percent"),
+                        "ci_high": st.column_config.NumberColumn("CI high", format="percent"),
+                    },
                 )
-                fig.update_traces(marker_cornerradius=5)
-                st.plotly_chart(fig, use_container_width=True)
+        with cost_tab:
+            benchmarks = store().query('benchmarks', columns=['id', 'name'])
+            options = {"All problems": None, **dict(zip(benchmarks['name'], benchmarks['id'].tolist()))}
+            benchmark_id = options[st.selectbox("Benchmark", list(options), key="compare_cost_benchmark")]
+            costs = cost_performance(benchmark_id)
+            cost_version = source_version('costs')
+            st.caption("Dollar cost from each run's tokens at the model's input/output prices; latency is time to first "
+                       "token plus output tokens at the model's speed. Every model with runs is plotted; larger dots lie "
+                       "on the Pareto frontier.")
+            c1, c2 = st.columns(2)
+            with c1:
+                st.plotly_chart(_rendered.get(('cost_frontier', benchmark_id), cost_version,
+                                              lambda: _pareto_figure(costs, 'cost_per_run', 'cost_frontier', 'Cost per run ($)')),
+                                use_container_width=True, key="compare_cost_frontier")
+            with c2:
+                st.plotly_chart(_rendered.get(('latency_frontier', benchmark_id), cost_version,
+                                              lambda: _pareto_figure(costs, 'latency_s', 'latency_frontier', 'Latency per run (s)')),
+                                use_container_width=True, key="compare_latency_frontier")
+            st.dataframe(
+                costs.assign(model_id=registry.map_names(costs['model_id'])).rename(columns={'model_id': 'Model'}),
+                hide_index=True,
+                column_config={
+                    "solve_rate": st.column_config.NumberColumn("Solve rate", format="percent"),
+                    "cost_usd": st.column_config.NumberColumn("Total cost", format="dollar"),
+                    "cost_per_run": st.column_config.NumberColumn("Cost / run", format="$%.4f"),
+                    "cost_per_solve": st.column_config.NumberColumn("Cost / solve", format="$%.4f"),
+                    "latency_s": st.column_config.NumberColumn("Latency (s)", format="%.1f"),
+                },
+            )
+        with standard_tab:
+            st.plotly_chart(_rendered.get(('standard', model_ids), version, lambda: _standard_benchmarks_figure(model_ids)),
+                            use_container_width=True, key="compare_standard")
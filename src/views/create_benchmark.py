@@ -1,6 +1,49 @@
+import json
 import streamlit as st
-import pandas as pd
-
+import sqlite3
+from src.cache import VersionedCache
+from src.data import model_registry, store
+from src.datasets import DEDUPE_MODES, SPLIT_MODES, STRATA, library_counts, preview, resolve_dataset
+from src.dedupe import get_dedupe_index
+from src.plans import compile_plan, submit_plan
+from src.scoring import AGGREGATIONS, DEFAULT_WEIGHTS
+from src.utils import simple_slugify
+
+DATASET_SOURCES = ["Select existing CTFs", "Sample from library", "Upload ZIP of CTFs"]
+SLUG_OPTIONS_LIMIT = 200
+
+_resolved = VersionedCache()
+
+
+def _dataset_spec():
+    """The dataset spec the Dataset step describes, or None for an uploaded bundle (resolved once imported)."""
+    source = st.session_state.get("bm_dataset_source", DATASET_SOURCES[0])
+    if source == "Upload ZIP of CTFs":
+        return None
+    spec = {
+        'seed': int(st.session_state.get("bm_seed", 42)),
+        'dedupe_by': st.session_state.get("bm_dedupe", DEDUPE_MODES[0]),
+        'split_mode': st.session_state.get("bm_split_mode", SPLIT_MODES[0]),
+        'test_fraction': st.session_state.get("bm_test_fraction", 0.2),
+    }
+    if source == "Select existing CTFs":
+        return {**spec, 'ctf_slugs': list(st.session_state.get("bm_ctf_picked", []))}
+    return {
+        **spec,
+        'filters': {'category': st.session_state.get("bm_sample_categories", []),
+                    'difficulty': st.session_state.get("bm_sample_difficulties", [])},
+        'sample_size': int(st.session_state.get("bm_sample_size", 0)),
+        'stratify_by': list(st.session_state.get("bm_stratify_by", STRATA)),
+    }
+
+
+def _resolve(spec):
+    """resolve_dataset for a spec, memoized on the spec and the problems/attachments generations."""
+    version = (json.dumps(spec, sort_keys=True), store().generation('problems', 'attachments'))
+    return _resolved.get('dataset', version, lambda: resolve_dataset(spec, store(), get_dedupe_index()))
+
+
+@st.fragment
 def render():
     """Renders the Create Benchmark page."""
     st.markdown('<div id="create_benchmark" class="section-anchor"></div>', unsafe_allow_html=True)
@@ -16,34 +59,58 @@ def render():
         with col1:
             st.selectbox("Visibility", ["Private", "Unlisted", "Public"], key="bm_visibility", help="Private: Only you can see. Unlisted: Anyone with the link. Public: Discoverable by all.")
             st.selectbox("Tasks Modality", ["Text", "Image", "Code", "Binary", "Mixed"], key="bm_modality")
+            st.text_input("Submitted by", key="bm_user", placeholder="Username", help="Queued jobs are shared fairly between users.")
         with col2:
             st.multiselect("Domains", ["Web", "Pwn", "Crypto", "Forensics", "Rev", "OSINT", "Stego", "Mobile", "Cloud", "AI", "Misc"], key="bm_domains")
+            st.number_input("Queue priority", 0, 10, 0, key="bm_priority", help="Higher priorities are scheduled first.")
 
 
     with st.expander("2. Dataset"):
-        source = st.radio("Source", ["Select existing CTFs", "Upload ZIP of CTFs"], key="bm_dataset_source", horizontal=True)
-        
-        if source == "Select existing CTFs":
+        source = st.radio("Source", DATASET_SOURCES, key="bm_dataset_source", horizontal=True)
+        db = store()
 
-            st.multiselect("Select CTFs by slug", ["ctf-101", "pwn-pro", "web-warrior"], key="bm_ctf_slugs")
+        if source == "Select existing CTFs":
+            # Only the matching slugs (plus the current picks) are sent to the browser, however large the library is.
+            find = st.text_input("Find CTFs", key="bm_ctf_find", placeholder="Search by title or slug")
+            matches = db.query('problems', columns=['slug'], order_by='slug', limit=SLUG_OPTIONS_LIMIT,
+                               search=(find, ('slug', 'title')))['slug'].tolist()
+            # New options make a new widget, so the picks live under their own key and are handed back to it each run.
+            picked = st.session_state.setdefault("bm_ctf_picked", [])
+            st.session_state.bm_ctf_slugs = picked
+            st.multiselect("Select CTFs by slug", sorted({*picked, *matches}), key="bm_ctf_slugs",
+                           on_change=lambda: st.session_state.update(bm_ctf_picked=st.session_state.bm_ctf_slugs))
+        elif source == "Sample from library":
+            c1, c2 = st.columns(2)
+            c1.multiselect("Categories", db.distinct('problems', 'category'), key="bm_sample_categories", help="Empty means all.")
+            c2.multiselect("Difficulties", db.distinct('problems', 'difficulty'), key="bm_sample_difficulties", help="Empty means all.")
+            c1.number_input("Sample size", 0, 1_000_000, 0, key="bm_sample_size", help="0 takes every matching CTF.")
+            c2.multiselect("Stratify by", list(STRATA), default=list(STRATA), key="bm_stratify_by",
+                           help="Each stratum gets its proportional share of the sample.")
         else:
             st.file_uploader("Upload CTF bundle (.zip)", type=["zip"], key="bm_ctf_zip")
 
-        split_mode = st.selectbox("Split", ["test: all", "custom"], key="bm_split_mode", help="Future support for custom train/test splits.")
+        split_mode = st.selectbox("Split", list(SPLIT_MODES), key="bm_split_mode", help="custom holds out a seeded, stratified test share.")
         if split_mode == "custom":
-            st.warning("Custom split configuration is not yet implemented.", icon="⚠️")
-
+            st.slider("Test fraction", 0.05, 0.95, 0.2, 0.05, key="bm_test_fraction")
 
         col1, col2 = st.columns(2)
         with col1:
             st.number_input("Random seed", 0, 1_000_000, 42, key="bm_seed")
         with col2:
-            st.selectbox("Dedupe by", ["slug", "attachment_hash"], key="bm_dedupe", help="Ensure no duplicate problems are included.")
-            
-        st.markdown("**Dataset Preview**")
+            st.selectbox("Dedupe by", list(DEDUPE_MODES), key="bm_dedupe",
+                         help="Ensure no duplicate problems are included. near_duplicate keeps one CTF of each group whose "
+                              "statements or attachment sets are at least 70% similar (MinHash).")
 
-        preview_data = {'Category': ['Web', 'Pwn', 'Crypto'], 'Count': [5, 3, 2], 'Total Items': [10, 10, 10]}
-        st.dataframe(pd.DataFrame(preview_data), use_container_width=True, hide_index=True)
+        st.markdown("**Dataset Preview**")
+        spec = _dataset_spec()
+        if spec is None:
+            st.caption("The preview is available once the archive is imported.")
+        else:
+            problems, dropped = _resolve(spec)
+            counts, by = library_counts(spec, db)
+            table = preview(problems, counts, by)
+            st.dataframe(table, use_container_width=True, hide_index=True)
+            st.caption(f"{len(problems)} CTF(s) selected" + (f", {len(dropped)} duplicate(s) left out" if dropped else "") + ".")
 
 
     with st.expander("3. Environment & Tools"):
@@ -82,12 +149,15 @@ def render():
 
 
     with st.expander("4. Evaluation"):
+        registry = model_registry()
+        st.multiselect("Models", [info.name for info in registry], key="bm_models",
+                       help="Tasks that already have a result for the same CTF, model, environment and limits are not run again.")
         judging_method = st.selectbox("Judging", ["automatic", "llm_judge"], key="bm_eval_judging")
         if judging_method == "llm_judge":
             st.text_input("Rubric ID / name", key="bm_eval_rubric", placeholder="e.g., concise-code-explainer-v2")
 
         st.markdown("<h6>Metrics & Weights</h6>", unsafe_allow_html=True)
-        metrics = {"Solve Rate": 1.0, "Avg Time to Flag": 0.5, "Token Efficiency": 0.2, "Cost USD": 0.2, "First Try Pass": 0.8, "Partial Credit": 0.0}
+        metrics = DEFAULT_WEIGHTS
         
         active_metrics = {}
         for name, default_w in metrics.items():
@@ -95,7 +165,8 @@ def render():
                 active_metrics[name] = st.number_input("Weight", 0.0, 10.0, default_w, key=f"bm_metric_{name}_w")
 
 
-        st.selectbox("Aggregation", ["macro", "micro", "per-category"], key="bm_eval_agg", help="How to average scores across tasks.")
+        st.selectbox("Aggregation", list(AGGREGATIONS), key="bm_eval_agg",
+                     help="macro: every CTF counts the same. micro: every run counts the same. per-category: every category counts the same.")
         
         st.markdown("<h6>Limits</h6>", unsafe_allow_html=True)
         l1, l2, l3, l4 = st.columns(4)
@@ -122,12 +193,17 @@ def render():
         if not st.session_state.bm_name:
             errors.append("Benchmark Name is required.")
         
-        if st.session_state.bm_dataset_source == "Select existing CTFs" and not st.session_state.bm_ctf_slugs:
+        if st.session_state.bm_dataset_source == "Select existing CTFs" and not st.session_state.get("bm_ctf_picked"):
             errors.append("Please select at least one CTF for the dataset.")
+        elif st.session_state.bm_dataset_source == "Sample from library" and _resolve(_dataset_spec())[0].empty:
+            errors.append("No CTF in the library matches the dataset filters.")
 
         if st.session_state.bm_env_profile == "Headless Browser" and not st.session_state.bm_env_browser_token:
             errors.append("BROWSERLESS_TOKEN is required for the Headless Browser profile.")
 
+        if not st.session_state.bm_models:
+            errors.append("Select at least one model to evaluate.")
+
         if not any(st.session_state.get(f"bm_metric_{name}_active") for name in metrics):
             errors.append("At least one metric must be selected for evaluation.")
 
@@ -136,20 +212,21 @@ def render():
                 st.error(f"Validation failed: {error}")
         else:
 
-            st.success("Benchmark created successfully! (Mock)")
+            spec = _dataset_spec()
+            problems, dropped = _resolve(spec) if spec is not None else (None, [])
+            dataset = {"source": st.session_state.bm_dataset_source, "ctf_slugs": "from_zip"}
+            if problems is not None:
+                dataset.update(spec, ctf_slugs=problems['slug'].tolist(), problem_ids=problems['id'].tolist(),
+                               test_slugs=problems.loc[problems['split'] == 'test', 'slug'].tolist(), duplicates_dropped=dropped)
+
             payload = {
                 "name": st.session_state.bm_name,
                 "description": st.session_state.bm_desc_md,
                 "visibility": st.session_state.bm_visibility,
                 "modality": st.session_state.bm_modality,
                 "domains": st.session_state.bm_domains,
-                "dataset": {
-                    "source": st.session_state.bm_dataset_source,
-                    "ctf_slugs": st.session_state.bm_ctf_slugs if st.session_state.bm_dataset_source == "Select existing CTFs" else "from_zip",
-                    "split_mode": st.session_state.bm_split_mode,
-                    "seed": st.session_state.bm_seed,
-                    "dedupe_by": st.session_state.bm_dedupe
-                },
+                "dataset": dataset,
+                "model_ids": [int(registry.id(name)) for name in st.session_state.bm_models],
                 "environment": {
                     "profile": st.session_state.bm_env_profile,
                     "cpu": st.session_state.bm_env_cpu,
@@ -187,7 +264,8 @@ def render():
                 payload['environment']['toolpacks'] = st.session_state.bm_env_toolpacks
                 payload['environment']['extra_apt_packages'] = st.session_state.bm_env_apt_extra
             elif st.session_state.bm_env_profile == "Python Tools":
-                payload['environment']['requirements_file'] = st.session_state.bm_env_reqs_file
+                reqs_file = st.session_state.bm_env_reqs_file
+                payload['environment']['requirements_file'] = reqs_file.getvalue().decode(errors="replace") if reqs_file else None
                 payload['environment']['quick_add_libs'] = st.session_state.bm_env_quick_libs
             elif st.session_state.bm_env_profile == "Headless Browser":
                 payload['environment']['browserless_token'] = "********" # Mask token
@@ -195,5 +273,24 @@ def render():
                 payload['environment']['docker_image'] = st.session_state.bm_env_image_custom
                 payload['environment']['command'] = st.session_state.bm_env_cmd_custom
 
-
-            st.json(payload)
+            db = store()
+            slug = simple_slugify(st.session_state.bm_name)
+            existing = db.query('benchmarks', filters={'slug': [slug]}, columns=['id'])
+            try:
+                if existing.empty:
+                    benchmark_id, action = db.add_benchmark(slug, payload), "created"
+                else:
+                    # Re-submitting a benchmark replaces its spec; the plan below then queues only what has no result yet.
+                    benchmark_id, action = int(existing['id'].iloc[0]), "re-submitted"
+                    db.update_rows('benchmarks', [benchmark_id], name=payload['name'], spec=json.dumps(payload))
+            except sqlite3.IntegrityError:
+                st.error(f"Validation failed: A benchmark named '{st.session_state.bm_name}' already exists.")
+            else:
+                plan = compile_plan(payload, db)
+                job_ids, queued, skipped = submit_plan(plan, benchmark_id, db, user=st.session_state.bm_user or None,
+                                                       priority=st.session_state.bm_priority)
+                st.success(f"Benchmark {action} successfully! (id {benchmark_id})")
+                st.info(f"Queued {queued} task(s) in {len(job_ids)} job(s); {skipped} task(s) already have a result or a job and were skipped.")
+                if dropped:
+                    st.info(f"Left out {len(dropped)} duplicate CTF(s): {', '.join(dropped)}")
+                st.json(payload)
@@ -1,7 +1,8 @@
 import streamlit as st
 from src.utils import get_image_as_base64
 
-def render(models): # The function signature must match the call in main.py
+@st.fragment
+def render():
     st.markdown('<div id="home" class="section-anchor"></div>', unsafe_allow_html=True)
 
     logo = get_image_as_base64("assets/logo.png")
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
-from src.views import add_ctf
+from src.views import add_ctf, add_ctf_bulk, search_runs
 
+@st.fragment
 def render():
     st.markdown('<div id="manage" class="section-anchor"></div>', unsafe_allow_html=True)
     st.header("ADD CTF")
@@ -11,12 +12,10 @@ def render():
         add_ctf.render()
 
     with tab2:
-        st.subheader("Add CTF Challenges in Bulk")
-        st.file_uploader("Upload a zip file containing CTF challenges", type=["zip"])
+        add_ctf_bulk.render()
 
     with tab3:
-        st.subheader("Search")
-        st.write("A searchable store of run outputs will be here.")
+        search_runs.render()
 
 
 
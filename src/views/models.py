@@ -1,7 +1,50 @@
-import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from src.data import max_pass_k, model_problem_cells, pass_at_k_cells, store
+from src.schema import parse_size
+from src.views.paged_table import paged_table
+
+HUB_COLUMNS = {
+    'id': None, 'organization': 'Organization', 'name': 'Model', 'license': 'License', 'parameters_b': 'Parameters (B)',
+    'context': 'Context', 'input_price_pm': 'Input $/M', 'output_price_pm': 'Output $/M', 'knowledge_cutoff': 'Knowledge Cutoff',
+}
+# Benchmarks offered per search, however many problems the library holds.
+BENCHMARK_OPTIONS_LIMIT = 200
+
 
-def render(models: pd.DataFrame, benchmarks: pd.DataFrame, runs: pd.DataFrame):
+def _benchmark_picker():
+    """Searchable problem picker; returns {problem_id: title} of the picks. Only the matches and the current picks
+    reach the browser."""
+    db = store()
+    find = st.text_input("Find benchmarks", key="hub_bench_find", placeholder="Search by title or slug")
+    matches = db.query('problems', columns=['id', 'title'], limit=BENCHMARK_OPTIONS_LIMIT, search=(find, ('slug', 'title')))
+    # New options make a new widget, so the picks live under their own key and are handed back to it each run.
+    if "hub_bench_picked" not in st.session_state:
+        st.session_state.hub_bench_picked = [int(pid) for pid in matches['id'].head(2)]
+    picked = st.session_state.hub_bench_picked
+    titles = dict(zip(matches['id'].astype(int).tolist(), matches['title']))
+    missing = [pid for pid in picked if pid not in titles]
+    if missing:
+        known = db.query('problems', filters={'id': missing}, columns=['id', 'title'])
+        titles.update(zip(known['id'].astype(int).tolist(), known['title']))
+    st.session_state.hub_benchmarks = picked
+    st.multiselect("Select benchmarks to display:", list(dict.fromkeys([*picked, *titles])), key="hub_benchmarks",
+                   format_func=lambda pid: titles.get(pid, str(pid)),
+                   on_change=lambda: st.session_state.update(hub_bench_picked=st.session_state.hub_benchmarks))
+    return {pid: titles[pid] for pid in picked if pid in titles}
+
+
+def _parse_sizes(page):
+    """Context is stored as text ('128K'); the page gets it as integers so it sorts and formats as a number."""
+    index = page.column_names.index('context')
+    sizes = [parse_size(value) for value in page.column('context').to_pylist()]
+    return page.set_column(index, 'context', pa.array([None if size is pd.NA else size for size in sizes], type=pa.int64()))
+
+
+@st.fragment
+def render():
     st.markdown('<div id="models" class="section-anchor"></div>', unsafe_allow_html=True)
     st.header("Model Hub")
     st.write("Pick what to run with; manage configs.")
@@ -39,46 +82,33 @@ def render(models: pd.DataFrame, benchmarks: pd.DataFrame, runs: pd.DataFrame):
     """, unsafe_allow_html=True)
  
 
-    merged_data = pd.merge(runs, benchmarks, left_on='problem_id', right_on='id')
-     
-
-    model_id_to_name = models.set_index('Model').reset_index().reset_index().set_index('index')['Model']
-    merged_data['Model'] = merged_data['model_id'].map(model_id_to_name)
- 
-
-    pivot_df = merged_data.pivot_table(index='Model', columns='title', values='success_rate').reset_index()
- 
-
-    models_with_benchmarks = pd.merge(models, pivot_df, on='Model', how='left')
- 
-
-    all_benchmarks = benchmarks['title'].tolist()
-    selected_benchmarks = st.multiselect("Select benchmarks to display:", all_benchmarks, default=all_benchmarks[:2])
- 
+    selected_titles = pd.Series(_benchmark_picker(), dtype=object)
 
-    base_columns = ['Organization', 'Model', 'License', 'Parameters (B)', 'Context', 'Input $/M', 'Output $/M', 'Knowledge Cutoff']
-    columns_to_show = base_columns + selected_benchmarks
-     
+    c1, c2 = st.columns([3, 1])
+    metric = c1.radio("Metric", ["Success rate", "pass@k", "pass^k"], horizontal=True, key="hub_metric")
+    k = c2.number_input("k", min_value=1, max_value=max_pass_k(), value=1, key="hub_k", disabled=metric == "Success rate")
 
-    for bench in selected_benchmarks:
-        if bench not in models_with_benchmarks.columns:
-            models_with_benchmarks[bench] = pd.NA
- 
-    models_display = models_with_benchmarks[columns_to_show].copy()
-     
+    def with_scores(page):
+        """Appends one score column per selected problem for just the models on this page."""
+        page = _parse_sizes(page)
+        model_ids = page.column('id').to_pylist()
+        if metric == "Success rate":
+            cells, column, scale = model_problem_cells(problem_ids=selected_titles.index, model_ids=model_ids), 'mean_success', 1
+        else:
+            cells = pass_at_k_cells(selected_titles.index)
+            cells, column, scale = cells[cells['model_id'].isin(model_ids)], metric.replace('k', str(k)), 100
+        pivot = cells.pivot(index='model_id', columns='problem_id', values=column).reindex(
+            index=model_ids, columns=selected_titles.index)
+        for problem_id, title in selected_titles.items():
+            page = page.append_column(title, pa.array(pivot[problem_id].to_numpy(dtype='float64') * scale, from_pandas=True))
+        return page
 
-    st.dataframe(
-        models_display,
-        use_container_width=True,
-        hide_index=True,
+    paged_table(
+        'models', "hub", HUB_COLUMNS, search_columns=('name', 'organization'),
+        sortable=['name', 'organization', 'license', 'parameters_b', 'input_price_pm', 'output_price_pm', 'knowledge_cutoff'],
+        extend=with_scores,
         column_config={
-            "Organization": st.column_config.TextColumn("Organization"),
-            "Input $/M": st.column_config.TextColumn("Input $/M"),
-            "Output $/M": st.column_config.TextColumn("Output $/M"),
-            "Context": st.column_config.NumberColumn("Context", format="%.0f"),
-            **{bench: st.column_config.NumberColumn(bench, format="%.1f%%") for bench in selected_benchmarks}
-        }
+            "Context": st.column_config.NumberColumn("Context", format="compact"),
+            **{bench: st.column_config.NumberColumn(bench, format="%.1f%%") for bench in selected_titles},
+        },
     )
- 
-   
-   
\ No newline at end of file
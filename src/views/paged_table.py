@@ -0,0 +1,44 @@
+import math
+
+import streamlit as st
+
+from src.data import store
+
+PAGE_SIZE = 50
+
+
+def paged_table(table, key, columns, filters=None, search_columns=(), sortable=None, descending=False,
+                page_size=PAGE_SIZE, extend=None, column_config=None):
+    """Renders one page of a store table; filtering, text search, sorting and paging all run in SQLite.
+
+    `columns` maps store columns to display labels (None fetches a column without
+    showing it). Only the visible window is read, and it reaches st.dataframe as
+    an Arrow table built straight from the cursor, so the cost of a rerun does
+    not depend on the table size. `extend(page)` may append computed columns for
+    the rows on the page.
+    """
+    db = store()
+    sortable = list(sortable or [col for col, label in columns.items() if label is not None])
+
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    text = c1.text_input("Search", key=f"{key}_search", placeholder="Filter rows...") if search_columns else ""
+    order_by = c2.selectbox("Sort by", sortable, format_func=lambda col: columns.get(col) or col, key=f"{key}_sort")
+    descending = c3.toggle("Descending", value=descending, key=f"{key}_desc")
+    search = (text.strip(), list(search_columns)) if text.strip() else None
+
+    total = db.count(table, filters, search)
+    pages = max(1, math.ceil(total / page_size))
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = c4.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=page_key)
+
+    window = db.query_arrow(table, filters, list(columns), order_by=order_by, descending=descending,
+                            limit=page_size, offset=(page - 1) * page_size, search=search)
+    if extend is not None:
+        window = extend(window)
+    window = window.drop_columns([col for col, label in columns.items() if label is None])
+    window = window.rename_columns([columns.get(col) or col for col in window.column_names])
+    st.caption(f"{total} rows")
+    st.dataframe(window, use_container_width=True, hide_index=True, column_config=column_config)
+    return window
@@ -1,17 +1,116 @@
+import pyarrow as pa
 import streamlit as st
 import pandas as pd
 
-def render(problems: pd.DataFrame, runs: pd.DataFrame):
+from src import schema
+from src.costs import run_costs
+from src.data import PROBLEM_COLUMNS, RUN_STATUSES, benchmark_scores, leaderboard, max_pass_k, model_prices, model_registry, model_summary, pass_at_k_by_model, rescore_runs, store
+from src.scoring import AGGREGATIONS, METRICS
+from src.views.paged_table import paged_table
+
+PROBLEM_TABLE_COLUMNS = {col: col for col in PROBLEM_COLUMNS}
+RUN_TABLE_COLUMNS = {col: col for col in [
+    'id', 'problem_id', 'model_id', 'environment_id', 'benchmark_id', 'status', 'solved', 'ttf', 'tokens', 'cost',
+    'success_rate', 'flag_found', 'params', 'artifacts', 'logs', 'timestamps',
+]}
+RUN_SORTABLE = ['id', 'problem_id', 'model_id', 'status', 'ttf', 'tokens', 'cost', 'success_rate']
+
+
+def _with_estimates(page):
+    """Token-derived dollar cost and latency for the runs on this page."""
+    tokens = page.column('tokens').to_numpy(zero_copy_only=False)
+    cost, latency = run_costs(page.column('model_id').to_numpy(zero_copy_only=False), tokens, model_prices())
+    return page.append_column('est_cost_usd', pa.array(cost, from_pandas=True)).append_column(
+        'est_latency_s', pa.array(latency, from_pandas=True))
+
+
+@st.fragment
+def render():
     st.markdown('<div id="problems_results" class="section-anchor"></div>', unsafe_allow_html=True)
     st.header("Problems & Results")
     tab1, tab2, tab3 = st.tabs(["Problem Library", "Results & Analytics", "Leaderboards"])
     with tab1:
         st.subheader("Problem Library")
-        st.dataframe(problems)
+        c1, c2 = st.columns(2)
+        category = c1.selectbox("Category", ["All", *store().distinct('problems', 'category')], key="pl_category")
+        difficulty = c2.selectbox("Difficulty", ["All", *store().distinct('problems', 'difficulty')], key="pl_difficulty")
+        filters = {
+            'category': None if category == "All" else category,
+            'difficulty': None if difficulty == "All" else difficulty,
+        }
+        paged_table('problems', "pl", PROBLEM_TABLE_COLUMNS, filters, search_columns=('title', 'slug'),
+                    sortable=['id', 'title', 'category', 'difficulty', 'scorer'])
     with tab2:
         st.subheader("Results & Analytics")
         st.write("Charts and data export will be here.")
-        st.dataframe(runs)
+        st.dataframe(model_summary(), hide_index=True)
+        c1, c2 = st.columns([1, 3])
+        scan_logs = c2.checkbox("Also credit flags found in transcripts", key="res_scan_logs")
+        if c1.button("Rescore runs", key="res_rescore", help="Re-check every submitted flag against the problems' current flag configs."):
+            changed = rescore_runs(scan_logs=scan_logs)
+            st.toast(f"Rescored runs: {changed} verdict(s) changed.")
+
+        c1, c2 = st.columns(2)
+        registry = model_registry()
+        model = c1.selectbox("Model", ["All", *(info.name for info in registry)], key="res_model")
+        status = c2.selectbox("Status", ["All", *RUN_STATUSES], key="res_status")
+        filters = {
+            'model_id': None if model == "All" else registry.id(model),
+            'status': None if status == "All" else status,
+        }
+        paged_table('runs', "res", RUN_TABLE_COLUMNS, filters, search_columns=('flag_found',),
+                    sortable=RUN_SORTABLE, descending=True, extend=_with_estimates,
+                    column_config={"est_cost_usd": st.column_config.NumberColumn("Est. cost", format="$%.4f"),
+                                   "est_latency_s": st.column_config.NumberColumn("Est. latency (s)", format="%.1f")})
+
+        with st.expander("Memory footprint"):
+            st.caption("Deep memory of each cached frame before and after the dtype schema is applied.")
+            st.dataframe(schema.memory_report(), hide_index=True, column_config={
+                "saved_pct": st.column_config.NumberColumn("Saved", format="%.1f%%"),
+            })
     with tab3:
         st.subheader("Leaderboards")
-        st.write("Rankings for models and problems will be here.")
\ No newline at end of file
+        benchmarks = store().query('benchmarks', columns=['id', 'name'])
+        options = {"All problems": None, **dict(zip(benchmarks['name'], benchmarks['id'].tolist()))}
+        c1, c2, c3 = st.columns([2, 2, 1])
+        choice = c1.selectbox("Benchmark", list(options), key="lb_benchmark")
+        group_by = c2.radio("Rank", ["Overall", "Per category"], horizontal=True, key="lb_group")
+        k = c3.number_input("k", min_value=1, max_value=max_pass_k(), value=1, key="lb_k")
+
+        by_category = group_by == "Per category"
+        board = leaderboard(options[choice], by_category=by_category)
+        board = board.merge(pass_at_k_by_model(k, options[choice], by_category), on=['group', 'model_id'], how='left')
+        board = board.assign(Model=model_registry().map_names(board['model_id']))
+        st.caption("Solve rate over reruns with approximate 95% bootstrap intervals: problems are resampled (within each "
+                   "category when grouped) and rerun noise uses a normal approximation, so treat the bounds as a guide. "
+                   "Unbiased pass@k and pass^k over problems with at least k reruns.")
+        st.dataframe(
+            board[['group', 'rank', 'Model', 'solve_rate', 'ci_low', 'ci_high', f'pass@{k}', f'pass^{k}', 'problems', 'runs']],
+            hide_index=True,
+            column_config={
+                "group": st.column_config.TextColumn("Group"),
+                "rank": st.column_config.NumberColumn("Rank"),
+                "solve_rate": st.column_config.NumberColumn("Solve rate", format="percent"),
+                "ci_low": st.column_config.NumberColumn("CI low (approx.)", format="percent"),
+                "ci_high": st.column_config.NumberColumn("CI high (approx.)", format="percent"),
+                f"pass@{k}": st.column_config.NumberColumn(f"pass@{k}", format="percent"),
+                f"pass^{k}": st.column_config.NumberColumn(f"pass^{k}", format="percent"),
+            },
+        )
+
+        st.markdown("**Weighted benchmark score**")
+        aggregation = st.selectbox("Aggregation", ["Benchmark default", *AGGREGATIONS], key="lb_aggregation")
+        scores = benchmark_scores(options[choice], aggregation=None if aggregation == "Benchmark default" else aggregation)
+        scores = scores.assign(Model=model_registry().map_names(scores['model_id']))
+        st.caption("Each metric is scored from 0 to 1 (times and costs against the benchmark's limits or the worst model) "
+                   "and combined with the benchmark's metric weights.")
+        st.dataframe(
+            scores[['group', 'rank', 'Model', 'score', *METRICS, 'problems', 'runs']],
+            hide_index=True,
+            column_config={
+                "group": st.column_config.TextColumn("Group"),
+                "rank": st.column_config.NumberColumn("Rank"),
+                "score": st.column_config.NumberColumn("Score", format="%.3f"),
+                **{name: st.column_config.NumberColumn(name, format="%.2f") for name in METRICS},
+            },
+        )
@@ -0,0 +1,37 @@
+import time
+
+import streamlit as st
+
+from src.data import model_registry, store
+from src.search import HIGHLIGHT, search_runs
+
+
+def render():
+    """Full-text search over run outputs (logs, artifacts, submitted flags), ranked by BM25."""
+    st.subheader("Search Run Outputs")
+    st.caption(f"Every term must match; \"quote\" phrases and end a term with `*` for a prefix. "
+               f"Matches are shown between {HIGHLIGHT[0]} and {HIGHLIGHT[1]}.")
+
+    c1, c2, c3 = st.columns([3, 2, 1])
+    text = c1.text_input("Query", key="search_query", placeholder="e.g. __libc_start_main  0xdeadbeef  \"stack smashing\"")
+    registry = model_registry()
+    model = c2.selectbox("Model", ["All", *(info.name for info in registry)], key="search_model")
+    k = c3.number_input("Top k", min_value=1, max_value=200, value=20, key="search_k")
+    if not text.strip():
+        return
+
+    # Go through data.store() so the demo data is seeded before the first search.
+    started = time.perf_counter()
+    hits = search_runs(text, k=k, model_id=None if model == "All" else registry.id(model), store=store())
+    elapsed = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(hits)} run(s) in {elapsed:.0f} ms")
+    if hits.empty:
+        st.info("No run output matches this query.")
+        return
+    hits['model'] = registry.map_names(hits['model_id'])
+    st.dataframe(hits[['id', 'problem_id', 'model', 'status', 'score', 'snippet']], hide_index=True, column_config={
+        "id": st.column_config.NumberColumn("Run"),
+        "problem_id": st.column_config.NumberColumn("Problem"),
+        "score": st.column_config.NumberColumn("BM25", format="%.3f"),
+        "snippet": st.column_config.TextColumn("Snippet", width="large"),
+    })
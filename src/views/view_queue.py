@@ -2,22 +2,71 @@ import streamlit as st
 import pandas as pd
 import time
 
-def render(running_jobs, queued_jobs):
+from src.cache import VersionedCache
+from src.data import load_queue_data, model_registry
+from src.scheduler import get_scheduler
+from src.wait_times import RuntimeModel, predict
+
+# Wait estimates of the current queue, rebuilt when the jobs table changes (a refresh that starts nothing reuses them).
+_estimates = VersionedCache()
+
+
+def _ago(timestamps, now):
+    """'5m ago'-style labels for epoch seconds."""
+    minutes = ((now - timestamps) // 60).clip(lower=0)
+    return minutes.map(lambda m: "—" if pd.isna(m) else f"{int(m)}m ago" if m < 120 else f"{int(m // 60)}h ago")
+
+
+def _eta(seconds):
+    """'~12m'-style label for a wait in seconds."""
+    if pd.isna(seconds):
+        return "—"
+    minutes = max(seconds, 0) / 60
+    return "now" if minutes < 1 else f"~{minutes:.0f}m" if minutes < 120 else f"~{minutes / 60:.1f}h"
+
+
+def _estimate(scheduler, probe=None):
+    """predict() for the current queue (plus `probe`), cached on the jobs generation."""
+    version = scheduler.store.generation('jobs')
+    model = _estimates.get('model', version, lambda: RuntimeModel.fit(scheduler.store))
+    if probe is None:
+        return _estimates.get('queue', version, lambda: predict(scheduler, model))
+    # One probe entry, rebuilt when the queue or the probed job changes.
+    return _estimates.get('probe', (version, *sorted(probe.items())), lambda: predict(scheduler, model, probe=probe))
+
+
+def _filter(jobs, benchmark, model_id, user):
+    if benchmark != "All":
+        jobs = jobs[jobs['benchmark'] == benchmark]
+    if model_id is not None:
+        jobs = jobs[jobs['model_id'] == model_id]
+    if user:
+        jobs = jobs[jobs['user'].fillna('').str.contains(user, case=False, regex=False)]
+    return jobs
+
+
+@st.fragment
+def render():
     """
     Renders the view queue page.
     """
     st.markdown('<div id="view_queue" class="section-anchor"></div>', unsafe_allow_html=True)
     st.header("Job Queue")
 
+    # Read-only: the scheduler service (start_service) admits and reaps jobs in the background.
+    scheduler = get_scheduler()
+    running, queued = load_queue_data()
+    registry = model_registry()
 
     with st.container():
         c1, c2, c3 = st.columns(3)
         with c1:
-            st.selectbox("Filter by Benchmark", ["All", "Benchmark A", "Benchmark B"], key="queue_filter_bm")
+            benchmarks = sorted(set(running['benchmark'].dropna()) | set(queued['benchmark'].dropna()))
+            benchmark = st.selectbox("Filter by Benchmark", ["All", *benchmarks], key="queue_filter_bm")
         with c2:
-            st.selectbox("Filter by Model", ["All", "Model X", "Model Y"], key="queue_filter_model")
+            model_filter = st.selectbox("Filter by Model", ["All", *(info.name for info in registry)], key="queue_filter_model")
         with c3:
-            st.text_input("Filter by User", key="queue_filter_user", placeholder="Username...")
+            user = st.text_input("Filter by User", key="queue_filter_user", placeholder="Username...")
 
     st.divider()
 
@@ -26,48 +75,76 @@ def render(running_jobs, queued_jobs):
         col1, col2 = st.columns([1, 1])
         with col1:
             st.subheader("System Status")
+            jobs = scheduler.active()
+            utilization = scheduler.utilization(jobs)
             sc1, sc2, sc3 = st.columns(3)
-            sc1.metric("GPU Utilization", "78%", "-2%")
-            sc2.metric("CPU Utilization", "54%", "+5%")
-            sc3.metric("Active Jobs", "3")
+            sc1.metric("GPU Utilization", f"{utilization['gpus']:.0%}")
+            sc2.metric("CPU Utilization", f"{utilization['cpu']:.0%}")
+            sc3.metric("Active Jobs", str(len(running)), f"{len(queued)} queued", delta_color="off")
             if st.button("Refresh", key="queue_refresh"):
                 st.rerun()
-            st.caption(f"Last updated: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            st.caption(f"Last updated: {time.strftime('%Y-%m-%d %H:%M:%S')} · {len(scheduler.workers)} workers")
 
-        with col2:
-            st.subheader("Estimated Wait Time")
-            st.info("Your job would be **#2** in the queue. Estimated start in **~5 minutes**.")
+    now = time.time()
+    model_id = None if model_filter == "All" else registry.id(model_filter)
+    estimates = _estimate(scheduler).set_index('id')
 
-    st.divider()
+    with col2:
+        st.subheader("Estimated Wait Time")
+        mine = queued.loc[_filter(queued, benchmark, model_id, user).index] if user else queued.iloc[:0]
+        mine = estimates.reindex(mine['id']).dropna(subset=['position'])
+        if len(mine):
+            job_id, job = next(mine.sort_values('position').iterrows())
+            label = f"Job **J-{job_id}** is"
+        else:
+            # A job like the one Create Benchmark would submit now.
+            state = st.session_state
+            probe = {'user': user or None, 'priority': int(state.get('bm_priority', 0)), 'model_id': model_id,
+                     'cpu': int(state.get('bm_env_cpu', 2)), 'memory_gb': float(state.get('bm_env_mem', 4)),
+                     'disk_gb': float(state.get('bm_env_disk', 4)), 'gpu': state.get('bm_env_gpu', 'none'),
+                     'profile': state.get('bm_env_profile')}
+            job = _estimate(scheduler, probe).set_index('id').loc[0]
+            label = "A new job would be"
+        if pd.isna(job['expected_start']):
+            st.warning(f"{label} **#{int(job['position'])}** in the queue but fits no worker.")
+        else:
+            st.info(f"{label} **#{int(job['position'])}** in the queue. Estimated start in "
+                    f"**{_eta(job['expected_start'] - now)}** (90% by {_eta(job['p90_start'] - now)}).")
+        st.caption("From the run times of finished jobs of the same model, benchmark and environment profile.")
 
+    st.divider()
 
     st.subheader("Running Jobs")
 
-    running_data = {
-        'Job ID': ['job-123', 'job-456', 'job-789'],
-        'User': ['user-a', 'user-b', 'user-a'],
-        'Model': ['Model X', 'Model Y', 'Model X'],
-        'Benchmark': ['Benchmark A', 'Benchmark B', 'Benchmark A'],
-        'Profile': ['Kali', 'Python', 'Kali'],
-        'GPU': ['A100', 'None', 'RTX'],
-        'Network': ['Egress', 'Full', 'Egress'],
-        'Started': ['5m ago', '12m ago', '20m ago'],
-        'Progress %': [75, 50, 25]
-    }
-    running_df = pd.DataFrame(running_data)
+    running_df = pd.DataFrame({
+        'Job ID': "J-" + running['id'].astype(str),
+        'User': running['user'],
+        'Model': registry.map_names(running['model_id']),
+        'Benchmark': running['benchmark'],
+        'Profile': running['profile'],
+        'GPU': running['gpu'],
+        'Network': running['network'],
+        'Worker': running['worker'],
+        'Started': _ago(running['started_at'], now),
+        'Progress %': (100 * running['done'] / running['tasks'].where(running['tasks'] > 0)).fillna(0).round().astype('int64'),
+    })
+    running_df = running_df.loc[_filter(running, benchmark, model_id, user).index]
     st.dataframe(running_df, use_container_width=True, hide_index=True)
 
 
     st.subheader("Queued Jobs")
 
-    queued_data = {
-        'Position': [1, 2, 3, 4],
-        'User': ['user-c', 'user-d', 'user-e', 'user-f'],
-        'Model': ['Model Z', 'Model Y', 'Model X', 'Model Z'],
-        'Benchmark': ['Benchmark C', 'Benchmark B', 'Benchmark A', 'Benchmark C'],
-        'Profile': ['Custom', 'Python', 'Kali', 'Custom'],
-        'Requested At': ['2m ago', '8m ago', '15m ago', '30m ago'],
-        'Est. Start': ['~2m', '~5m', '~10m', '~15m']
-    }
-    queued_df = pd.DataFrame(queued_data)
-    st.dataframe(queued_df, use_container_width=True, hide_index=True)
\ No newline at end of file
+    queued_estimates = estimates.reindex(queued['id'])
+    queued_df = pd.DataFrame({
+        'Position': queued_estimates['position'].astype('Int64').to_numpy(),
+        'User': queued['user'],
+        'Model': registry.map_names(queued['model_id']),
+        'Benchmark': queued['benchmark'],
+        'Profile': queued['profile'],
+        'Priority': queued['priority'],
+        'Requested At': _ago(queued['created_at'], now),
+        'Est. Start': (queued_estimates['expected_start'] - now).map(_eta).to_numpy(),
+        'P90 Start': (queued_estimates['p90_start'] - now).map(_eta).to_numpy(),
+    }, index=queued.index)
+    queued_df = queued_df.loc[_filter(queued, benchmark, model_id, user).index].sort_values('Position')
+    st.dataframe(queued_df, use_container_width=True, hide_index=True)
@@ -0,0 +1,273 @@
+import heapq
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.plans import RESULT_STATUSES
+from src.scheduler import _ACTIVE_COLUMNS, RESOURCES, _select, job_arrays, queue_order
+
+# Keys a runtime distribution is learned under, most specific first; a job uses the first one with enough history.
+LEVELS = (('model_id', 'benchmark_id', 'profile'), ('model_id', 'profile'), ('profile',), ())
+MIN_SAMPLES = 5
+# Finished jobs the estimator learns from, most recent first.
+HISTORY = 5000
+REPLICATES = 16
+# Without any history a task is assumed log-normal around two minutes.
+PRIOR_TASK_S = 120.0
+PRIOR_SIGMA = 1.0
+# Passes are replayed on this grid, coarser than the scheduler service's interval, so jobs ending close together
+# are released in one pass instead of one pass each.
+PASS_S = 60.0
+# A running job already past every duration on record is assumed this fraction of its elapsed time from done.
+OVERDUE = 0.1
+
+PREDICTION_COLUMNS = ['id', 'position', 'expected_wait_s', 'p90_wait_s', 'expected_start', 'p90_start']
+_EXTRA_COLUMNS = ('model_id', 'benchmark_id', "json_extract(payload, '$.profile')",
+                  "json_array_length(payload, '$.tasks')", "json_extract(payload, '$.params.wallclock_sec')", 'started_at')
+
+
+class RuntimeModel:
+    """Per-task run time distributions of finished jobs, by (model, benchmark, environment profile).
+
+    A job's per-task time is its wall time (admission to its last stored
+    result) over its task count; each key keeps the sorted per-task times
+    of its jobs and draws from their empirical quantile function. Keys with
+    fewer than MIN_SAMPLES jobs back off to the coarser keys in LEVELS, down
+    to all jobs and finally a log-normal prior.
+    """
+
+    def __init__(self, history=None):
+        history = pd.DataFrame(columns=['model_id', 'benchmark_id', 'profile', 'per_task_s']) if history is None else history
+        self.samples = {}
+        for level in LEVELS:
+            groups = history.groupby(list(level), dropna=False)['per_task_s'] if level else [((), history['per_task_s'])]
+            for key, values in groups:
+                if len(values) >= MIN_SAMPLES:
+                    key = key if isinstance(key, tuple) else (key,)
+                    self.samples[(level, tuple(None if pd.isna(k) else k for k in key))] = np.sort(values.to_numpy(dtype='float64'))
+        quantiles = np.sort(np.random.default_rng(0).standard_normal(256))
+        self.prior = PRIOR_TASK_S * np.exp(PRIOR_SIGMA * quantiles)
+
+    @classmethod
+    def fit(cls, store, limit=HISTORY):
+        """Learns from the `limit` most recently finished jobs. A job's wall time ends at its last task's result
+        (runs.completed_at), not when the scheduler noticed the job was done."""
+        statuses = ', '.join(f"'{status}'" for status in RESULT_STATUSES)
+        rows = store.connection().execute(
+            "SELECT j.model_id, j.benchmark_id, json_extract(j.payload, '$.profile'), "
+            "(MAX(r.completed_at) - j.started_at) / MAX(json_array_length(j.payload, '$.tasks'), 1) "
+            "FROM (SELECT id, model_id, benchmark_id, payload, started_at FROM jobs "
+            "      WHERE status = 'finished' AND started_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?) AS j "
+            "JOIN json_each(j.payload, '$.tasks') AS t "
+            "JOIN runs AS r ON r.task_hash = json_extract(t.value, '$[0]') "
+            f"  AND r.status IN ({statuses}) AND r.completed_at >= j.started_at "
+            "GROUP BY j.id", (limit,)).fetchall()
+        return cls(pd.DataFrame(rows, columns=['model_id', 'benchmark_id', 'profile', 'per_task_s']))
+
+    def distribution(self, model_id, benchmark_id, profile):
+        """Sorted per-task times for a job's key (the prior when no level has enough history)."""
+        fields = {'model_id': model_id, 'benchmark_id': benchmark_id, 'profile': profile}
+        for level in LEVELS:
+            values = self.samples.get((level, tuple(fields[name] for name in level)))
+            if values is not None:
+                return values
+        return self.prior
+
+    def durations(self, jobs, rng, replicates=REPLICATES, elapsed=None):
+        """(replicates, n) sampled wall times of `jobs` (arrays with model_id, benchmark_id, profile, tasks and
+        wallclock). With `elapsed`, draws are conditioned on the job still running and are the time remaining."""
+        n = len(jobs['tasks'])
+        u = rng.random((replicates, n))
+        out = np.empty((replicates, n))
+        groups = {}
+        for i, key in enumerate(zip(jobs['model_id'].tolist(), jobs['benchmark_id'].tolist(), jobs['profile'].tolist())):
+            groups.setdefault(key, []).append(i)
+        for key, members in groups.items():
+            values = self.distribution(*key)
+            members = np.array(members)
+            tasks = jobs['tasks'][members]
+            per_task = np.minimum(values[None, :], jobs['wallclock'][members][:, None])
+            grid = np.arange(per_task.shape[1]) / max(per_task.shape[1] - 1, 1)
+            if elapsed is None:
+                lower = np.zeros(len(members))
+            else:
+                # Quantile the elapsed time sits at: a job that is still running is drawn from the tail past it.
+                lower = np.array([np.searchsorted(row, e / t, side='right') / len(row) for row, e, t in
+                                  zip(per_task, elapsed[members], tasks)])
+            for column, (row, low) in enumerate(zip(per_task, lower)):
+                q = low + (1.0 - low) * u[:, members[column]]
+                out[:, members[column]] = np.interp(q, grid, row) * tasks[column]
+        if elapsed is not None:
+            out = np.maximum(out - elapsed[None, :], OVERDUE * elapsed[None, :])
+        return out
+
+
+def _job_columns(rows):
+    """job_arrays() of active job rows (_ACTIVE_COLUMNS then _EXTRA_COLUMNS) plus the runtime-model fields."""
+    base = len(_ACTIVE_COLUMNS)
+    jobs = job_arrays([row[:base] for row in rows])
+    extra = list(zip(*(row[base:] for row in rows))) if rows else [()] * len(_EXTRA_COLUMNS)
+    jobs.update(
+        model_id=np.array(extra[0], dtype=object),
+        benchmark_id=np.array(extra[1], dtype=object),
+        profile=np.array(extra[2], dtype=object),
+        tasks=np.array([max(value or 1, 1) for value in extra[3]], dtype='float64'),
+        wallclock=np.array([value or np.inf for value in extra[4]], dtype='float64'),
+        started_at=np.array([np.nan if value is None else value for value in extra[5]], dtype='float64'),
+    )
+    return jobs
+
+
+def _blocks(queued, positions):
+    """Queued positions by priority (descending), then user, each user's in FIFO order, and every position's
+    FIFO rank: the structure queue_order() walks, kept so a replay can re-walk it after every change."""
+    fifo = [p for p in np.lexsort((queued['id'], queued['created_at'], -queued['priority'])).tolist() if p in positions]
+    rank = dict(zip(fifo, range(len(fifo))))
+    blocks = {}
+    for position in fifo:
+        blocks.setdefault(int(queued['priority'][position]), {}).setdefault(queued['user'][position], []).append(position)
+    return [blocks[priority] for priority in sorted(blocks, reverse=True)], rank
+
+
+def _replay(scheduler, free, usage, running, blocks, rank, queued, shapes, durations):
+    """One replicate of the queue draining; start times (seconds from now) per queued position, NaN when never.
+
+    Each pass re-walks the Dominant Resource Fairness order from the
+    current usage exactly as queue_order() does, placing with
+    Scheduler.place(); shapes (request and GPU type) that fit no worker are
+    skipped without a placement attempt, the first job that does not fit
+    holds a worker (Scheduler.reserve()) for the rest of the pass, and the
+    pass stops once every shape still waiting has failed to fit. Passes run
+    every PASS_S seconds that something has ended in.
+    `running` holds (seconds left, slot, request, share, user) per running
+    job; shares are requests over the pool totals, as plain floats.
+    """
+    requests, shares, gpus = queued['requests'], queued['shares'], queued['gpu']
+    shape_requests, shape_gpu_ok = shapes['requests'], shapes['gpu_ok']
+    free = free.copy()
+    usage = dict(usage)
+    blocks = [{user: list(positions) for user, positions in block.items()} for block in blocks]
+    waiting = Counter(shapes['of'][p] for block in blocks for positions in block.values() for p in positions)
+    ends = [(left, -i - 1, slot, request, share, user) for i, (left, slot, request, share, user) in enumerate(running)]
+    heapq.heapify(ends)
+    start = np.full(len(requests), np.nan)
+    zero = [0.0] * len(RESOURCES)
+    now = 0.0
+    while waiting:
+        fits = ((free[None, :, :] >= shape_requests[:, None, :]).all(axis=2) & shape_gpu_ok).any(axis=1)
+        blocked = {shape for shape in waiting if not fits[shape]}
+        local, started, held = dict(usage), set(), None
+        for block in blocks:
+            if len(blocked) == len(waiting):
+                break
+            heap = [(max(local.get(user, zero)), rank[positions[0]], user, 0) for user, positions in block.items() if positions]
+            heapq.heapify(heap)
+            while heap and len(blocked) < len(waiting):
+                _, _, user, index = heapq.heappop(heap)
+                positions = block[user]
+                position = positions[index]
+                shape = shapes['of'][position]
+                slot = None if shape in blocked else scheduler.place(requests[position], gpus[position], free)
+                if slot is None:
+                    blocked.add(shape)
+                    if held is None:
+                        # Scheduler.schedule() reserves a worker for the first job that does not fit.
+                        held = scheduler.reserve(requests[position], gpus[position], free), requests[position]
+                        free[held[0]] -= held[1]
+                else:
+                    free[slot] -= requests[position]
+                    start[position] = now
+                    started.add(position)
+                    usage[user] = [a + b for a, b in zip(usage.get(user, zero), shares[position])]
+                    heapq.heappush(ends, (now + durations[position], position, slot, requests[position], shares[position], user))
+                    waiting[shape] -= 1
+                    if not waiting[shape]:
+                        del waiting[shape]
+                share = local[user] = [a + b for a, b in zip(local.get(user, zero), shares[position])]
+                if index + 1 < len(positions):
+                    heapq.heappush(heap, (max(share), rank[positions[index + 1]], user, index + 1))
+            if started:
+                for user, positions in block.items():
+                    block[user] = [p for p in positions if p not in started]
+        if held is not None:
+            free[held[0]] += held[1]
+        if not waiting or not ends:
+            break
+        now = np.ceil(ends[0][0] / PASS_S) * PASS_S
+        while ends and ends[0][0] <= now:
+            _, _, slot, request, share, user = heapq.heappop(ends)
+            free[slot] += request
+            usage[user] = [a - b for a, b in zip(usage[user], share)]
+    return start
+
+
+def predict(scheduler, model, now=None, probe=None, replicates=REPLICATES, seed=0):
+    """Queue position, expected and P90 start of every queued job; one row per job in PREDICTION_COLUMNS.
+
+    Running jobs get their remaining time drawn from `model` given how
+    long they have run and queued jobs their full run time; each of
+    `replicates` draws is then replayed (see _replay) with the scheduler's
+    fair-share order, best-fit placement and backfill, and start times are
+    summarized across replicates. Positions are queue_order() now, as
+    Scheduler.positions() reports them. `probe` (a dict of job columns:
+    user, priority, cpu, memory_gb, disk_gb, gpu, model_id, benchmark_id,
+    profile, tasks, wallclock_sec) adds a hypothetical job with id 0,
+    submitted now, to answer "when would a new job start". Jobs that fit no
+    worker get NaN starts. A fixed seed keeps estimates steady across
+    refreshes of an unchanged queue.
+    """
+    now = time.time() if now is None else now
+    rows = scheduler.store.connection().execute(
+        f"SELECT {', '.join(_ACTIVE_COLUMNS)}, {', '.join(_EXTRA_COLUMNS)} FROM jobs WHERE status IN ('queued', 'running')"
+    ).fetchall()
+    if probe is not None:
+        rows.append((0, probe.get('user'), 'queued', probe.get('priority'), probe.get('cpu'), probe.get('memory_gb'),
+                     probe.get('disk_gb'), probe.get('gpu'), None, now, probe.get('model_id'), probe.get('benchmark_id'),
+                     probe.get('profile'), probe.get('tasks'), probe.get('wallclock_sec'), None))
+    jobs = _job_columns(rows)
+    is_queued = jobs['status'] == 'queued'
+    queued, running = _select(jobs, is_queued), _select(jobs, ~is_queued)
+    if not is_queued.any():
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    free, usage = scheduler.free_capacity(running)
+    requests, gpus = queued['requests'], queued['gpu']
+    order = list(queue_order(queued, usage, scheduler.totals))
+    position = np.empty(len(order), dtype='int64')
+    position[order] = np.arange(1, len(order) + 1)
+    blocks, rank = _blocks(queued, set(np.flatnonzero(scheduler.possible(requests, gpus)).tolist()))
+
+    rng = np.random.default_rng(seed)
+    slots = {worker.name: i for i, worker in enumerate(scheduler.workers)}
+    scale = np.where(scheduler.totals > 0, scheduler.totals, 1)
+    usage = {user: (used / scale).tolist() for user, used in usage.items()}
+    elapsed = np.nan_to_num(np.maximum(now - running['started_at'], 0.0))
+    left = model.durations(running, rng, replicates, elapsed)
+    durations = model.durations(queued, rng, replicates)
+    placed = [(i, slots[worker], running['requests'][i], (running['requests'][i] / scale).tolist(), running['user'][i])
+              for i, worker in enumerate(running['worker']) if worker in slots]
+    queued['shares'] = (requests / scale).tolist()
+    keys = [(*request, gpu) for request, gpu in zip(requests.tolist(), gpus)]
+    unique = list(dict.fromkeys(keys))
+    index = {key: i for i, key in enumerate(unique)}
+    shapes = {
+        'of': [index[key] for key in keys],
+        'requests': np.array([key[:-1] for key in unique], dtype='float64').reshape(-1, len(RESOURCES)),
+        # Whether each worker offers the shape's GPU type (any worker, for CPU-only shapes).
+        'gpu_ok': np.array([[not key[3] or gpu == key[-1] for gpu in scheduler.gpu_types] for key in unique], dtype=bool),
+    }
+    starts = np.vstack([
+        _replay(scheduler, free, usage, [(left[r, i], slot, request, share, user) for i, slot, request, share, user in placed],
+                blocks, rank, queued, shapes, durations[r])
+        for r in range(replicates)
+    ])
+    expected, p90 = starts.mean(axis=0), np.quantile(starts, 0.9, axis=0)
+    return pd.DataFrame({
+        'id': queued['id'],
+        'position': position,
+        'expected_wait_s': expected,
+        'p90_wait_s': p90,
+        'expected_start': now + expected,
+        'p90_start': now + p90,
+    })
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Modules resolve their data directory at import time; keep the suite's store, blobs and snapshots out of ./data.
+os.environ.setdefault('AUBCTF_DATA_DIR', tempfile.mkdtemp(prefix='aubctf-tests-'))
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from src.aggregates import ModelProblemMatrix
+from src.pass_at_k import cells_pass_at_k
+
+
+def _runs(statuses, solved):
+    n = len(statuses)
+    return pd.DataFrame({
+        'model_id': [1] * n, 'problem_id': [7] * n, 'status': statuses, 'solved': pd.array(solved, dtype='boolean'),
+        'success_rate': [100.0 if s else 0.0 for s in solved], 'ttf': [30.0] * n, 'tokens': [100] * n, 'cost': [0.01] * n,
+    })
+
+
+def test_only_finished_runs_are_attempts():
+    runs = _runs(['running', 'succeeded', 'error', 'failed', 'succeeded'], [None, True, None, False, True])
+    cell = ModelProblemMatrix(runs).cells().iloc[0]
+    assert cell['count'] == 3 and cell['solves'] == 2
+    assert np.isclose(cell['solve_rate'], 2 / 3)
+    # The first *finished* run decides first-try pass, not the earlier running one.
+    assert cell['first_solves'] == 1
+
+
+def test_pass_at_k_sees_the_same_attempts():
+    matrix = ModelProblemMatrix(_runs(['error', 'failed', 'succeeded', 'running'], [None, False, True, None]))
+    cells = cells_pass_at_k(matrix.cells())
+    assert np.isclose(cells['pass@1'].iloc[0], 0.5)
+    assert 'pass@3' not in cells
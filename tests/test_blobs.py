@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from src.blobs import BlobStore
+from src.data import store
+
+
+@pytest.mark.parametrize('data', [b'', b'\x7fELF' + bytes(range(256)) * 64])
+def test_open_yields_a_memoryview_for_every_size(tmp_path, data):
+    blobs = BlobStore(store(), root=str(tmp_path))
+    digest = blobs.put_stream(io.BytesIO(data))
+    with blobs.open(digest) as view:
+        assert isinstance(view, memoryview)
+        assert view.readonly
+        assert view.tobytes() == data
+    with pytest.raises(ValueError):
+        view.tobytes()
+
+
+def test_put_refreshes_an_unreferenced_blob_so_gc_spares_it(tmp_path):
+    blobs = BlobStore(store(), root=str(tmp_path))
+    digest = blobs.put_stream(io.BytesIO(b'shared attachment'))
+    conn = store().connection()
+    with conn:
+        conn.execute('UPDATE blobs SET created_at = 0 WHERE sha256 = ?', (digest,))
+    # Stored again (e.g. by a new CTF) before its attach(): a gc() in between must not collect it.
+    assert blobs.put_stream(io.BytesIO(b'shared attachment'), digest) == digest
+    assert blobs.gc() == (0, 0)
+    assert blobs.exists(digest)
+
+
+def test_gc_counts_only_what_it_deleted(tmp_path):
+    blobs = BlobStore(store(), root=str(tmp_path))
+    kept, dropped = (blobs.put_stream(io.BytesIO(data)) for data in (b'kept blob', b'dropped blob'))
+    conn = store().connection()
+    with conn:
+        conn.execute('UPDATE blobs SET created_at = 0 WHERE sha256 IN (?, ?)', (kept, dropped))
+    blobs.attach(1, [(kept, 'kept.bin', 'other')])
+    assert blobs.gc() == (1, len(b'dropped blob'))
+    assert blobs.exists(kept) and not blobs.exists(dropped)
+    blobs.detach(1)
+
+
+def test_attach_refuses_blobs_that_are_not_stored(tmp_path):
+    blobs = BlobStore(store(), root=str(tmp_path))
+    with pytest.raises(LookupError):
+        blobs.attach(1, [('0' * 64, 'missing.bin', 'other')])
+    assert store().connection().execute("SELECT COUNT(*) FROM attachments WHERE name = 'missing.bin'").fetchone() == (0,)
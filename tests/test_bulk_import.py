@@ -0,0 +1,111 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from src import bulk_import
+from src.blobs import BlobStore
+from src.bulk_import import import_zip
+from src.data import store
+from src.validation import manifest_errors, normalize_manifest, validate_payload
+
+
+def _manifest(slug, **problem):
+    return {'basics': {'title': slug.title(), 'slug': slug}, 'problem': {'statement_md': f'Solve {slug}.', **problem}}
+
+
+def _archive(challenges):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        for directory, manifest, files in challenges:
+            zf.writestr(f'{directory}/challenge.json', manifest if isinstance(manifest, str) else json.dumps(manifest))
+            for name, data in files.items():
+                zf.writestr(f'{directory}/{name}', data)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize('manifest', [
+    {'basics': 'not an object'},
+    {'problem': {'flag_config': 'flag{x}'}},
+])
+def test_manifest_sections_of_the_wrong_type_are_errors(manifest):
+    assert manifest_errors(manifest)
+
+
+@pytest.mark.parametrize('flag_config', [
+    {'type': 'Multiple', 'list': [1, 2]},
+    {'type': 'Static', 'value': 42},
+    {'type': 'Multiple', 'list': {'a': 1}},
+])
+def test_mistyped_flag_config_is_invalid(flag_config):
+    payload = normalize_manifest(_manifest('typed', flag_config=flag_config))
+    assert validate_payload(payload)
+
+
+def test_bad_manifests_do_not_abort_the_archive():
+    results = import_zip(_archive([
+        ('good', _manifest('bulk-good', flag_config={'type': 'Static', 'value': 'flag{ok}'}), {'notes.txt': b'hi'}),
+        ('bad-list', _manifest('bulk-bad-list', flag_config={'type': 'Multiple', 'list': [1, 2]}), {}),
+        ('bad-basics', {'basics': 'x', 'problem': {'statement_md': 'y'}}, {}),
+        ('bad-json', '{', {}),
+    ]))
+    status = {result['directory']: result['status'] for result in results}
+    assert status == {'good': 'imported', 'bad-list': 'invalid', 'bad-basics': 'invalid', 'bad-json': 'invalid'}
+
+
+def test_failed_attachments_roll_the_problem_back(monkeypatch):
+    def broken(self, problem_id, items):
+        raise OSError('disk full')
+
+    archive = [('flaky', _manifest('bulk-flaky', flag_config={'type': 'Static', 'value': 'flag{x}'}), {'a.bin': b'123'})]
+    monkeypatch.setattr(BlobStore, 'attach', broken)
+    result, = import_zip(_archive(archive))
+    assert result['status'] == 'error'
+    assert store().count('problems', {'slug': 'bulk-flaky'}) == 0
+    monkeypatch.undo()
+    result, = import_zip(_archive(archive))
+    assert result['status'] == 'imported'
+
+
+def _corrupt(archive, name, data):
+    """Overwrites the compressed bytes of member `name` in place."""
+    raw = bytearray(archive.getvalue())
+    info = zipfile.ZipFile(io.BytesIO(bytes(raw))).getinfo(name)
+    start = info.header_offset + 30 + len(info.filename.encode()) + len(info.extra)
+    raw[start:start + len(data)] = data
+    return io.BytesIO(bytes(raw))
+
+
+def _three_challenges(prefix):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for i in range(3):
+            zf.writestr(f'c-{i}/challenge.json',
+                        json.dumps(_manifest(f'{prefix}-{i}', flag_config={'type': 'Static', 'value': 'flag{x}'})))
+            zf.writestr(f'c-{i}/blob.bin', bytes(range(256)) * 64)
+    return buffer
+
+
+def _assert_only_c1_failed(results, prefix):
+    status = {result['directory']: result['status'] for result in results}
+    assert status == {'c-0': 'imported', 'c-1': 'error', 'c-2': 'imported'}
+    assert store().count('problems', {'slug': f'{prefix}-1'}) == 0
+
+
+def test_corrupt_deflate_member_is_rolled_back_per_challenge():
+    results = import_zip(_corrupt(_three_challenges('corrupt'), 'c-1/blob.bin', b'\xff' * 16))
+    _assert_only_c1_failed(results, 'corrupt')
+
+
+def test_truncated_member_is_rolled_back_per_challenge(monkeypatch):
+    stream = bulk_import._stream_member
+
+    def truncated(zf, info):
+        if info.filename == 'c-1/blob.bin':
+            raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+        return stream(zf, info)
+
+    monkeypatch.setattr(bulk_import, '_stream_member', truncated)
+    _assert_only_c1_failed(import_zip(_three_challenges('truncated')), 'truncated')
@@ -0,0 +1,19 @@
+from src.cache import VersionedCache
+
+
+def test_bounded_cache_evicts_least_recently_used():
+    cache = VersionedCache(max_entries=2)
+    cache.get('a', 1, lambda: 'A')
+    cache.get('b', 1, lambda: 'B')
+    cache.get('a', 1, lambda: 'stale')  # a hit refreshes 'a'
+    cache.get('c', 1, lambda: 'C')
+    assert cache.peek('b') is None
+    assert cache.peek('a') == (1, 'A') and cache.peek('c') == (1, 'C')
+    assert cache.stats()['entries'] == 2 and cache.stats()['evictions'] == 1
+
+
+def test_version_change_rebuilds_without_growing():
+    cache = VersionedCache(max_entries=2)
+    cache.get('a', 1, lambda: 'old')
+    assert cache.get('a', 2, lambda: 'new') == 'new'
+    assert cache.stats()['entries'] == 1
@@ -0,0 +1,31 @@
+from src.datasets import library_counts, preview, resolve_dataset
+from src.store import Store
+
+
+def _store():
+    store = Store(':memory:')
+    store.insert_rows('problems', [
+        {'slug': f'p-{i}', 'title': f'P {i}', 'category': ['web', 'pwn'][i % 2], 'difficulty': ['easy', 'hard'][i % 3 == 0]}
+        for i in range(12)
+    ])
+    return store
+
+
+def test_preview_with_empty_selection_covers_whole_library():
+    store = _store()
+    # The Create Benchmark defaults: nothing picked under either filter means every category and difficulty.
+    spec = {'filters': {'category': [], 'difficulty': []}, 'sample_size': 4, 'stratify_by': ['category'], 'seed': 42}
+    problems, _ = resolve_dataset(spec, store)
+    counts, by = library_counts(spec, store)
+    table = preview(problems, counts, by)
+    assert table.set_index('category')['candidates'].to_dict() == {'pwn': 6, 'web': 6}
+    assert table['selected'].sum() == len(problems) == 4
+
+
+def test_preview_follows_filters_and_explicit_slugs():
+    store = _store()
+    spec = {'filters': {'category': ['web'], 'difficulty': []}, 'stratify_by': ['category']}
+    counts, _ = library_counts(spec, store)
+    assert counts['category'].tolist() == ['web']
+    counts, by = library_counts({'ctf_slugs': ['p-0', 'p-1']}, store)
+    assert by == ['category'] and counts['count'].sum() == 2
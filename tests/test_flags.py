@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from src.data import _rescore_chunk
+from src.flags import FlagMatcher
+
+MULTIPLE = {'type': 'Multiple', 'list': ['flag{a}', 'flag{b}'], 'partial_scoring': True}
+
+
+def test_partial_scoring_counts_distinct_flags_in_one_submission():
+    matcher = FlagMatcher(MULTIPLE)
+    scores = matcher.score(pd.Series(['flag{a}', 'flag{a}\nflag{b}', 'found flag{b} and flag{b}', 'flag{c}', None]))
+    assert scores.tolist() == [0.5, 1.0, 0.5, 0.0, 0.0]
+
+
+def test_multiple_without_partial_scoring_is_any_of():
+    matcher = FlagMatcher({**MULTIPLE, 'partial_scoring': False})
+    assert matcher.score(pd.Series(['flag{b}', 'flag{c}\nflag{a}', 'flag{c}'])).tolist() == [1.0, 1.0, 0.0]
+
+
+def test_a_partially_scored_run_counts_as_solved():
+    class Recorder:
+        def update_columns(self, table, ids, **columns):
+            self.columns = dict(columns, ids=ids)
+
+    runs = pd.DataFrame({
+        'id': [1, 2, 3], 'problem_id': [7, 7, 7], 'flag_found': ['flag{a}', 'flag{a}\nflag{b}', 'nope'],
+        'status': ['succeeded', 'failed', 'succeeded'], 'solved': [1, 0, 1], 'success_rate': [100.0, 0.0, 100.0],
+    })
+    db = Recorder()
+    assert _rescore_chunk(db, runs, {7: FlagMatcher(MULTIPLE)}, scan_logs=False) == 3
+    assert db.columns['solved'] == [1, 1, 0]
+    assert db.columns['status'] == ['succeeded', 'succeeded', 'failed']
+    assert np.allclose(db.columns['success_rate'], [50.0, 100.0, 0.0])
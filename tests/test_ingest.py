@@ -0,0 +1,35 @@
+import json
+
+from src.data import ingest_results, store
+from src.ingest import append_records, read_new_records
+
+
+def _record(**fields):
+    return {'problem_id': 1, 'model_id': 1, 'status': 'succeeded', 'metrics': [{'solved': True, 'ttf': 5.0}], **fields}
+
+
+def test_oversize_lines_are_skipped(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    path.write_text(json.dumps(_record(logs='x' * 500)) + '\n' + json.dumps(_record()) + '\n' + '{"partial": ')
+    records, inode, offset = read_new_records(str(path), None, 0, max_bytes=100)
+    assert len(records) == 1
+    assert offset == len(path.read_bytes()) - len('{"partial": ')
+    # Nothing complete to read: the checkpoint stays put.
+    assert read_new_records(str(path), inode, offset, max_bytes=5) == ([], inode, offset)
+
+
+def test_bad_records_and_colliding_ids_do_not_block_the_log(tmp_path):
+    path = str(tmp_path / 'results.jsonl')
+    taken, = store().connection().execute('SELECT MAX(id) FROM runs').fetchone()
+    with open(path, 'w') as f:
+        f.write('[1, 2]\n"text"\n\xff\xfe\n')
+    append_records([
+        _record(id=taken), _record(metrics={'solved': True}), _record(params=['a']),
+        _record(status={'nested': 1}), _record(problem_id='1'), _record(id=taken),
+    ], path)
+    assert ingest_results(path) == 2
+    assert ingest_results(path) == 0
+    append_records([_record(), _record(completed_at=123.0)], path)
+    assert ingest_results(path) == 2
+    stamped = store().connection().execute('SELECT completed_at FROM runs ORDER BY id DESC LIMIT 2').fetchall()
+    assert stamped[0] == (123.0,) and stamped[1][0] > 123.0
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from src import leaderboard
+from src.leaderboard import rank_models
+
+
+def test_each_category_resamples_its_own_problems(monkeypatch):
+    draws = []
+
+    def recording(n_problems, n_boot, rng):
+        weights = bootstrap(n_problems, n_boot, rng)
+        draws.append(weights)
+        return weights
+
+    bootstrap = leaderboard.bootstrap_weights
+    monkeypatch.setattr(leaderboard, 'bootstrap_weights', recording)
+    cells = pd.DataFrame({'model_id': [1] * 5 + [2] * 5, 'problem_id': list(range(5)) * 2,
+                          'count': 4, 'solves': [4, 0, 2, 4, 1, 0, 0, 4, 4, 2]})
+    board = rank_models(cells, pd.Series({0: 'web', 1: 'web', 2: 'web', 3: 'pwn', 4: 'pwn'}), n_boot=200)
+    # One draw per category, each replicate drawing exactly that category's problem count.
+    assert sorted(weights.shape[1] for weights in draws) == [2, 3]
+    assert all((weights.sum(axis=1) == weights.shape[1]).all() for weights in draws)
+    assert not board[['ci_low', 'ci_high']].isna().any().any()
+    assert ((board['ci_low'] <= board['solve_rate']) & (board['solve_rate'] <= board['ci_high'])).all()
@@ -0,0 +1,11 @@
+from src.data import rescore_runs, store
+
+
+def test_rescore_in_small_chunks_matches_one_pass():
+    db = store()
+    rescore_runs()
+    ids = [row[0] for row in db.connection().execute("SELECT id FROM runs WHERE status IN ('succeeded', 'failed')")]
+    db.update_rows('runs', ids, solved=None)
+    # Chunks smaller than the table, so the keyset paging has to cross many boundaries.
+    assert rescore_runs(chunk_size=3) == len(ids)
+    assert rescore_runs(chunk_size=100_000) == 0
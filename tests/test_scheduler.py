@@ -0,0 +1,174 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.scheduler import DEFAULT_WORKERS, Scheduler, Worker, _select, get_scheduler, job_arrays, queue_order, serve
+from src.store import Store
+
+
+def simulate(n_jobs=1500, users=8, seed=0, workers=DEFAULT_WORKERS, tick_s=60.0, mean_interarrival_s=30.0):
+    """Drives a Scheduler over an in-memory store with `n_jobs` synthetic jobs; returns (per-job frame, summary).
+
+    Arrivals are Poisson, one user submits about half of all jobs, about a
+    tenth are high priority and a tenth want a GPU, and run times are
+    log-normal. After every pass that starts jobs the harness checks that
+    no worker is oversubscribed.
+    """
+    rng = np.random.default_rng(seed)
+    store = Store(':memory:')
+    scheduler = Scheduler(store, workers)
+    names = [f'user-{i}' for i in range(users)]
+    weights = np.r_[0.5, np.full(users - 1, 0.5 / max(users - 1, 1))]
+    arrivals = np.cumsum(rng.exponential(mean_interarrival_s, n_jobs))
+    gpu = np.where(rng.random(n_jobs) < 0.1, rng.choice(['rtx', 'a100'], n_jobs), 'none')
+    jobs = pd.DataFrame({
+        'user': rng.choice(names, n_jobs, p=weights),
+        'priority': (rng.random(n_jobs) < 0.1).astype(int),
+        'cpu': rng.choice([1, 2, 4, 8], n_jobs, p=[0.3, 0.4, 0.2, 0.1]),
+        'memory_gb': rng.choice([2, 4, 8, 32], n_jobs, p=[0.3, 0.4, 0.2, 0.1]),
+        'disk_gb': rng.choice([4, 16, 64], n_jobs),
+        'gpu': gpu,
+        'created_at': arrivals,
+        'duration': rng.lognormal(np.log(600), 0.8, n_jobs),
+    })
+    records = jobs.drop(columns=['duration']).assign(status='queued').to_dict('records')
+    durations = jobs['duration'].to_numpy()
+    ids, started_at, ends = {}, {}, []
+    next_arrival, now = 0, 0.0
+    while next_arrival < n_jobs or ends or len(started_at) < len(ids):
+        now += tick_s
+        upto = int(np.searchsorted(arrivals, now, side='right'))
+        if upto > next_arrival:
+            new_ids = store.insert_rows('jobs', records[next_arrival:upto])
+            ids.update(zip(new_ids, range(next_arrival, upto)))
+            next_arrival = upto
+        finished = [job_id for end, job_id in ends if end <= now]
+        if finished:
+            ends = [(end, job_id) for end, job_id in ends if end > now]
+            scheduler.finish(finished, now=now)
+        started = scheduler.schedule(now)
+        for job_id in started:
+            started_at[job_id] = now
+            ends.append((now + durations[ids[job_id]], job_id))
+        if started:
+            active = scheduler.active()
+            free, _ = scheduler.free_capacity(_select(active, active['status'] == 'running'))
+            assert (free >= -1e-9).all(), 'worker oversubscribed'
+        if next_arrival == n_jobs and not ends and len(started_at) < len(ids):
+            break  # only unschedulable jobs are left
+    order = [ids[job_id] for job_id in started_at]
+    jobs['started_at'] = np.nan
+    jobs.loc[order, 'started_at'] = list(started_at.values())
+    jobs['wait_s'] = jobs['started_at'] - jobs['created_at']
+    busy = (jobs['cpu'] * jobs['duration'])[jobs['started_at'].notna()].sum()
+    makespan = float((jobs['started_at'] + jobs['duration']).max())
+    summary = {
+        'jobs': n_jobs,
+        'started': int(jobs['started_at'].notna().sum()),
+        'makespan_s': makespan,
+        'cpu_utilization': float(busy / (scheduler.totals[0] * makespan)),
+        'mean_wait_s': float(jobs['wait_s'].mean()),
+        'p90_wait_s': float(jobs['wait_s'].quantile(0.9)),
+        'wait_by_priority': jobs.groupby('priority')['wait_s'].mean().to_dict(),
+        'wait_by_user': jobs.groupby('user')['wait_s'].mean().to_dict(),
+    }
+    return jobs, summary
+
+
+def _queued(rows):
+    """job_arrays() of queued (id, user, priority, cpu, created_at) rows, each asking 1 GB of memory and disk."""
+    return job_arrays([(job_id, user, 'queued', priority, cpu, 1, 1, 'none', None, created_at)
+                       for job_id, user, priority, cpu, created_at in rows])
+
+
+def test_fair_share_interleaves_users():
+    # alice queued three jobs before bob's one; dominant resource fairness still gives bob the second slot.
+    queued = _queued([(1, 'alice', 0, 4, 1.0), (2, 'alice', 0, 4, 2.0), (3, 'alice', 0, 4, 3.0), (4, 'bob', 0, 4, 4.0)])
+    order = [int(queued['id'][p]) for p in queue_order(queued, {}, np.array([16.0, 64, 64, 0]))]
+    assert order == [1, 4, 2, 3]
+
+
+def test_fair_share_counts_running_usage():
+    queued = _queued([(1, 'alice', 0, 2, 1.0), (2, 'bob', 0, 2, 2.0)])
+    usage = {'alice': np.array([8.0, 1, 1, 0])}
+    order = [int(queued['id'][p]) for p in queue_order(queued, usage, np.array([16.0, 64, 64, 0]))]
+    assert order == [2, 1]
+
+
+def test_priority_goes_first():
+    queued = _queued([(1, 'alice', 0, 1, 1.0), (2, 'bob', 0, 1, 2.0), (3, 'alice', 1, 1, 3.0)])
+    assert int(queued['id'][next(queue_order(queued, {}, np.array([16.0, 64, 64, 0])))]) == 3
+
+
+def test_schedule_packs_without_exceeding_capacity():
+    store = Store(':memory:')
+    scheduler = Scheduler(store, (Worker('small', 4, 16, 100), Worker('gpu', 8, 32, 100, 'rtx', 1)))
+    store.insert_rows('jobs', [
+        {'user': 'u', 'status': 'queued', 'priority': 0, 'cpu': 3, 'memory_gb': 4, 'disk_gb': 10, 'gpu': 'none', 'created_at': 1.0},
+        {'user': 'u', 'status': 'queued', 'priority': 0, 'cpu': 3, 'memory_gb': 4, 'disk_gb': 10, 'gpu': 'none', 'created_at': 2.0},
+        {'user': 'v', 'status': 'queued', 'priority': 0, 'cpu': 2, 'memory_gb': 4, 'disk_gb': 10, 'gpu': 'rtx', 'created_at': 3.0},
+        {'user': 'v', 'status': 'queued', 'priority': 0, 'cpu': 64, 'memory_gb': 4, 'disk_gb': 10, 'gpu': 'none', 'created_at': 4.0},
+    ])
+    started = scheduler.schedule(now=10.0)
+    statuses = dict(store.connection().execute('SELECT id, status FROM jobs').fetchall())
+    assert statuses[4] == 'unschedulable'
+    assert statuses[3] == 'running'
+    active = scheduler.active()
+    free, _ = scheduler.free_capacity(_select(active, active['status'] == 'running'))
+    assert (free >= 0).all() and len(started) == 3
+    # The CPU job that did not fit the CPU worker went to the GPU worker only as a last resort.
+    workers = dict(store.connection().execute("SELECT id, worker FROM jobs WHERE status = 'running'").fetchall())
+    assert workers[1] == 'small' and workers[2] == 'gpu'
+
+
+def test_simulation_runs_every_job_within_capacity():
+    jobs, summary = simulate()
+    assert summary['started'] == summary['jobs']
+    assert (jobs['wait_s'] >= 0).all()
+    assert 0 < summary['cpu_utilization'] <= 1
+
+
+def test_simulation_priority_and_fair_share():
+    _, summary = simulate(seed=1)
+    assert summary['wait_by_priority'][1] < summary['wait_by_priority'][0]
+    # user-0 submits half of all jobs; fair share makes them, not the light users, absorb the queueing.
+    waits = summary['wait_by_user']
+    light = np.mean([wait for user, wait in waits.items() if user != 'user-0'])
+    assert waits['user-0'] > light
+
+
+def test_blocked_head_reserves_its_worker():
+    store = Store(':memory:')
+    scheduler = Scheduler(store, (Worker('a', 8, 32, 100), Worker('b', 8, 32, 100)))
+    job = {'status': 'queued', 'memory_gb': 1, 'disk_gb': 1, 'gpu': 'none'}
+    store.insert_rows('jobs', [{**job, 'user': 'u', 'priority': 0, 'cpu': 6, 'created_at': 1.0},
+                               {**job, 'user': 'v', 'priority': 0, 'cpu': 6, 'created_at': 2.0}])
+    assert scheduler.schedule(now=1.0) == [1, 2]
+    # Both workers have 2 CPUs free; the 8-CPU high-priority job holds one, so the 1-CPU jobs only backfill the other.
+    store.insert_rows('jobs', [{**job, 'user': 'w', 'priority': 1, 'cpu': 8, 'created_at': 3.0}] +
+                      [{**job, 'user': 'x', 'priority': 0, 'cpu': 1, 'created_at': 4.0 + i} for i in range(4)])
+    assert scheduler.schedule(now=2.0) == [4, 5]
+    workers = dict(store.connection().execute('SELECT id, worker FROM jobs').fetchall())
+    assert workers[4] == workers[5]
+    # Once the reserved worker drains, the large job starts there.
+    scheduler.finish([job_id for job_id in (1, 2) if workers[job_id] != workers[4]])
+    assert scheduler.schedule(now=3.0) == [3]
+
+
+def test_service_admits_without_a_page_open():
+    scheduler = get_scheduler()
+    job_id, = scheduler.store.insert_rows('jobs', [{'user': 'svc', 'status': 'queued', 'priority': 0, 'cpu': 1, 'memory_gb': 1,
+                                                    'disk_gb': 1, 'gpu': 'none', 'created_at': time.time()}])
+    stop = threading.Event()
+    thread = threading.Thread(target=serve, args=(scheduler, stop, 0.05), daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    try:
+        while scheduler.store.connection().execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()[0] == 'queued':
+            assert time.time() < deadline, 'the service never admitted the job'
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,22 @@
+from src.search import search_runs
+from src.store import Store
+
+
+def test_best_match_wins_however_old():
+    store = Store(':memory:')
+    # The best match is the oldest run, behind thousands of newer, weaker ones.
+    store.insert_rows('runs', [{'problem_id': 1, 'model_id': 1, 'status': 'succeeded', 'flag_found': 'canary canary'}])
+    store.insert_rows('runs', [
+        {'problem_id': 1, 'model_id': 1 + i % 2, 'status': 'failed', 'logs': 'canary ' + 'filler ' * 50} for i in range(6000)
+    ])
+    hits = search_runs('canary', k=3, store=store)
+    assert hits['id'].tolist()[0] == 1
+    assert hits['score'].is_monotonic_decreasing
+    assert '«canary»' in hits['snippet'].iloc[0]
+
+
+def test_filters_apply_before_the_top_k():
+    store = Store(':memory:')
+    store.insert_rows('runs', [{'problem_id': 1, 'model_id': 1 + i % 3, 'status': 'failed', 'logs': f'token {i}'} for i in range(30)])
+    hits = search_runs('token', k=5, model_id=3, store=store)
+    assert len(hits) == 5 and set(hits['model_id']) == {3}
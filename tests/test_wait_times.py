@@ -0,0 +1,19 @@
+import json
+
+from src.store import Store
+from src.wait_times import RuntimeModel
+
+
+def test_runtime_comes_from_results_not_from_reaping():
+    store = Store(':memory:')
+    jobs = []
+    for i in range(6):
+        tasks = [[f'h{i}-{t}'] for t in range(2)]
+        jobs.append({'model_id': 1, 'benchmark_id': 1, 'status': 'finished', 'priority': 0, 'started_at': 1000.0,
+                     # Reaped an hour late: nobody was watching.
+                     'finished_at': 1000.0 + 3600, 'payload': json.dumps({'profile': 'kali', 'tasks': tasks})})
+        store.insert_rows('runs', [{'problem_id': 1, 'model_id': 1, 'status': 'succeeded', 'task_hash': f'h{i}-{t}',
+                                    'completed_at': 1000.0 + 100 * (t + 1)} for t in range(2)])
+    store.insert_rows('jobs', jobs)
+    # Each job's last result lands 200 s after it started: 100 s per task.
+    assert RuntimeModel.fit(store).distribution(1, 1, 'kali').tolist() == [100.0] * 6